@@ -119,15 +119,88 @@
 
 import torch
 from flask import Flask, request, jsonify
-from transformers import BertTokenizer, BertForSequenceClassification
+from transformers import BertConfig, BertTokenizer, BertForSequenceClassification
 import joblib
 import re
 import os
+import threading
+import time
+from batching import MicroBatcher
+from inference_backends import create_backend
+from result_cache import ResultCache, cache_key
 
 app = Flask(__name__)
 
+BUCKET_SIZE = int(os.environ.get('BUCKET_SIZE', 16))          # Texts per padded forward pass
+MAX_BATCH_TEXTS = int(os.environ.get('MAX_BATCH_TEXTS', 256))  # Largest /predict/batch request
+CLASSIFIER_BACKEND = os.environ.get('CLASSIFIER_BACKEND', 'torch')  # torch | quantized | onnx
+RESULT_CACHE_BYTES = int(os.environ.get('RESULT_CACHE_BYTES', 32 * 1024 * 1024))  # 0 disables the cache
+# Long notices are classified from overlapping windows of the full text whose
+# logits are pooled; MAX_WINDOWS=1 restores plain truncation to 512 tokens
+WINDOW_TOKENS = 510                                               # 512 minus [CLS] and [SEP]
+WINDOW_OVERLAP = int(os.environ.get('WINDOW_OVERLAP', 128))       # Tokens shared by neighbouring windows
+MAX_WINDOWS = int(os.environ.get('MAX_WINDOWS', 8))               # Caps the cost of one notice
+WINDOW_POOLING = os.environ.get('WINDOW_POOLING', 'mean')         # mean | max
+MODEL_CONFIG_PATH = os.environ.get('MODEL_CONFIG_PATH', 'model_config.json')  # Optional; defaults to bert-base-uncased
+CHECKPOINT_PATH = 'notice_classifier_model.pt'
+PRIORITY_HEAD_PATH = os.environ.get('PRIORITY_HEAD_PATH', 'priority_head.pt')  # Written by train_priority_head.py
+MODEL_VERSION = os.environ.get('MODEL_VERSION')  # Reported with predictions; derived from the weight files if unset
+
+def build_model(num_labels):
+    # BertConfig's defaults are the bert-base-uncased architecture, so no
+    # download is needed. The model is created on the meta device: no memory
+    # is allocated and no random init runs for weights the checkpoint replaces.
+    if os.path.exists(MODEL_CONFIG_PATH):
+        config = BertConfig.from_json_file(MODEL_CONFIG_PATH)
+    else:
+        config = BertConfig()
+    config.num_labels = num_labels
+    
+    with torch.device('meta'):
+        model = BertForSequenceClassification(config)
+    
+    try:
+        state_dict = torch.load(CHECKPOINT_PATH, map_location='cpu', mmap=True, weights_only=True)
+    except RuntimeError:
+        # Legacy (pre-zipfile) checkpoints can't be memory-mapped
+        state_dict = torch.load(CHECKPOINT_PATH, map_location='cpu', weights_only=True)
+    
+    # assign=True adopts the checkpoint tensors instead of copying into new ones
+    result = model.load_state_dict(state_dict, assign=True, strict=False)
+    unexpected = [key for key in result.unexpected_keys if not key.endswith('position_ids')]
+    if result.missing_keys or unexpected:
+        raise RuntimeError(f"Checkpoint does not match the model. Missing: {result.missing_keys}, unexpected: {unexpected}")
+    
+    # The embedding index buffers are not saved in the checkpoint
+    embeddings = model.bert.embeddings
+    position_ids = torch.arange(config.max_position_embeddings).expand((1, -1))
+    embeddings.register_buffer('position_ids', position_ids, persistent=False)
+    if hasattr(embeddings, 'token_type_ids'):
+        embeddings.register_buffer('token_type_ids', torch.zeros(position_ids.size(), dtype=torch.long), persistent=False)
+    return model
+
+def load_priority_head(hidden_size):
+    # A linear priority classifier over the same pooled encoder output the
+    # category head reads, so one forward pass serves both
+    if not os.path.exists(PRIORITY_HEAD_PATH):
+        print(f"⚠️ No priority head at {PRIORITY_HEAD_PATH}; /predict/all is disabled")
+        return None, []
+    checkpoint = torch.load(PRIORITY_HEAD_PATH, map_location='cpu', weights_only=True)
+    head = torch.nn.Linear(hidden_size, len(checkpoint['labels']))
+    head.load_state_dict(checkpoint['state_dict'])
+    head.eval()
+    return head, list(checkpoint['labels'])
+
+def model_version():
+    # Changes whenever the checkpoint or the priority head is replaced, so
+    # stored predictions can be traced to (and re-run after) a model update
+    if MODEL_VERSION:
+        return MODEL_VERSION
+    stamps = [str(int(os.path.getmtime(path))) for path in (CHECKPOINT_PATH, PRIORITY_HEAD_PATH) if os.path.exists(path)]
+    return '-'.join(['bert'] + stamps)
+
 class NoticeClassifier:
-    def __init__(self):
+    def __init__(self, backend=CLASSIFIER_BACKEND):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         # Load tokenizer
@@ -137,66 +210,394 @@ class NoticeClassifier:
         self.label_encoder = joblib.load('label_encoder.joblib')
         self.class_names = list(self.label_encoder.classes_)
         
-        # Initialize model with correct architecture
-        self.model = BertForSequenceClassification.from_pretrained(
-            "bert-base-uncased",
-            num_labels=len(self.class_names),
-            ignore_mismatched_sizes=True
-        )
-        
-        # Load trained weights
-        self.model.load_state_dict(
-            torch.load('notice_classifier_model.pt', map_location=self.device)
-        )
+        # Build the model from the local config and load the trained weights once
+        self.model = build_model(len(self.class_names))
         self.model.to(self.device)
         self.model.eval()
+        
+        # Inference runs through the configured CPU backend
+        self.backend = create_backend(backend, self.model, self.device,
+                                      checkpoint_path=CHECKPOINT_PATH, inplace=True)
+        
+        # Optional priority head sharing the encoder pass
+        self.priority_head, self.priority_labels = load_priority_head(self.model.config.hidden_size)
+        self.version = model_version()
+        
+        # Repeat classifications of the same cleaned text skip the model
+        self.cache = ResultCache(RESULT_CACHE_BYTES)
+    
+    WHITESPACE = re.compile(r'\s+')
+    DISALLOWED = re.compile(r'[^\w\s.,!?\-]')
     
     def clean_text(self, text):
-        text = re.sub(r'\n+', '\n', text)
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[^\w\s.,!?\-]', '', text)
-        return text.strip()
+        # \s+ already folds newlines, so two precompiled passes are enough
+        return self.DISALLOWED.sub('', self.WHITESPACE.sub(' ', text)).strip()
     
-    def predict(self, text, top_k=3):
-        text = self.clean_text(text)
-        inputs = self.tokenizer(
-            text,
-            return_tensors="pt",
-            padding=True,
-            truncation=True,
-            max_length=512
-        ).to(self.device)
+    def windows(self, ids):
+        # Start offsets of overlapping windows covering all of `ids`. Past
+        # MAX_WINDOWS, evenly spaced windows are kept (always the first and the
+        # last) so the whole notice is still sampled at a bounded cost.
+        if len(ids) <= WINDOW_TOKENS or MAX_WINDOWS <= 1:
+            return [ids[:WINDOW_TOKENS]]
+        step = max(1, WINDOW_TOKENS - WINDOW_OVERLAP)
+        starts = list(range(0, len(ids) - WINDOW_TOKENS + 1, step))
+        if starts[-1] + WINDOW_TOKENS < len(ids):
+            starts.append(len(ids) - WINDOW_TOKENS)
+        if len(starts) > MAX_WINDOWS:
+            starts = [starts[round(i * (len(starts) - 1) / (MAX_WINDOWS - 1))] for i in range(MAX_WINDOWS)]
+        return [ids[start:start + WINDOW_TOKENS] for start in starts]
+    
+    def cached(self, text, variant=3):
+        return self.cache.get(cache_key(self.clean_text(text), variant), record_miss=False)
+    
+    def predict_batch(self, texts, top_k=3, bucket_size=BUCKET_SIZE):
+        return self._cached_run(texts, top_k, lambda missing: self._run_model(missing, top_k, bucket_size))
+    
+    def predict_all(self, texts, top_k=3, bucket_size=BUCKET_SIZE):
+        # Category and priority from a single encoder pass per window
+        if self.priority_head is None:
+            raise RuntimeError(f"No priority head loaded from {PRIORITY_HEAD_PATH}")
+        return self._cached_run(texts, f"all:{top_k}", lambda missing: self._run_all(missing, top_k, bucket_size))
+    
+    def embed(self, texts, bucket_size=BUCKET_SIZE):
+        # Unit-length sentence embeddings for semantic search
+        return self._cached_run(texts, "embed", lambda missing: self._embed(missing, bucket_size))
+    
+    def _cached_run(self, texts, variant, run):
+        texts = [self.clean_text(text) for text in texts]
+        keys = [cache_key(text, variant) for text in texts]
         
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            probs = torch.nn.functional.softmax(outputs.logits, dim=1)
+        batch_results = [self.cache.get(key) for key in keys]
+        # Each distinct uncached text runs through the model once
+        missing = {}
+        for i, result in enumerate(batch_results):
+            if result is None:
+                missing.setdefault(keys[i], []).append(i)
+        if missing:
+            indexes = list(missing.values())
+            results = run([texts[group[0]] for group in indexes])
+            for group, result in zip(indexes, results):
+                self.cache.put(keys[group[0]], result)
+                for i in group:
+                    batch_results[i] = result
+        
+        return batch_results
+    
+    def _encode(self, texts, bucket_size):
+        # Every text is split into windows, and the windows of all texts run
+        # together, sorted by token length in buckets of similar length so
+        # short notices are not padded up to the longest window in the request.
+        # The attention mask keeps padding from changing each window's logits.
+        # Returns, per text, its windows' category logits and pooled outputs.
+        encoded = self.tokenizer(texts, add_special_tokens=False)['input_ids']
+        windows, owners = [], []
+        for i, ids in enumerate(encoded):
+            for window in self.windows(ids):
+                windows.append([self.tokenizer.cls_token_id] + window + [self.tokenizer.sep_token_id])
+                owners.append(i)
+        order = sorted(range(len(windows)), key=lambda w: len(windows[w]))
+        
+        window_logits = [None] * len(windows)
+        window_pooled = [None] * len(windows)
+        for start in range(0, len(order), bucket_size):
+            bucket = order[start:start + bucket_size]
+            inputs = self.tokenizer.pad({
+                'input_ids': [windows[w] for w in bucket],
+                'token_type_ids': [[0] * len(windows[w]) for w in bucket],
+                'attention_mask': [[1] * len(windows[w]) for w in bucket]
+            }, return_tensors="pt").to(self.backend.device)
+            
+            logits, pooled = self.backend.forward(dict(inputs))
+            for w, row_logits, row_pooled in zip(bucket, logits.float().cpu(), pooled.float().cpu()):
+                window_logits[w] = row_logits
+                window_pooled[w] = row_pooled
         
+        grouped_logits = [[] for _ in texts]
+        grouped_pooled = [[] for _ in texts]
+        for owner, logits, pooled in zip(owners, window_logits, window_pooled):
+            grouped_logits[owner].append(logits)
+            grouped_pooled[owner].append(pooled)
+        return [torch.stack(rows) for rows in grouped_logits], [torch.stack(rows) for rows in grouped_pooled]
+    
+    def _pool(self, window_scores):
+        # One score per class for each text from its windows' scores
+        if WINDOW_POOLING == 'max':
+            return torch.stack([rows.max(dim=0).values for rows in window_scores])
+        return torch.stack([rows.mean(dim=0) for rows in window_scores])
+    
+    def _top_k(self, logits, top_k):
+        probs = torch.nn.functional.softmax(logits, dim=1)
+        batch_results = []
         top_probs, top_indices = torch.topk(probs, k=top_k)
-        results = []
-        for i in range(top_k):
-            label = self.class_names[top_indices[0][i].item()]
-            prob = top_probs[0][i].item()
-            results.append({"label": label, "confidence": round(prob, 4)})
+        for row_probs, row_indices in zip(top_probs.tolist(), top_indices.tolist()):
+            results = []
+            for prob, index in zip(row_probs, row_indices):
+                results.append({"label": self.class_names[index], "confidence": round(prob, 4)})
+            batch_results.append(results)
+        return batch_results
+    
+    def _run_model(self, texts, top_k, bucket_size):
+        window_logits, _ = self._encode(texts, bucket_size)
+        return self._top_k(self._pool(window_logits), top_k)
+    
+    def _run_all(self, texts, top_k, bucket_size):
+        window_logits, window_pooled = self._encode(texts, bucket_size)
+        with torch.no_grad():
+            priority_probs = torch.nn.functional.softmax(
+                self._pool([self.priority_head(rows) for rows in window_pooled]), dim=1
+            )
         
-        return results
+        batch_results = []
+        categories = self._top_k(self._pool(window_logits), top_k)
+        embeddings = self._embeddings(window_pooled)
+        for category, probs, embedding in zip(categories, priority_probs, embeddings):
+            confidence, index = torch.max(probs, dim=0)
+            batch_results.append({
+                "category": category,
+                "priority": {"label": self.priority_labels[index.item()], "confidence": round(confidence.item(), 4)},
+                "embedding": embedding
+            })
+        return batch_results
+    
+    def _embed(self, texts, bucket_size):
+        _, window_pooled = self._encode(texts, bucket_size)
+        return self._embeddings(window_pooled)
+    
+    def _embeddings(self, window_pooled):
+        # Mean of the windows' pooled outputs, scaled to unit length so a dot
+        # product is the cosine similarity
+        vectors = torch.nn.functional.normalize(torch.stack([rows.mean(dim=0) for rows in window_pooled]), dim=1)
+        return [[round(value, 6) for value in vector] for vector in vectors.tolist()]
+    
+    def features(self, texts, bucket_size=BUCKET_SIZE):
+        # Pooled encoder output per text (mean over its windows), the input
+        # the priority head is trained on
+        _, window_pooled = self._encode([self.clean_text(text) for text in texts], bucket_size)
+        return torch.stack([rows.mean(dim=0) for rows in window_pooled])
+    
+    def predict(self, text, top_k=3):
+        return self.predict_batch([text], top_k=top_k)[0]
+
+# The classifier loads in a background thread so the app starts serving
+# (and answering /health) right away; /ready turns 200 once it has warmed up.
+classifier = None
+classifier_status = {"state": "not_started", "error": None, "loadSeconds": None}
+_load_lock = threading.Lock()
+_loaded = threading.Event()
+
+def load_classifier():
+    global classifier
+    started = time.perf_counter()
+    classifier_status["state"] = "loading"
+    print("⏳ Loading notice classifier...")
+    try:
+        model = NoticeClassifier()
+        model._run_model(["Warm-up notice"], 1, BUCKET_SIZE)  # First forward pass allocates buffers
+        classifier = model
+        classifier_status.update(state="ready", error=None, loadSeconds=round(time.perf_counter() - started, 2))
+        print(f"✅ Notice classifier ready in {classifier_status['loadSeconds']}s")
+    except Exception as e:
+        classifier_status.update(state="failed", error=str(e))
+        print(f"❌ Failed to load notice classifier: {e}")
+    finally:
+        _loaded.set()
+
+def start_loading():
+    with _load_lock:
+        if classifier_status["state"] != "not_started":
+            return
+        classifier_status["state"] = "loading"
+    threading.Thread(target=load_classifier, name="load-classifier", daemon=True).start()
+
+def wait_until_loaded(timeout=None):
+    start_loading()
+    _loaded.wait(timeout)
+    return classifier
+
+def not_ready_response():
+    return jsonify({"error": "Model is not ready", "model": classifier_status}), 503
+
+def parse_top_k(data, default=3):
+    # top_k from a request body; None unless it is an integer (or integer
+    # string) between 1 and the number of categories
+    value = data.get('top_k', default)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        return None
+    try:
+        top_k = int(value)
+    except ValueError:
+        return None
+    return top_k if 1 <= top_k <= len(classifier.class_names) else None
+
+def top_k_error():
+    return jsonify({"error": f"top_k must be an integer between 1 and {len(classifier.class_names)}"}), 400
+
+def json_body():
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
 
-# Initialize classifier
-classifier = NoticeClassifier()
+def run_batch(items):
+    # items are (text, top_k, with_priority); each kind is ranked once with
+    # its largest k and trimmed per request
+    batch_results = [None] * len(items)
+    for with_priority in (False, True):
+        group = [i for i, item in enumerate(items) if item[2] == with_priority]
+        if not group:
+            continue
+        top_k = max(items[i][1] for i in group)
+        texts = [items[i][0] for i in group]
+        if with_priority:
+            for i, result in zip(group, classifier.predict_all(texts, top_k=top_k)):
+                batch_results[i] = {**result, "category": result["category"][:items[i][1]]}
+        else:
+            for i, result in zip(group, classifier.predict_batch(texts, top_k=top_k)):
+                batch_results[i] = result[:items[i][1]]
+    return batch_results
+
+# Concurrent /predict requests share forward passes
+batcher = MicroBatcher(
+    run_batch,
+    max_batch_size=int(os.environ.get('BATCH_MAX_SIZE', 16)),
+    max_wait_ms=float(os.environ.get('BATCH_MAX_WAIT_MS', 5))
+)
 
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
-        data = request.get_json()
+        data = json_body()
+        if data is None:
+            return jsonify({"error": "Expected a JSON object"}), 400
+        text = data.get('text', '')
+        
+        if not text:
+            return jsonify({"error": "No text provided"}), 400
+        if classifier is None:
+            return not_ready_response()
+        top_k = parse_top_k(data)
+        if top_k is None:
+            return top_k_error()
+        
+        predictions = classifier.cached(text, top_k) or batcher.submit((text, top_k, False)).result()
+        return jsonify({"predictions": predictions, "modelVersion": classifier.version})
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/predict/all', methods=['POST'])
+def predict_all():
+    # Category and priority for one notice from a shared encoder pass
+    try:
+        data = json_body()
+        if data is None:
+            return jsonify({"error": "Expected a JSON object"}), 400
         text = data.get('text', '')
         
         if not text:
             return jsonify({"error": "No text provided"}), 400
+        if classifier is None:
+            return not_ready_response()
+        if classifier.priority_head is None:
+            return jsonify({"error": "No priority head installed", "priorityHead": False}), 503
+        top_k = parse_top_k(data)
+        if top_k is None:
+            return top_k_error()
         
-        predictions = classifier.predict(text)
+        result = classifier.cached(text, f"all:{top_k}") or batcher.submit((text, top_k, True)).result()
+        if not data.get('embed'):
+            result = {key: value for key, value in result.items() if key != 'embedding'}
+        return jsonify({**result, "modelVersion": classifier.version})
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/embed', methods=['POST'])
+def embed():
+    # Sentence embeddings from the classifier's encoder, for semantic search
+    try:
+        data = json_body()
+        if data is None:
+            return jsonify({"error": "Expected a JSON object"}), 400
+        texts = data.get('texts')
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({"error": "texts must be a non-empty list"}), 400
+        if classifier is None:
+            return not_ready_response()
+        if len(texts) > MAX_BATCH_TEXTS:
+            return jsonify({"error": f"Too many texts (max {MAX_BATCH_TEXTS})"}), 400
+        if any(not isinstance(text, str) for text in texts):
+            return jsonify({"error": "texts must be strings"}), 400
+        
+        embeddings = classifier.embed(texts)
+        return jsonify({
+            "embeddings": embeddings,
+            "dim": len(embeddings[0]),
+            "modelVersion": classifier.version
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_many():
+    try:
+        data = json_body()
+        if data is None:
+            return jsonify({"error": "Expected a JSON object"}), 400
+        texts = data.get('texts')
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({"error": "texts must be a non-empty list"}), 400
+        if classifier is None:
+            return not_ready_response()
+        if len(texts) > MAX_BATCH_TEXTS:
+            return jsonify({"error": f"Too many texts (max {MAX_BATCH_TEXTS})"}), 400
+        invalid = [i for i, text in enumerate(texts) if not isinstance(text, str) or not text.strip()]
+        if invalid:
+            return jsonify({"error": "Empty or non-string texts", "indexes": invalid}), 400
+        top_k = parse_top_k(data)
+        if top_k is None:
+            return top_k_error()
+        
+        # Results come back in input order
+        predictions = classifier.predict_batch(texts, top_k=top_k)
         return jsonify({"predictions": predictions})
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/health', methods=['GET'])
+def health():
+    # Liveness: the process is up, whether or not the model has loaded
+    return jsonify({"status": "ok", "model": classifier_status})
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    if classifier is None:
+        return not_ready_response()
+    return jsonify({
+        "status": "ready",
+        "model": classifier_status,
+        "modelVersion": classifier.version,
+        "priorityHead": classifier.priority_head is not None
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        "model": classifier_status,
+        "backend": classifier.backend.name if classifier else None,
+        "batching": batcher.metrics(),
+        "resultCache": classifier.cache.metrics() if classifier else None
+    })
+
+# The debug reloader's watcher process never serves requests, so only the
+# serving process loads the model. serve.py turns background loading off and
+# loads it itself before forking workers.
+BACKGROUND_LOAD = os.environ.get('CLASSIFIER_BACKGROUND_LOAD', 'true').lower() == 'true'
+if BACKGROUND_LOAD and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    start_loading()
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # 5001 is the main backend's port
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5002)), debug=True)
\ No newline at end of file
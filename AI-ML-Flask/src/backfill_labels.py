@@ -0,0 +1,199 @@
+# Backfills model labels onto existing notices, straight from MongoDB.
+#
+#   cd AI-ML-Flask/src
+#   MONGO_URI=mongodb://... python backfill_labels.py --workers 4 --batch-size 256
+#
+# Notices are read from a cursor in _id order and classified in batches by
+# NoticeClassifier in this process (the web service is not involved). With
+# --workers N the model is loaded once and N forked processes share it, each
+# limited to --threads-per-worker torch threads. Labels are written with one
+# bulk_write per batch, in the same fields the backend's background
+# classifier fills. After every batch the last written _id is saved to the
+# checkpoint file, so an interrupted run resumes where it stopped (--restart
+# ignores the checkpoint). By default only notices without labels are
+# processed; --all reclassifies everything, e.g. after a model update.
+import argparse
+import datetime
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import deque
+
+os.environ['CLASSIFIER_BACKGROUND_LOAD'] = 'false'
+os.environ['RESULT_CACHE_BYTES'] = '0'  # Every notice is seen once
+
+import torch
+
+torch.set_num_threads(1)  # Raised per worker after the fork
+
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne
+
+import app as service
+
+HTML_TAG = re.compile(r'<[^>]+>')
+PROJECTION = {'title': 1, 'subject': 1, 'content': 1}
+
+
+def classification_text(doc, body=None):
+    # Must match classification_text() in backend/app/app2.py, so the stored
+    # hash lets the backend tell whether a notice changed since. The HTML is
+    # in notice_bodies unless the notice predates them (inline `content`)
+    content = doc.get('content')
+    if content is None:
+        content = body or ''
+    content = html.unescape(HTML_TAG.sub(' ', content))
+    return f"{doc.get('title') or ''} {doc.get('subject') or ''} {content}".strip()
+
+
+def init_worker(threads):
+    torch.set_num_threads(threads)
+
+
+def classify(batch):
+    # batch: [(id, text)] -> [(id, fields to $set)]
+    classifier = service.classifier
+    ids, texts = zip(*batch)
+    now = datetime.datetime.now()
+    updates = []
+    if classifier.priority_head is not None:
+        for notice_id, result in zip(ids, classifier.predict_all(list(texts), top_k=1)):
+            updates.append((notice_id, {
+                'predicted_category': result['category'][0]['label'],
+                'category_confidence': result['category'][0]['confidence'],
+                'predicted_priority': result['priority']['label'],
+                'priority_confidence': result['priority']['confidence'],
+            }))
+    else:
+        for notice_id, result in zip(ids, classifier.predict_batch(list(texts), top_k=1)):
+            updates.append((notice_id, {
+                'predicted_category': result[0]['label'],
+                'category_confidence': result[0]['confidence'],
+            }))
+    for (_, fields), text in zip(updates, texts):
+        content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        fields.update(model_version=classifier.version, classified_at=now,
+                      content_hash=content_hash, classified_hash=content_hash)
+    return updates
+
+
+def with_bodies(bodies, docs):
+    # [(id, text)] for a batch of notices; one notice_bodies query per batch
+    ids = [str(doc['_id']) for doc in docs if doc.get('content') is None]
+    found = {b['notice_id']: b.get('content') for b in bodies.find({'notice_id': {'$in': ids}}, {'notice_id': 1, 'content': 1})} if ids else {}
+    return [(doc['_id'], classification_text(doc, found.get(str(doc['_id'])))) for doc in docs]
+
+
+def read_batches(collection, query, batch_size, limit):
+    bodies = collection.database['notice_bodies']
+    cursor = collection.find(query, PROJECTION, sort=[('_id', 1)], batch_size=batch_size, no_cursor_timeout=True)
+    if limit:
+        cursor = cursor.limit(limit)
+    try:
+        docs = []
+        for doc in cursor:
+            docs.append(doc)
+            if len(docs) == batch_size:
+                yield with_bodies(bodies, docs)
+                docs = []
+        if docs:
+            yield with_bodies(bodies, docs)
+    finally:
+        cursor.close()
+
+
+def classify_in_order(pool, batches, in_flight):
+    # Results come back in cursor order, so the checkpoint only moves past
+    # notices whose labels are written; at most `in_flight` batches are read
+    # ahead of the writes
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.apply_async(classify, (batch,)))
+        if len(pending) >= in_flight:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None, 0
+    with open(path) as f:
+        state = json.load(f)
+    return ObjectId(state['lastId']), state.get('processed', 0)
+
+
+def save_checkpoint(path, last_id, processed):
+    # Write-then-rename so an interrupt never leaves a truncated checkpoint
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump({'lastId': str(last_id), 'processed': processed}, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify historical notices and store the labels")
+    parser.add_argument("--mongo-uri", default=os.environ.get('MONGO_URI'))
+    parser.add_argument("--db", default="smart-notice")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--threads-per-worker", type=int, default=0,
+                        help="torch intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--checkpoint", default="backfill_checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first notice")
+    parser.add_argument("--all", action="store_true", help="Reclassify notices that already have labels")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many notices")
+    args = parser.parse_args()
+
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    last_id, processed = (None, 0) if args.restart else load_checkpoint(args.checkpoint)
+    query = {} if args.all else {'classified_at': {'$exists': False}}
+    if last_id is not None:
+        query['_id'] = {'$gt': last_id}
+        print(f"↩️ Resuming after {last_id} ({processed} notices already done)")
+
+    service.load_classifier()
+    if service.classifier is None:
+        sys.exit(f"❌ Classifier failed to load: {service.classifier_status['error']}")
+
+    collection = MongoClient(args.mongo_uri)[args.db]['notices']
+    batches = read_batches(collection, query, args.batch_size, args.limit)
+
+    pool = None
+    if args.workers > 1:
+        # Forked workers inherit the loaded model instead of loading their own
+        pool = multiprocessing.get_context('fork').Pool(args.workers, initializer=init_worker, initargs=(threads,))
+        results = classify_in_order(pool, batches, args.workers * 2)
+    else:
+        init_worker(threads)
+        results = map(classify, batches)
+
+    print(f"🚀 Backfilling with {args.workers} worker(s) x {threads} thread(s), batch {args.batch_size}")
+    started = time.perf_counter()
+    done = 0
+    try:
+        for updates in results:
+            # Skip notices edited since they were read; the backend reclassifies those
+            collection.bulk_write([
+                UpdateOne({'_id': notice_id, 'content_hash': {'$in': [fields['content_hash'], None]}}, {'$set': fields})
+                for notice_id, fields in updates
+            ], ordered=False)
+            done += len(updates)
+            save_checkpoint(args.checkpoint, updates[-1][0], processed + done)
+            elapsed = time.perf_counter() - started
+            print(f"  {processed + done} notices | {done / elapsed:.1f} notices/s")
+    finally:
+        if pool:
+            pool.terminate()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Classified {done} notices in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} notices/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+class MicroBatcher:
+    """Collects concurrent requests into batches for one forward pass.
+
+    Callers submit() an item and get a Future. A single worker thread waits
+    for the first item, then keeps gathering until either `max_batch_size`
+    items are queued or `max_wait_ms` has passed since that first item, and
+    runs `batch_fn` once on the whole batch. `batch_fn` takes a list of items
+    and must return a list of results in the same order.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {"requests": 0, "batches": 0, "items": 0, "errors": 0,
+                       "max_depth": 0, "last_batch_size": 0, "last_batch_ms": 0.0}
+
+    def submit(self, item: Any) -> Future:
+        future = Future()
+        with self._cond:
+            if self._thread is None:
+                # Started lazily so a pre-forked parent never owns the thread
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+            self._queue.append((item, future))
+            self._stats["requests"] += 1
+            self._stats["max_depth"] = max(self._stats["max_depth"], len(self._queue))
+            self._cond.notify()
+        return future
+
+    def metrics(self) -> dict:
+        with self._cond:
+            batches = self._stats["batches"]
+            return {
+                "queueDepth": len(self._queue),
+                "maxQueueDepth": self._stats["max_depth"],
+                "requests": self._stats["requests"],
+                "batches": batches,
+                "errors": self._stats["errors"],
+                "avgBatchSize": round(self._stats["items"] / batches, 2) if batches else 0.0,
+                "lastBatchSize": self._stats["last_batch_size"],
+                "lastBatchMs": self._stats["last_batch_ms"],
+                "maxBatchSize": self.max_batch_size,
+                "maxWaitMs": self.max_wait * 1000.0
+            }
+
+    def _collect(self) -> list:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(self.max_batch_size, len(self._queue)))]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            started = time.perf_counter()
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+                failed = False
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                failed = True
+
+            with self._cond:
+                self._stats["batches"] += 1
+                self._stats["items"] += len(batch)
+                self._stats["errors"] += 1 if failed else 0
+                self._stats["last_batch_size"] = len(batch)
+                self._stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
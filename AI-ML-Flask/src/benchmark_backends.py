@@ -0,0 +1,149 @@
+# Accuracy parity and latency/memory comparison of the classifier backends.
+#
+#   cd AI-ML-Flask/src
+#   python benchmark_backends.py --backends torch quantized onnx --runs 20 --batch-size 16
+#   python benchmark_backends.py --texts notices.txt   # one notice per line
+#
+# Loads the fp32 model once and builds every backend from it. For each backend
+# it reports top-1 agreement with fp32 and the largest absolute difference in
+# any class probability, p50/p95 latency for a single notice and for a batch,
+# the process RSS growth while the backend was built, and the size of its
+# weights. Exits non-zero if a backend's top-1 agreement falls below
+# --min-agreement.
+import argparse
+import os
+import sys
+import time
+
+os.environ['CLASSIFIER_BACKEND'] = 'torch'  # The reference predictions are fp32
+os.environ['RESULT_CACHE_BYTES'] = '0'  # Every run must reach the backend
+
+import torch
+
+from app import CHECKPOINT_PATH, classifier_status, wait_until_loaded
+from inference_backends import BACKENDS, ONNX_MODEL_PATH, create_backend
+
+classifier = wait_until_loaded()
+if classifier is None:
+    sys.exit(f"❌ Classifier failed to load: {classifier_status['error']}")
+
+SAMPLE_TEXTS = [
+    "Mid-semester examinations for all B.Tech second year students will begin on 14th October. The detailed timetable is attached.",
+    "The library will remain closed on Saturday due to annual stock verification.",
+    "Registrations are open for the inter-college hackathon. Teams of up to four members can register before Friday.",
+    "All hostel residents must clear pending mess dues by the end of this month to avoid a late fee.",
+    "The placement cell has scheduled a pre-placement talk by a leading software company in the main auditorium.",
+    "Bus route 7 will be diverted via the ring road from Monday because of construction work near the city gate.",
+    "Scholarship applications for the merit-cum-means scheme must be submitted with income certificates.",
+    "The annual cultural fest will be held next week. Volunteers should report to the student council office.",
+    "Guest lecture on machine learning in healthcare by a visiting professor in seminar hall 2 at 3 PM.",
+    "Fee payment portal will be unavailable tonight between 11 PM and 2 AM for scheduled maintenance.",
+    "Students are reminded that attendance below 75 percent will make them ineligible for the end-semester exams.",
+    "The sports committee invites entries for the inter-department cricket tournament.",
+]
+
+
+def rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def weight_bytes(value):
+    # Quantized Linear layers keep their weights in (packed) tuples
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(weight_bytes(item) for item in value)
+    return 0
+
+
+def model_bytes(backend):
+    if backend.name == 'onnx':
+        return os.path.getsize(ONNX_MODEL_PATH)
+    return sum(weight_bytes(value) for value in backend.model.state_dict().values())
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def time_batches(texts, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        classifier.predict_batch(texts, top_k=1)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    timings.sort()
+    return percentile(timings, 0.50), percentile(timings, 0.95)
+
+
+def all_probs(texts):
+    # Full probability rows in input order, for the parity check
+    k = len(classifier.class_names)
+    rows = []
+    for result in classifier.predict_batch(texts, top_k=k):
+        by_label = {item["label"]: item["confidence"] for item in result}
+        rows.append([by_label[label] for label in classifier.class_names])
+    return torch.tensor(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare classifier inference backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--texts", help="File with one notice per line (defaults to built-in samples)")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per measurement")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="Required top-1 agreement with fp32")
+    args = parser.parse_args()
+
+    if args.texts:
+        with open(args.texts, encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE_TEXTS
+    batch = (texts * (args.batch_size // len(texts) + 1))[:args.batch_size]
+
+    reference_backend = classifier.backend
+    reference = all_probs(texts)
+    reference_top1 = reference.argmax(dim=1)
+
+    print(f"{len(texts)} texts, batch {args.batch_size}, {args.runs} runs, torch threads {torch.get_num_threads()}")
+    print(f"{'backend':<10} {'top-1 agree':>11} {'max |dp|':>9} {'p50 x1':>9} {'p95 x1':>9} "
+          f"{'p50 xN':>9} {'p95 xN':>9} {'RSS +MB':>8} {'size MB':>8}")
+
+    failed = []
+    for name in args.backends:
+        before = rss_bytes()
+        if name == 'torch':
+            backend = reference_backend
+        else:
+            backend = create_backend(name, classifier.model, classifier.device,
+                                     checkpoint_path=CHECKPOINT_PATH)
+        rss_growth = (rss_bytes() - before) / 2 ** 20
+        classifier.backend = backend
+
+        probs = all_probs(texts)
+        agreement = (probs.argmax(dim=1) == reference_top1).float().mean().item()
+        max_diff = (probs - reference).abs().max().item()
+
+        classifier.predict_batch(batch, top_k=1)  # Warm-up
+        single = time_batches(texts[:1], args.runs)
+        batched = time_batches(batch, args.runs)
+
+        print(f"{name:<10} {agreement:>11.2%} {max_diff:>9.4f} {single[0]:>7.1f}ms {single[1]:>7.1f}ms "
+              f"{batched[0]:>7.1f}ms {batched[1]:>7.1f}ms {rss_growth:>8.1f} {model_bytes(backend) / 2 ** 20:>8.1f}")
+        if agreement < args.min_agreement:
+            failed.append(name)
+
+    classifier.backend = reference_backend
+    if failed:
+        print(f"❌ Below {args.min_agreement:.0%} top-1 agreement with fp32: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
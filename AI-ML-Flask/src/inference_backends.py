@@ -0,0 +1,142 @@
+# CPU inference backends for NoticeClassifier, chosen with CLASSIFIER_BACKEND:
+#
+#   torch      - the fp32 model in eager PyTorch (default)
+#   quantized  - dynamic int8 quantization of every nn.Linear (weights stored as
+#                int8, activations quantized on the fly); no calibration needed
+#   onnx       - the model exported to ONNX and run by ONNX Runtime; needs the
+#                optional `onnxruntime` package (and `onnx` for the export)
+#
+# Every backend takes the tokenizer's tensor dict and returns the category
+# logits together with the pooled encoder output (for extra heads such as
+# priority) as torch tensors, so the classifier code around it does not
+# change. Use benchmark_backends.py to check accuracy parity and compare
+# latency/memory.
+import copy
+import inspect
+import os
+
+import torch
+
+ONNX_MODEL_PATH = os.environ.get('ONNX_MODEL_PATH', 'notice_classifier_model.onnx')
+ONNX_INPUTS = ('input_ids', 'attention_mask', 'token_type_ids')
+
+
+class TorchBackend:
+    name = 'torch'
+
+    def __init__(self, model, device):
+        self.model = model
+        self.device = device
+
+    def forward(self, inputs):
+        # Same as the model's forward pass (dropout is a no-op in eval mode),
+        # but keeps the pooled output the category classifier reads
+        with torch.no_grad():
+            pooled = self.model.bert(**inputs).pooler_output
+            return self.model.classifier(pooled), pooled
+
+    def logits(self, inputs):
+        return self.forward(inputs)[0]
+
+
+class QuantizedTorchBackend(TorchBackend):
+    name = 'quantized'
+
+    def __init__(self, model, device, inplace=False):
+        # Dynamic quantization kernels are CPU-only. In place, the fp32 Linear
+        # weights are swapped out rather than kept alongside the int8 copy.
+        fp32_model = (model if inplace else copy.deepcopy(model)).to('cpu').eval()
+        quantized = torch.quantization.quantize_dynamic(fp32_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        super().__init__(quantized, torch.device('cpu'))
+
+    def forward(self, inputs):
+        return super().forward({key: value.to('cpu') for key, value in inputs.items()})
+
+
+class OnnxBackend:
+    name = 'onnx'
+
+    def __init__(self, model, device, onnx_path=ONNX_MODEL_PATH, source_path=None, threads=None):
+        import onnxruntime as ort
+
+        # Re-export when the torch checkpoint is newer than the ONNX file
+        stale = source_path and os.path.exists(source_path) and os.path.exists(onnx_path) \
+            and os.path.getmtime(source_path) > os.path.getmtime(onnx_path)
+        if stale or not os.path.exists(onnx_path):
+            export_onnx(model, onnx_path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        if 'pooled' not in {o.name for o in self.session.get_outputs()}:
+            # Exported before the pooled output was added
+            export_onnx(model, onnx_path)
+            self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.device = torch.device('cpu')
+
+    def forward(self, inputs):
+        feed = {key: value.cpu().numpy() for key, value in inputs.items() if key in self.input_names}
+        logits, pooled = self.session.run(['logits', 'pooled'], feed)
+        return torch.from_numpy(logits), torch.from_numpy(pooled)
+
+    def logits(self, inputs):
+        return self.forward(inputs)[0]
+
+
+class _LogitsAndPooled(torch.nn.Module):
+    # Export wrapper with the same outputs as TorchBackend.forward
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        pooled = self.model.bert(input_ids=input_ids, attention_mask=attention_mask,
+                                 token_type_ids=token_type_ids).pooler_output
+        return self.model.classifier(pooled), pooled
+
+
+def export_onnx(model, onnx_path):
+    print(f"⏳ Exporting classifier to ONNX at {onnx_path}...")
+    model = copy.deepcopy(model).to('cpu').eval()
+    dummy = {name: torch.ones((1, 8), dtype=torch.long) for name in ONNX_INPUTS}
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in ONNX_INPUTS}
+    dynamic_axes['logits'] = {0: 'batch'}
+    dynamic_axes['pooled'] = {0: 'batch'}
+
+    kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        kwargs['dynamo'] = False  # The TorchScript exporter handles these dynamic axes without onnxscript
+
+    torch.onnx.export(
+        _LogitsAndPooled(model),
+        (dummy['input_ids'], dummy['attention_mask'], dummy['token_type_ids']),
+        onnx_path,
+        input_names=list(ONNX_INPUTS),
+        output_names=['logits', 'pooled'],
+        dynamic_axes=dynamic_axes,
+        opset_version=17,
+        **kwargs
+    )
+    print("✅ ONNX export complete")
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'quantized': QuantizedTorchBackend,
+    'onnx': OnnxBackend
+}
+
+
+def create_backend(name, model, device, checkpoint_path=None, inplace=False, threads=None):
+    # inplace lets the quantized backend convert `model` itself (serving);
+    # leave it off to keep the fp32 model intact (parity checks, benchmarks)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown CLASSIFIER_BACKEND '{name}'. Expected one of: {', '.join(BACKENDS)}")
+    if name == 'onnx':
+        return OnnxBackend(model, device, source_path=checkpoint_path, threads=threads)
+    if name == 'quantized':
+        return QuantizedTorchBackend(model, device, inplace=inplace)
+    return TorchBackend(model, device)
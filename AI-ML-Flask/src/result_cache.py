@@ -0,0 +1,83 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def cache_key(cleaned_text: str, variant: Any) -> str:
+    # variant tells apart results for the same text, e.g. top_k or "all:3"
+    return hashlib.sha256(f"{variant}\x00{cleaned_text}".encode('utf-8')).hexdigest()
+
+
+def _sizeof(value: Any) -> int:
+    # Rough in-memory size of the JSON-like results we store
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_sizeof(item) for item in value)
+    return size
+
+
+class ResultCache:
+    """Bounded LRU cache of classification results.
+
+    Entries are keyed by cache_key() (a hash of the cleaned text and the
+    request variant, such as top_k), so edits that only change whitespace or
+    stripped punctuation still hit. The least recently used entries are
+    evicted once the stored results exceed `max_bytes`; a limit of 0 disables
+    the cache.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, max_bytes)
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str, record_miss: bool = True) -> Optional[Any]:
+        # record_miss=False lets a fast-path probe leave the miss to be
+        # counted by the lookup that follows it
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1 if record_miss else 0
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any) -> None:
+        size = _sizeof(key) + _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "evictions": self._stats["evictions"],
+                "hitRate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,119 @@
+# Production entry point for the classifier service: pre-forked workers.
+#
+#   cd AI-ML-Flask/src
+#   python serve.py --workers 4 --threads-per-worker 2 --port 5002
+#
+# The parent loads the model once, then forks the workers. The weights are
+# memory-mapped from the checkpoint and never written after loading, so every
+# worker shares the same physical pages (copy-on-write) instead of holding its
+# own copy of BERT. All workers accept connections on one listening socket.
+# Each worker limits torch to --threads-per-worker intra-op threads so that
+# workers x threads does not oversubscribe the cores. Dead workers are
+# restarted; SIGTERM/SIGINT stops the workers and exits.
+#
+# The ONNX backend's thread pools do not survive fork, so with
+# CLASSIFIER_BACKEND=onnx each worker opens its own ONNX Runtime session.
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+
+# Load in this process, single-threaded, before forking: OpenMP thread pools
+# started in the parent would not exist in the children
+os.environ['CLASSIFIER_BACKGROUND_LOAD'] = 'false'
+
+import torch
+
+torch.set_num_threads(1)
+
+from werkzeug.serving import make_server
+
+import app as service
+from inference_backends import create_backend
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def init_worker(threads):
+    torch.set_num_threads(threads)
+    classifier = service.classifier
+    if classifier.backend.name == 'onnx':
+        classifier.backend = create_backend('onnx', classifier.model, classifier.device,
+                                            checkpoint_path=service.CHECKPOINT_PATH, threads=threads)
+
+
+def spawn(server, threads):
+    pid = os.fork()
+    if pid:
+        return pid
+    # Worker: default signal handling, serve until killed
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    try:
+        init_worker(threads)
+        print(f"👷 Worker {os.getpid()} serving with {threads} torch thread(s)")
+        server.serve_forever()
+    finally:
+        os._exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the notice classifier with pre-forked workers")
+    parser.add_argument("--host", default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.environ.get('PORT', 5002)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get('WORKERS', default_workers())))
+    parser.add_argument("--threads-per-worker", type=int, default=int(os.environ.get('THREADS_PER_WORKER', 0)),
+                        help="torch intra-op threads per worker (default: cores / workers)")
+    args = parser.parse_args()
+
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    service.load_classifier()
+    if service.classifier is None:
+        sys.exit(f"❌ Classifier failed to load: {service.classifier_status['error']}")
+
+    server = make_server(args.host, args.port, service.app, threaded=True)
+    # Objects created so far live for the whole process; moving them out of
+    # the collector's reach keeps GC passes from writing to (and so copying)
+    # the pages the workers share
+    gc.freeze()
+
+    workers = {spawn(server, threads) for _ in range(args.workers)}
+    print(f"🚀 Serving on http://{args.host}:{args.port} with {args.workers} workers x {threads} threads")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"⚠️ Worker {pid} exited ({status}), restarting")
+            time.sleep(1)  # Don't spin if workers crash on start
+            workers.add(spawn(server, threads))
+
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
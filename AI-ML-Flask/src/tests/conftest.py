@@ -0,0 +1,53 @@
+# The service is tested with a small randomly initialised BERT built in
+# memory, so no trained checkpoint is needed:
+#
+#   cd AI-ML-Flask/src
+#   python -m pytest -q
+import os
+import sys
+
+import pytest
+import torch
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizer
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC)
+os.environ['CLASSIFIER_BACKGROUND_LOAD'] = 'false'
+
+import app as service  # noqa: E402
+from inference_backends import create_backend  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+
+CATEGORIES = ['Academic', 'Events', 'Examination', 'Placement']
+PRIORITIES = ['Normal', 'Urgent', 'Highly Urgent']
+
+
+def tiny_classifier(priority_head=True):
+    torch.manual_seed(0)
+    classifier = service.NoticeClassifier.__new__(service.NoticeClassifier)
+    classifier.device = torch.device('cpu')
+    classifier.tokenizer = BertTokenizer.from_pretrained(os.path.join(SRC, 'model_tokenizer'))
+    classifier.class_names = list(CATEGORIES)
+    config = BertConfig(hidden_size=32, num_hidden_layers=2, num_attention_heads=2, intermediate_size=64,
+                        num_labels=len(CATEGORIES))
+    classifier.model = BertForSequenceClassification(config).eval()
+    classifier.backend = create_backend('torch', classifier.model, classifier.device)
+    if priority_head:
+        classifier.priority_head = torch.nn.Linear(config.hidden_size, len(PRIORITIES)).eval()
+        classifier.priority_labels = list(PRIORITIES)
+    else:
+        classifier.priority_head, classifier.priority_labels = None, []
+    classifier.version = 'test'
+    classifier.cache = ResultCache(1 << 20)
+    return classifier
+
+
+@pytest.fixture
+def classifier():
+    return tiny_classifier()
+
+
+@pytest.fixture
+def client(classifier, monkeypatch):
+    monkeypatch.setattr(service, 'classifier', classifier)
+    return service.app.test_client()
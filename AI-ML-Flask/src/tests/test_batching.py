@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+from batching import MicroBatcher
+
+
+def test_concurrent_submits_share_one_batch():
+    running, release, batches = threading.Event(), threading.Event(), []
+
+    def run(items):
+        running.set()
+        release.wait(5)
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(run, max_batch_size=4, max_wait_ms=1)
+    first = batcher.submit(0)
+    assert running.wait(5)  # The worker is busy while the rest queue up
+    batcher.max_wait = 0.5
+    futures = [batcher.submit(i) for i in range(1, 6)]
+    release.set()
+
+    assert first.result(5) == 0
+    assert [future.result(5) for future in futures] == [2, 4, 6, 8, 10]
+    # The five queued items split by max_batch_size, keeping their order
+    assert batches[1:] == [[1, 2, 3, 4], [5]]
+    assert batcher.metrics()["batches"] == 3
+
+
+def test_a_failing_batch_fails_each_of_its_futures():
+    def run(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(run, max_batch_size=8, max_wait_ms=1)
+    future = batcher.submit("text")
+    with pytest.raises(ValueError):
+        future.result(5)
+    assert batcher.submit("again").exception(5) is not None
+    assert batcher.metrics()["errors"] == 2
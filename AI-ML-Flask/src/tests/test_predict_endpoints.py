@@ -0,0 +1,57 @@
+import pytest
+import torch
+
+from conftest import CATEGORIES
+
+TEXT = "Mid-semester examinations begin on Monday in the main hall."
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/predict", {"text": TEXT}),
+    ("/predict/all", {"text": TEXT}),
+    ("/predict/batch", {"texts": [TEXT]}),
+])
+@pytest.mark.parametrize("top_k", ["abc", 0, len(CATEGORIES) + 1, True, 2.5, [1], None])
+def test_invalid_top_k_is_rejected(client, path, body, top_k):
+    response = client.post(path, json={**body, "top_k": top_k})
+    assert response.status_code == 400
+    assert "top_k" in response.get_json()["error"]
+
+
+def test_top_k_accepts_integers_and_integer_strings(client):
+    assert len(client.post("/predict", json={"text": TEXT, "top_k": "2"}).get_json()["predictions"]) == 2
+    assert len(client.post("/predict", json={"text": TEXT}).get_json()["predictions"]) == 3
+    result = client.post("/predict/all", json={"text": TEXT, "top_k": 1}).get_json()
+    assert len(result["category"]) == 1 and "embedding" not in result
+    batch = client.post("/predict/batch", json={"texts": [TEXT, "Sports day"], "top_k": 4}).get_json()
+    assert [len(p) for p in batch["predictions"]] == [4, 4]
+
+
+@pytest.mark.parametrize("path", ["/predict", "/predict/all", "/predict/batch", "/embed"])
+def test_non_object_bodies_are_rejected(client, path):
+    assert client.post(path, json=["text"]).status_code == 400
+    assert client.post(path, data="text", content_type="text/plain").status_code == 400
+
+
+def test_bucketed_batches_match_single_texts(classifier):
+    # Padding to the longest text of a bucket must not change any result
+    texts = ["Exam", "Library closed tomorrow", TEXT, "Placement drive " * 30, "Holiday"]
+    batched = classifier._run_model(texts, 3, bucket_size=2)
+    for text, result in zip(texts, batched):
+        alone = classifier._run_model([text], 3, bucket_size=1)[0]
+        assert [p["label"] for p in result] == [p["label"] for p in alone]
+        assert [p["confidence"] for p in result] == pytest.approx([p["confidence"] for p in alone], abs=1e-4)
+
+
+def test_batch_results_keep_input_order(classifier):
+    texts = ["Placement drive " * 30, "Exam", TEXT]
+    with torch.no_grad():
+        batched = classifier.predict_batch(texts, top_k=2, bucket_size=2)
+    assert batched == [classifier._run_model([text], 2, 1)[0] for text in texts]
+
+
+def test_embeddings_are_unit_length(client):
+    result = client.post("/embed", json={"texts": [TEXT, "Holiday"]}).get_json()
+    assert len(result["embeddings"]) == 2 and result["dim"] == 32
+    assert sum(v * v for v in result["embeddings"][0]) == pytest.approx(1.0, abs=1e-3)
+    assert client.post("/embed", data="{not json", content_type="application/json").status_code == 400
@@ -0,0 +1,44 @@
+from result_cache import ResultCache, _sizeof, cache_key
+
+TEXT = "Fee payment deadline extended to Friday"
+
+
+def test_keys_differ_by_variant_but_not_by_cleaned_away_characters(classifier):
+    assert cache_key(TEXT, 3) != cache_key(TEXT, 1)
+    assert cache_key(TEXT, 3) != cache_key(TEXT, "all:3")
+    clean = classifier.clean_text
+    assert cache_key(clean(TEXT), 3) == cache_key(clean(f"  Fee payment\n deadline extended to Friday @ "), 3)
+
+
+def test_least_recently_used_entries_are_evicted():
+    value = {"label": "Academic", "confidence": 0.9}
+    cache = ResultCache(3 * (_sizeof("a") + _sizeof(value)))
+    for name in ("a", "b", "c"):
+        cache.put(name, value)
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("d", value)
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResultCache(0)
+    cache.put("a", [1])
+    assert cache.get("a") is None
+
+
+def test_repeated_texts_run_the_model_once(classifier):
+    runs = []
+
+    def run(texts):
+        runs.append(list(texts))
+        return [f"result {text}" for text in texts]
+
+    first = classifier._cached_run([TEXT, f" {TEXT} ", "Holiday"], 3, run)
+    assert runs == [[TEXT, "Holiday"]]
+    assert first == [f"result {TEXT}", f"result {TEXT}", "result Holiday"]
+
+    # Cached texts skip the model; another variant does not share entries
+    assert classifier._cached_run([TEXT], 3, run) == [f"result {TEXT}"]
+    classifier._cached_run([TEXT], 1, run)
+    assert runs == [[TEXT, "Holiday"], [TEXT]]
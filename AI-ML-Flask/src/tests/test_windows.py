@@ -0,0 +1,41 @@
+import torch
+
+import app as service
+
+
+def test_short_texts_use_a_single_window(classifier):
+    ids = list(range(100))
+    assert classifier.windows(ids) == [ids]
+
+
+def test_long_texts_are_covered_by_overlapping_windows(classifier, monkeypatch):
+    monkeypatch.setattr(service, 'WINDOW_OVERLAP', 10)
+    monkeypatch.setattr(service, 'MAX_WINDOWS', 8)
+    ids = list(range(1200))
+    windows = classifier.windows(ids)
+    assert [w[0] for w in windows] == [0, 500, 690]
+    assert all(len(w) == service.WINDOW_TOKENS for w in windows)
+    assert windows[-1][-1] == ids[-1]
+
+
+def test_window_count_is_capped_keeping_both_ends(classifier, monkeypatch):
+    monkeypatch.setattr(service, 'WINDOW_OVERLAP', 0)
+    monkeypatch.setattr(service, 'MAX_WINDOWS', 3)
+    ids = list(range(510 * 10))
+    starts = [w[0] for w in classifier.windows(ids)]
+    assert len(starts) == 3
+    assert starts[0] == 0 and starts[-1] == len(ids) - service.WINDOW_TOKENS
+
+
+def test_window_scores_are_pooled_per_text(classifier, monkeypatch):
+    scores = [torch.tensor([[1.0, 4.0], [3.0, 0.0]]), torch.tensor([[2.0, 2.0]])]
+    assert classifier._pool(scores).tolist() == [[2.0, 2.0], [2.0, 2.0]]
+    monkeypatch.setattr(service, 'WINDOW_POOLING', 'max')
+    assert classifier._pool(scores).tolist() == [[3.0, 4.0], [2.0, 2.0]]
+
+
+def test_long_notices_are_classified_from_all_their_windows(classifier):
+    text = "Placement drive for final year students. " * 150
+    window_logits, _ = classifier._encode([text, "Holiday"], bucket_size=4)
+    assert window_logits[0].shape[0] > 1 and window_logits[1].shape[0] == 1
+    assert len(classifier.predict(text, top_k=2)) == 2
@@ -0,0 +1,101 @@
+# Trains the priority head that /predict/all runs on the category model's
+# pooled encoder output.
+#
+#   cd AI-ML-Flask/src
+#   python train_priority_head.py --data priority_notices.csv --epochs 200
+#
+# The CSV needs a `priority` column (Normal, Urgent or Highly Urgent) and
+# either a `text` column or `subject` and `body` columns. The BERT encoder
+# stays frozen: features are computed once, then a single linear layer is
+# fitted on them and checked on a held-out split. The head is saved with its
+# label order to PRIORITY_HEAD_PATH (priority_head.pt), where app.py loads it.
+import argparse
+import csv
+import os
+import random
+import sys
+
+os.environ['CLASSIFIER_BACKEND'] = 'torch'  # Train on the fp32 encoder output
+os.environ['RESULT_CACHE_BYTES'] = '0'
+
+import torch
+
+from app import PRIORITY_HEAD_PATH, classifier_status, wait_until_loaded
+
+# Same order as the backend's PRIORITY_LABELS
+DEFAULT_LABELS = ["Normal", "Urgent", "Highly Urgent"]
+
+
+def read_rows(path, labels):
+    texts, targets = [], []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            text = row.get('text') or f"{row.get('subject', '')} {row.get('body', '')}".strip()
+            priority = (row.get('priority') or '').strip()
+            if not text or priority not in labels:
+                continue
+            texts.append(text)
+            targets.append(labels.index(priority))
+    return texts, targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the priority head on the shared encoder")
+    parser.add_argument("--data", required=True, help="CSV with text (or subject, body) and priority columns")
+    parser.add_argument("--labels", nargs="+", default=DEFAULT_LABELS)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--val-split", type=float, default=0.1)
+    parser.add_argument("--out", default=PRIORITY_HEAD_PATH)
+    args = parser.parse_args()
+
+    texts, targets = read_rows(args.data, args.labels)
+    if len(texts) < 2:
+        sys.exit("❌ Need at least two labelled notices")
+
+    classifier = wait_until_loaded()
+    if classifier is None:
+        sys.exit(f"❌ Classifier failed to load: {classifier_status['error']}")
+
+    print(f"⏳ Encoding {len(texts)} notices...")
+    features = torch.cat([classifier.features(texts[i:i + args.batch_size])
+                          for i in range(0, len(texts), args.batch_size)])
+    targets = torch.tensor(targets)
+
+    order = list(range(len(texts)))
+    random.Random(0).shuffle(order)
+    val_count = int(len(order) * args.val_split)
+    val_idx = torch.tensor(order[:val_count], dtype=torch.long)
+    train_idx = torch.tensor(order[val_count:], dtype=torch.long)
+
+    # Urgent notices are rare; weight classes so the head doesn't just learn "Normal"
+    counts = torch.bincount(targets[train_idx], minlength=len(args.labels)).float()
+    weights = counts.sum() / (len(args.labels) * counts.clamp(min=1))
+
+    head = torch.nn.Linear(features.shape[1], len(args.labels))
+    optimizer = torch.optim.AdamW(head.parameters(), lr=args.lr, weight_decay=1e-4)
+    loss_fn = torch.nn.CrossEntropyLoss(weight=weights)
+
+    for epoch in range(1, args.epochs + 1):
+        head.train()
+        shuffled = train_idx[torch.randperm(len(train_idx))]
+        for start in range(0, len(shuffled), args.batch_size):
+            batch = shuffled[start:start + args.batch_size]
+            optimizer.zero_grad()
+            loss = loss_fn(head(features[batch]), targets[batch])
+            loss.backward()
+            optimizer.step()
+        if epoch % 20 == 0 or epoch == args.epochs:
+            head.eval()
+            with torch.no_grad():
+                train_acc = (head(features[train_idx]).argmax(dim=1) == targets[train_idx]).float().mean().item()
+                val_acc = (head(features[val_idx]).argmax(dim=1) == targets[val_idx]).float().mean().item() if val_count else float('nan')
+            print(f"epoch {epoch:>4} | loss {loss.item():.4f} | train acc {train_acc:.2%} | val acc {val_acc:.2%}")
+
+    torch.save({"state_dict": head.state_dict(), "labels": args.labels}, args.out)
+    print(f"✅ Saved priority head to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
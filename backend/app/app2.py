@@ -1,6 +1,6 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from mongoengine import connect, Document, EmbeddedDocument, EmbeddedDocumentField, StringField, DictField, ListField, DateTimeField, EmailField, IntField, BooleanField
+from mongoengine import connect, Document, EmbeddedDocument, EmbeddedDocumentField, StringField, DictField, ListField, DateTimeField, EmailField, IntField, BooleanField, FloatField
 from pymongo.errors import ConnectionFailure
 import os
 from dotenv import load_dotenv
@@ -16,11 +16,34 @@ from werkzeug.utils import secure_filename,send_file
 import pandas as pd
 import random
 import string
+import threading
+import itertools
+import hashlib
+import html
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from datetime import timedelta
 from utils.whatsapp_sender_function import send_bulk_whatsapp
 # Add this import near the top with your other imports
 from utils.email_send_function import send_bulk_email
+from utils.notice_scheduler import NoticeScheduler
+from utils.delivery_ledger import claim_deliveries, mark_delivered, release_deliveries, stale_claims
+from utils.delivery_queue import DeliveryQueue
+from utils.notice_digest import DigestSender, add_to_digest, complete_digest, digest_recipients, release_digest, set_digest_preference
+from utils.model_registry import ModelRegistry
+from utils.inference_client import InferenceClient
+from utils.vector_index import VectorIndex
+from utils.near_duplicate import NearDuplicateIndex
+from utils.etag_cache import EtagCache
+from utils.id_cache import IdCache
+from utils.notice_text import EXCERPT_CHARS, HTML_TAG, excerpt, plain_text, word_count
+from utils.json_stream import array_chunks, object_chunks, primed
+from utils.compression import PrecompressedCache, choose_encoding, compress, compress_stream, is_compressible, peek
+from utils.serializers import (
+    CREATOR_NOTICE_FIELDS, NOTICE_LIST_FIELDS, STUDENT_LIST_FIELDS, USER_LIST_FIELDS,
+    classification_json, creator_notice_json, isoformat, notice_list_json, student_list_json, user_json
+)
 load_dotenv()
 
 app = Flask(__name__)
@@ -35,6 +58,41 @@ CORS(app, resources={
     }
 })
 
+# --- Response compression ---
+# JSON/HTML responses are gzip or brotli encoded as the client's
+# Accept-Encoding allows, once they reach COMPRESSION_MIN_BYTES. Streamed
+# lists are compressed chunk by chunk as they are produced.
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+
+@app.after_request
+def compress_response(response):
+    if (response.status_code < 200 or response.status_code in (204, 304) or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or not is_compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        head, rest, ended = peek(response.response, COMPRESSION_MIN_BYTES)
+        if ended and sum(len(chunk) for chunk in head) < COMPRESSION_MIN_BYTES:
+            response.set_data(b''.join(head))
+            return response
+        response.response = compress_stream(itertools.chain(head, rest), encoding)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_BYTES:
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    # The bytes differ per encoding, so a strong validator would be wrong
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
 # CORS(app)
 # app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9eyJzdWIiOiIxMjM0NTY3ODkwIiwibmFtZSI6k')
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a-super-secret-key-that-nobody-can-guess')
@@ -63,7 +121,9 @@ class User(Document):
 class Notice(Document):
     title = StringField(required=True)
     subject = StringField()
-    content = StringField(required=True)
+    content = StringField()  # Legacy inline body; new bodies live in NoticeBody
+    excerpt = StringField()  # Plain-text start of the body, for lists
+    word_count = IntField()
     notice_type = StringField()
     departments = ListField(StringField(), default=[])
 
@@ -76,6 +136,7 @@ class Notice(Document):
     # year = StringField()
     # section = StringField()
     recipient_emails = ListField(StringField(), default=[])
+    recipient_numbers = ListField(StringField(), default=[])
     priority = StringField(choices=["Normal", "Urgent", "Highly Urgent"], default="Normal")
     status = StringField(default="draft", choices=["draft", "published", "scheduled"])
     send_options = DictField(default={"email": False, "web": True})
@@ -88,9 +149,26 @@ class Notice(Document):
     created_at = DateTimeField(default=datetime.datetime.now)
     updated_at = DateTimeField(default=datetime.datetime.now)
     created_by = StringField(required=True)
+    # Copied from the creator at creation and on rename (update_user), so
+    # notice lists never load the users collection
+    creator_name = StringField()
+    creator_email = StringField()
     attachments = ListField(StringField(), default=[])
     reads = ListField(DictField(), default=[])
     read_count = IntField(default=0)
+    version = IntField(default=1)  # Bumped on content edits; part of the delivery idempotency key
+
+    # Filled in by the background classifier (queue_classification); lists,
+    # filters and analytics read these instead of calling the model
+    predicted_category = StringField()
+    predicted_priority = StringField()
+    category_confidence = FloatField()
+    priority_confidence = FloatField()
+    model_version = StringField()
+    classified_at = DateTimeField()
+    content_hash = StringField()     # Hash of the current title/subject/content
+    classified_hash = StringField()  # Hash the stored predictions were made from
+    duplicate_of = StringField()     # Near-duplicate of this notice; its recipients are not sent this one
     
     meta = {
         'collection': 'notices',
@@ -101,10 +179,23 @@ class Notice(Document):
             'departments',
             'year',
             'reads.user_id',
-            'priority'
+            'priority',
+            'predicted_category',
+            'predicted_priority',
+            'created_by',
+            {'fields': ['status', 'publish_at']}
         ]
     }
 
+class NoticeBody(Document):
+    # A notice's HTML, kept out of `notices` so list queries read small documents
+    notice_id = StringField(required=True, unique=True)
+    content = StringField(default='')
+    version = IntField(default=1)  # Notice version the body was written for
+    updated_at = DateTimeField(default=datetime.datetime.now)
+
+    meta = {'collection': 'notice_bodies'}
+
 
 class Student(Document):
     # Identification
@@ -245,6 +336,231 @@ def token_required(f):
         return f(current_user, *args, **kwargs)
         
     return decorated
+
+# --- Notice Delivery & Scheduling ---
+DELIVERY_MODES = ('silent', 'new_recipients', 'all')
+DELIVERY_CHUNK_SIZE = int(os.environ.get('DELIVERY_CHUNK_SIZE', 100))  # Recipients per queued send
+# Claims older than this are re-sent once their process stops heartbeating,
+# however long their sends wait in a backed-up lane
+DELIVERY_CLAIM_TIMEOUT = int(os.environ.get('DELIVERY_CLAIM_TIMEOUT_SECONDS', 3600))
+
+DIGEST_WINDOW_MINUTES = int(os.environ.get('DIGEST_WINDOW_MINUTES', 24 * 60))
+
+delivery_queue = DeliveryQueue(
+    workers=int(os.environ.get('DELIVERY_WORKERS', 4)),
+    reserved_workers=int(os.environ.get('DELIVERY_RESERVED_URGENT_WORKERS', 1))
+)
+
+def apply_schedule(notice):
+    # Compute publish_at from the date/time fields and pick the matching status
+    if notice.schedule_date and notice.date:
+        if notice.schedule_time and notice.time:
+            datetime_str = f"{notice.date} {notice.time}"
+            notice.publish_at = datetime.datetime.strptime(datetime_str, '%Y-%m-%d %H:%M')
+        else:
+            notice.publish_at = datetime.datetime.strptime(notice.date, '%Y-%m-%d')
+
+        if notice.publish_at > datetime.datetime.now():
+            notice.status = 'scheduled'
+        else:
+            notice.status = 'published'
+
+def attachment_paths_for(notice):
+    paths = [os.path.join(app.config['UPLOAD_FOLDER'], f) for f in notice.attachments]
+    return [p for p in paths if os.path.exists(p)]
+
+def send_email_chunk(notice, recipients, attachment_paths):
+    sent = False
+    try:
+        sent = send_bulk_email(
+            recipient_emails=recipients,
+            subject=notice.subject or notice.title,
+            body=notice_content(notice),
+            attachments=attachment_paths
+        )
+    finally:
+        if sent:
+            mark_delivered(str(notice.id), notice.version, 'email', recipients)
+        else:
+            # Release the claims so a later save or retry can deliver them
+            release_deliveries(str(notice.id), notice.version, 'email', recipients)
+    return sent
+
+def send_whatsapp_chunk(notice, numbers):
+    # Per-number results are not reported back, so claims are marked sent even
+    # on a partial failure rather than risk messaging the successful numbers twice
+    whatsapp_body = f"New Notice Published:\n\n*{notice.title}*\n\n{notice.subject or 'Please check the portal for details.'}"
+    try:
+        return send_bulk_whatsapp(
+            recipient_numbers=numbers,
+            message_body=whatsapp_body
+        )
+    finally:
+        mark_delivered(str(notice.id), notice.version, 'whatsapp', numbers)
+
+def deliver_notice(notice, attachment_paths=None, email_recipients=None, whatsapp=True):
+    # Claims recipients that have not yet received this version, then queues the
+    # sends in chunks on the notice's priority lane. Passing email_recipients
+    # overrides the send_options email checkbox. Returns the number of emails queued.
+    # The queue owns attachment_paths from here on and removes them when done.
+    send_options = notice.send_options or {}
+    if email_recipients is None:
+        email_recipients = notice.recipient_emails if send_options.get('email') else []
+    numbers = notice.recipient_numbers
+    if notice.duplicate_of:
+        email_recipients, numbers = exclude_original_recipients(notice, email_recipients, numbers)
+    jobs = []
+
+    digested = []
+    if notice.priority == 'Normal' and not attachment_paths and email_recipients:
+        # Recipients who opted into digests get Normal notices in one email per
+        # window instead of now. Urgent notices never wait.
+        opted_in = digest_recipients(email_recipients)
+        digested = claim_deliveries(str(notice.id), notice.version, 'digest',
+                                    [e for e in email_recipients if e.strip().lower() in opted_in], DELIVERY_CLAIM_TIMEOUT)
+        jobs += delivery_jobs(notice, 'digest', digested)
+        email_recipients = [e for e in email_recipients if e.strip().lower() not in opted_in]
+
+    emails = claim_deliveries(str(notice.id), notice.version, 'email', email_recipients, DELIVERY_CLAIM_TIMEOUT)
+    jobs += delivery_jobs(notice, 'email', emails, attachment_paths)
+
+    if whatsapp and send_options.get('whatsapp') and numbers:
+        numbers = claim_deliveries(str(notice.id), notice.version, 'whatsapp', numbers, DELIVERY_CLAIM_TIMEOUT)
+        jobs += delivery_jobs(notice, 'whatsapp', numbers)
+
+    submit_deliveries(notice, jobs, attachment_paths)
+    return len(emails) + len(digested)
+
+def delivery_jobs(notice, channel, recipients, attachment_paths=None):
+    # Send jobs for recipients already claimed on `channel`
+    if channel == 'digest':
+        # Digest entries are stored in the database, so the claim is settled
+        # as soon as they are written
+        add_to_digest(str(notice.id), recipients, DIGEST_WINDOW_MINUTES)
+        mark_delivered(str(notice.id), notice.version, 'digest', recipients)
+        return []
+    chunks = [recipients[i:i + DELIVERY_CHUNK_SIZE] for i in range(0, len(recipients), DELIVERY_CHUNK_SIZE)]
+    if channel == 'email':
+        return [(send_email_chunk, (notice, chunk, attachment_paths)) for chunk in chunks]
+    return [(send_whatsapp_chunk, (notice, chunk)) for chunk in chunks]
+
+def submit_deliveries(notice, jobs, attachment_paths=None):
+    remaining = [len(jobs)]
+    lock = threading.Lock()
+
+    def cleanup():
+        for path in attachment_paths or []:
+            if os.path.exists(path): os.remove(path)
+
+    def run(fn, args):
+        try:
+            return fn(*args)
+        finally:
+            with lock:
+                remaining[0] -= 1
+                done = remaining[0] == 0
+            if done:
+                cleanup()
+
+    if not jobs:
+        cleanup()
+    for fn, args in jobs:
+        delivery_queue.submit(notice.priority, run, fn, args)
+
+def redeliver_stale_claims():
+    # Sends wait in the in-memory delivery queue after their recipients are
+    # claimed. If the process stops first, the claims are never settled; once
+    # they expire and the process's heartbeat is gone they are claimed again
+    # here and the sends re-queued.
+    for notice_id, version, channel, recipients in stale_claims(DELIVERY_CLAIM_TIMEOUT):
+        notice = Notice.objects(id=ObjectId(notice_id)).first() if ObjectId.is_valid(notice_id) else None
+        if not notice or notice.version != version:
+            # Deleted or edited since; the edit's delivery_mode decided who hears about it
+            release_deliveries(notice_id, version, channel, recipients)
+            continue
+        recipients = claim_deliveries(notice_id, version, channel, recipients, DELIVERY_CLAIM_TIMEOUT)
+        if not recipients:
+            continue  # Another process took them over
+        attachment_paths = attachment_paths_for(notice) if channel == 'email' else None
+        submit_deliveries(notice, delivery_jobs(notice, channel, recipients, attachment_paths), attachment_paths)
+        print(f"🔁 Re-queued {len(recipients)} lost {channel} deliveries for notice {notice_id}")
+
+def load_digest_notices(notice_ids):
+    notices = attach_bodies(Notice.objects(id__in=[ObjectId(i) for i in notice_ids]).only('id', 'title', 'subject', 'content'))
+    return {str(n.id): {"title": n.title, "subject": n.subject, "content": notice_content(n)} for n in notices}
+
+def send_digest_chunk(batch_id, recipients, subject, body):
+    sent = False
+    try:
+        sent = send_bulk_email(recipient_emails=recipients, subject=subject, body=body)
+    finally:
+        if sent:
+            complete_digest(batch_id, recipients)
+        else:
+            release_digest(batch_id, recipients)
+    return sent
+
+def send_digest(batch_id, recipients, subject, body):
+    for i in range(0, len(recipients), DELIVERY_CHUNK_SIZE):
+        delivery_queue.submit('Normal', send_digest_chunk, batch_id, recipients[i:i + DELIVERY_CHUNK_SIZE], subject, body)
+
+def load_scheduled_notices():
+    # Served by the (status, publish_at) index
+    for notice in Notice.objects(status='scheduled', publish_at__ne=None).only('id', 'publish_at').order_by('publish_at'):
+        yield str(notice.id), notice.publish_at
+
+def publish_scheduled_notice(notice_id):
+    # Recipients are claimed in the database before the status flips, and a
+    # claim is never sent twice, so a restarted or duplicate scheduler can
+    # safely repeat this. If the process stops in between, the notice is
+    # still 'scheduled' and the next attempt publishes it; sends lost from
+    # the in-memory queue are retried by redeliver_stale_claims().
+    now = datetime.datetime.now()
+    notice = Notice.objects(id=ObjectId(notice_id), status='scheduled', publish_at__lte=now).first()
+    if not notice:
+        return False
+
+    deliver_notice(notice, attachment_paths=attachment_paths_for(notice))
+    # Only one process moves the notice out of 'scheduled'
+    return bool(Notice.objects(id=notice.id, status='scheduled').update_one(
+        set__status='published',
+        set__updated_at=now
+    ))
+
+notice_scheduler = NoticeScheduler(
+    load_pending=load_scheduled_notices,
+    publish=publish_scheduled_notice,
+    maintenance=redeliver_stale_claims,
+    resync_seconds=int(os.environ.get('SCHEDULER_RESYNC_SECONDS', 15)),
+    maintenance_seconds=int(os.environ.get('SCHEDULER_MAINTENANCE_SECONDS', 300))
+)
+
+digest_sender = DigestSender(
+    load_notices=load_digest_notices,
+    send=send_digest,
+    window_minutes=DIGEST_WINDOW_MINUTES,
+    claim_timeout_seconds=DELIVERY_CLAIM_TIMEOUT
+)
+
+# In-process scheduling starts with the first request a process serves, so it
+# runs under the debug reloader's serving child and in every gunicorn (or other
+# WSGI server) worker alike, but not in scripts that only import this module.
+# Several schedulers are safe: publish_scheduled_notice claims each notice once.
+# Set NOTICE_SCHEDULER_IN_PROCESS=false and run scheduler.py instead to publish
+# on time while no requests come in.
+NOTICE_SCHEDULER_IN_PROCESS = os.environ.get("NOTICE_SCHEDULER_IN_PROCESS", "true").lower() == "true"
+background_workers_started = threading.Event()
+background_workers_lock = threading.Lock()
+
+@app.before_request
+def start_background_workers():
+    if background_workers_started.is_set() or not NOTICE_SCHEDULER_IN_PROCESS or app.testing:
+        return
+    with background_workers_lock:
+        notice_scheduler.start()
+        digest_sender.start()
+        background_workers_started.set()
+
 # Routes
 @app.route("/")
 def hello():
@@ -345,42 +661,98 @@ def login():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+# --- Notice bodies ---
+# The HTML of a notice lives in notice_bodies; the notice keeps a plain-text
+# excerpt and word count for lists. Notices saved before the split still
+# hold `content` inline until migrate_notice_bodies.py moves it.
+def set_notice_content(notice, content):
+    # Call before saving; write_notice_body() then stores the HTML
+    text = plain_text(content)
+    notice.excerpt = excerpt(text, EXCERPT_CHARS)
+    notice.word_count = word_count(text)
+    notice.content = None
+    notice.body_html = content or ''
+
+def write_notice_body(notice):
+    NoticeBody.objects(notice_id=str(notice.id)).update_one(
+        set__content=notice.body_html,
+        set__version=notice.version,
+        set__updated_at=datetime.datetime.now(),
+        upsert=True
+    )
+
+def notice_bodies(notice_ids):
+    bodies = NoticeBody.objects(notice_id__in=list(notice_ids)).only('notice_id', 'content').as_pymongo()
+    return {body['notice_id']: body.get('content') or '' for body in bodies}
+
+def attach_bodies(notices):
+    # Loads the bodies of a batch of Documents with one query
+    notices = list(notices)
+    missing = [str(n.id) for n in notices if n.content is None and getattr(n, 'body_html', None) is None]
+    if missing:
+        bodies = notice_bodies(missing)
+        for notice in notices:
+            if str(notice.id) in bodies:
+                notice.body_html = bodies[str(notice.id)]
+    return notices
+
+def notice_content(notice):
+    # HTML of a Document, loaded at most once per instance
+    if notice.content is not None:
+        return notice.content
+    if getattr(notice, 'body_html', None) is None:
+        notice.body_html = notice_bodies([str(notice.id)]).get(str(notice.id), '')
+    return notice.body_html
+
+# --- Notice creators ---
+# Notices saved before creator_name/creator_email existed are resolved
+# through an id-keyed cache of users; unknown ids in a batch cost one query.
+creator_cache = IdCache(max_items=int(os.environ.get('CREATOR_CACHE_SIZE', 10000)))
+
+def load_creators(user_ids):
+    ids = [ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)]
+    return {str(user.id): {"name": user.name, "email": user.email} for user in User.objects(id__in=ids).only('id', 'name', 'email')}
+
+def legacy_creators(docs):
+    # Takes raw notice documents (as_pymongo), see utils/serializers.py
+    user_ids = [doc['created_by'] for doc in docs if doc.get('creator_name') is None]
+    return creator_cache.get_many(user_ids, load_creators) if user_ids else {}
+
+# --- Streaming responses ---
+# Large lists are sent as a chunked JSON array straight from the cursor
+# (utils/json_stream.py, orjson when installed) instead of building the
+# whole list and then the whole string before the first byte goes out.
+STREAM_BATCH_SIZE = 500
+
+def stream_json(chunks):
+    return app.response_class(primed(chunks), mimetype='application/json')
+
+def serialize_notices(docs, serialize):
+    # Creators of legacy notices are looked up one batch of rows at a time
+    docs = iter(docs)
+    while True:
+        batch = list(itertools.islice(docs, STREAM_BATCH_SIZE))
+        if not batch:
+            return
+        legacy = legacy_creators(batch)
+        for doc in batch:
+            yield serialize(doc, legacy)
+
 # Get All Notices - Updated
 @app.route("/api/notices", methods=["GET"])
 @token_required
 @role_required(['admin','user'])
 def get_notices(current_user):
     try:
-        notices = Notice.objects().order_by('-created_at')
-        user_map = {str(user.id): user for user in User.objects.only('id', 'name', 'email')}
-        
-        notices_data = []
-        for notice in notices:
-            creator = user_map.get(notice.created_by)
-            notices_data.append({
-                "id": str(notice.id),
-                "title": notice.title,
-                "subject": notice.subject,
-                "content": notice.content,  # HTML from RTE
-                "noticeType": notice.notice_type,
-                "departments": notice.departments,
-                "programCourse": notice.program_course,
-                "specialization": notice.specialization,
-                "year": notice.year,
-                "section": notice.section,
-                "priority": notice.priority,
-                "status": notice.status,
-                "publishAt": notice.publish_at.isoformat() if notice.publish_at else None,
-                "createdAt": notice.created_at.isoformat(),
-                "readCount": notice.read_count,
-                "createdBy": {
-                    "id": notice.created_by,
-                    "name": creator.name if creator else "Unknown",
-                    "email": creator.email if creator else ""
-                }
-            })
-            
-        return jsonify(notices_data), 200
+        # Optional filters on the stored model labels
+        filters = {}
+        if request.args.get('predicted_category'):
+            filters['predicted_category'] = request.args['predicted_category']
+        if request.args.get('predicted_priority'):
+            filters['predicted_priority'] = request.args['predicted_priority']
+        # Raw documents straight to JSON; no Document hydration per row
+        notices = Notice.objects(**filters).only(*NOTICE_LIST_FIELDS).order_by('-created_at').as_pymongo()
+        return stream_json(array_chunks(serialize_notices(notices, notice_list_json)))
         
     except Exception as e:
         print(f"Error fetching notices: {str(e)}")
@@ -424,6 +796,85 @@ def get_sections(current_user):
         return jsonify(sorted_sections), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+# --- Taxonomy ---
+# The whole department -> course -> year -> section tree with student counts,
+# so the notice form needs one request instead of a distinct() scan per
+# selection change. Cached in memory; roster and department writes in this
+# process invalidate it, TAXONOMY_CACHE_SECONDS bounds staleness from others.
+def build_taxonomy():
+    # One aggregation: students grouped by (branch, course, year, section),
+    # plus the departments collection so departments and courses without
+    # students are listed too. Students' branch/course hold department/course names.
+    rows = Student.objects.aggregate([
+        {"$group": {
+            "_id": {"branch": "$branch", "course": "$course", "year": "$year", "section": "$section"},
+            "count": {"$sum": 1}
+        }},
+        {"$unionWith": {"coll": "departments", "pipeline": [
+            {"$project": {"_id": 0, "department": {"name": "$name", "code": "$code", "courses": "$courses"}}}
+        ]}}
+    ])
+
+    departments = {}
+
+    def department_node(name):
+        return departments.setdefault(name, {"name": name, "code": None, "studentCount": 0, "courses": {}})
+
+    def course_node(dept, name):
+        return dept["courses"].setdefault(name, {"name": name, "code": None, "studentCount": 0, "years": {}})
+
+    for row in rows:
+        if "department" in row:
+            dept = department_node(row["department"]["name"])
+            dept["code"] = row["department"]["code"]
+            for course in row["department"].get("courses") or []:
+                course_node(dept, course["name"])["code"] = course["code"]
+            continue
+
+        group, count = row["_id"], row["count"]
+        dept = department_node(group.get("branch"))
+        course = course_node(dept, group.get("course"))
+        dept["studentCount"] += count
+        course["studentCount"] += count
+        if group.get("year"):
+            year = course["years"].setdefault(group["year"], {"year": group["year"], "studentCount": 0, "sections": {}})
+            year["studentCount"] += count
+            if group.get("section"):
+                year["sections"][group["section"]] = year["sections"].get(group["section"], 0) + count
+
+    def by_name(nodes):
+        return sorted(nodes.values(), key=lambda node: node["name"] or "")
+
+    # No timestamp in the body: the ETag stays the same across rebuilds of unchanged data
+    return {
+        "departments": [{
+            **dept,
+            "courses": [{
+                **course,
+                "years": [{
+                    **year,
+                    "sections": [{"section": s, "studentCount": n} for s, n in sorted(year["sections"].items())]
+                } for _, year in sorted(course["years"].items())]
+            } for course in by_name(dept["courses"])]
+        } for dept in by_name(departments)]
+    }
+
+taxonomy_cache = EtagCache(build_taxonomy, max_age_seconds=float(os.environ.get('TAXONOMY_CACHE_SECONDS', 300)))
+
+@app.route('/api/taxonomy', methods=['GET'])
+@token_required
+def get_taxonomy(current_user):
+    try:
+        body, etag = taxonomy_cache.get()
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        # Browsers revalidate every time; an unchanged tree costs a 304
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
     
 @app.route("/api/teachers/upload-details", methods=["POST"])
 @token_required
@@ -584,6 +1035,7 @@ def update_student_manual(current_user, univ_roll_no):
         student.email = data.get('official_email', student.email).lower()
         
         student.save()
+        taxonomy_cache.invalidate()
         return jsonify({"message": f"Successfully updated student '{student.name}'."}), 200
     except Exception as e:
         return jsonify({"error": f"An unexpected server error: {str(e)}"}), 500
@@ -653,6 +1105,11 @@ def create_notice(current_user):
         form_data = request.form
         files = request.files.getlist('attachments')
 
+        # 'warn' | 'link' | 'ignore' - what to do if a recent notice is nearly the same
+        duplicate_action = form_data.get('duplicate_action', 'warn')
+        if duplicate_action not in DUPLICATE_ACTIONS:
+            return jsonify({"error": f"Invalid duplicate_action. Expected one of: {', '.join(DUPLICATE_ACTIONS)}"}), 400
+
         # --- Handle Attachments (Unchanged) ---
         attachment_filenames = []
         if files:
@@ -703,39 +1160,69 @@ def create_notice(current_user):
         notice = Notice(
             title=form_data.get('title'),
             subject=form_data.get('subject', ''),
-            content=form_data.get('content'),
             departments=target_departments,
             program_course=target_courses,
             year=target_years,
             section=target_sections,
             recipient_emails=list(recipient_emails),
+            recipient_numbers=list(recipient_numbers),
             priority=form_data.get('priority', 'Normal'),
             send_options=send_options,
             status=form_data.get('status', 'draft'),
+            schedule_date=form_data.get('schedule_date', 'false').lower() == 'true',
+            schedule_time=form_data.get('schedule_time', 'false').lower() == 'true',
+            date=form_data.get('date'),
+            time=form_data.get('time'),
             created_by=str(current_user.id),
+            creator_name=current_user.name,
+            creator_email=current_user.email,
             attachments=attachment_filenames
         )
-        notice.save()
+        set_notice_content(notice, form_data.get('content'))
+        if notice.status != 'draft':
+            apply_schedule(notice)
+
+        # --- Near-duplicate check (only notices that will be sent) ---
+        fingerprint = None
+        if notice.status != 'draft':
+            fingerprint = near_duplicate_index.signature(classification_text(notice))
+            matches = []
+            if ensure_near_duplicate_index(NEAR_DUPLICATE_LOAD_WAIT):
+                matches = near_duplicate_index.query(fingerprint, NEAR_DUPLICATE_THRESHOLD)
+            else:
+                print(f"⚠️ Near-duplicate index still loading; '{notice.title}' sent without the check")
+            if matches and duplicate_action == 'warn':
+                return jsonify({
+                    "error": "A nearly identical notice was sent recently",
+                    "duplicates": near_duplicate_json(matches)
+                }), 409
+            if matches and duplicate_action == 'link':
+                notice.duplicate_of = matches[0][0]
+
+        notice.content_hash = classification_hash(notice)
+        # The body goes first so a saved notice always has one
+        notice.id = ObjectId()
+        write_notice_body(notice)
+        notice.save(force_insert=True)
+        queue_classification(notice)
+        if fingerprint is not None:
+            near_duplicate_index.add(str(notice.id), fingerprint, notice.created_at)
         
         # --- Trigger Sending ---
-        # Email (Unchanged)
-        if notice.status == 'published' and send_options.get('email') and recipient_emails:
-            send_bulk_email(
-                recipient_emails=list(recipient_emails),
-                subject=notice.subject or notice.title,
-                body=notice.content,
-                attachments=attachment_paths
-            )
-
-        # NEW: WhatsApp Sending Logic
-        if notice.status == 'published' and send_options.get('whatsapp') and recipient_numbers:
-            whatsapp_body = f"New Notice Published:\n\n*{notice.title}*\n\n{notice.subject or 'Please check the portal for details.'}"
-            send_bulk_whatsapp(
-                recipient_numbers=list(recipient_numbers),
-                message_body=whatsapp_body
-            )
+        if notice.status == 'published':
+            # The delivery queue removes the uploaded files once the sends finish
+            deliver_notice(notice, attachment_paths=attachment_paths)
+            attachment_paths = []
+        elif notice.status == 'scheduled':
+            # Attachments stay in the upload folder until the scheduler delivers them
+            attachment_paths = []
+            notice_scheduler.schedule(str(notice.id), notice.publish_at)
         
-        return jsonify({"message": "Notice created successfully", "noticeId": str(notice.id)}), 201
+        return jsonify({
+            "message": "Notice created successfully",
+            "noticeId": str(notice.id),
+            "duplicateOf": notice.duplicate_of
+        }), 201
         
     except Exception as e:
         traceback.print_exc()
@@ -852,43 +1339,49 @@ def mark_notice_read(current_user, notice_id):
 @role_required(['admin'])
 def get_notice_reads(current_user, notice_id):
     try:
-        notice = Notice.objects(id=ObjectId(notice_id)).first()
+        notice = Notice.objects(id=ObjectId(notice_id)).only('read_count').as_pymongo().first()
         if not notice:
             return jsonify({"error": "Notice not found"}), 404
 
-        # Get user details for each read
-        user_ids = list({read['user_id'] for read in notice.reads})  # Get unique user IDs
-        users = User.objects(id__in=user_ids)
-        user_map = {str(user.id): user for user in users}
-
-        # Count reads per user
-        read_counts = {}
-        for read in notice.reads:
-            user_id = read['user_id']
-            read_counts[user_id] = read_counts.get(user_id, 0) + 1
-
-        reads_data = []
-        for user_id, count in read_counts.items():
-            user = user_map.get(user_id)
-            reads_data.append({
-                "user_id": user_id,
-                "user_name": user.name if user else "Unknown",
-                "user_email": user.email if user else "",
-                "roll_number": getattr(user, 'roll_number', 'null'),  # Add if available
-                "department": getattr(user, 'department', 'null'),    # Add if available
-                "course": getattr(user, 'course', 'null'),            # Add if available
-                "section": getattr(user, 'section', 'null'),          # Add if available
-                "read_count": count,
-                "last_read": max(
-                    [read['timestamp'] for read in notice.reads if read['user_id'] == user_id]
-                ).isoformat() if notice.reads else None
-            })
-
-        return jsonify({
-            "total_reads": len(notice.reads),
-            "unique_readers": notice.read_count,
-            "reads": reads_data
-        }), 200
+        # One row per reader with their read count and latest read, grouped
+        # in MongoDB and streamed; totals follow the rows in the response
+        readers = Notice.objects(id=ObjectId(notice_id)).aggregate([
+            {"$project": {"reads": 1}},
+            {"$unwind": "$reads"},
+            {"$group": {
+                "_id": "$reads.user_id",
+                "count": {"$sum": 1},
+                "last_read": {"$max": "$reads.timestamp"}
+            }}
+        ])
+        total_reads = [0]
+
+        def reader_rows():
+            readers_iter = iter(readers)
+            while True:
+                batch = list(itertools.islice(readers_iter, STREAM_BATCH_SIZE))
+                if not batch:
+                    return
+                users = load_creators([row["_id"] for row in batch])
+                for row in batch:
+                    user = users.get(row["_id"])
+                    total_reads[0] += row["count"]
+                    yield {
+                        "user_id": row["_id"],
+                        "user_name": user["name"] if user else "Unknown",
+                        "user_email": user["email"] if user else "",
+                        "roll_number": 'null',  # Users have no academic details
+                        "department": 'null',
+                        "course": 'null',
+                        "section": 'null',
+                        "read_count": row["count"],
+                        "last_read": isoformat(row["last_read"])
+                    }
+
+        return stream_json(object_chunks("reads", reader_rows(), lambda: {
+            "total_reads": total_reads[0],
+            "unique_readers": notice.get('read_count', 0)
+        }))
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -928,48 +1421,71 @@ def get_notice_analytics(current_user, notice_id):
 @token_required
 def get_notice(current_user, notice_id):
     try:
-        notice = Notice.objects(id=ObjectId(notice_id)).first()
+        # The reads list can be long and is not part of the response
+        notice = Notice.objects(id=ObjectId(notice_id)).exclude('reads').as_pymongo().first()
         if not notice:
             return jsonify({"error": "Notice not found"}), 404
         
-        creator = User.objects(id=ObjectId(notice.created_by)).first()
-        
+        content = notice.get('content')
+        if content is None:
+            content = notice_bodies([notice_id]).get(notice_id, '')
+
         return jsonify({
-            "id": str(notice.id),
-            "title": notice.title,
-            "subject": notice.subject,
-            "content": notice.content,  # HTML content from RTE
-            "noticeType": notice.notice_type,
-            "departments": notice.departments,
-            "programCourse": notice.program_course,
-            "specialization": notice.specialization,
-            "year": notice.year,
-            "section": notice.section,
-            "recipientEmails": notice.recipient_emails,
-            "priority": notice.priority,
-            "status": notice.status,
-            "sendOptions": notice.send_options,
-            "scheduleDate": notice.schedule_date,
-            "scheduleTime": notice.schedule_time,
-            "date": notice.date,
-            "time": notice.time,
-            "from": notice.from_field,
-            "publishAt": notice.publish_at.isoformat() if notice.publish_at else None,
-            "createdAt": notice.created_at.isoformat(),
-            "updatedAt": notice.updated_at.isoformat(),
-            "readCount": notice.read_count,
-            "createdBy": {
-                "id": notice.created_by,
-                "name": creator.name if creator else "Unknown",
-                "email": creator.email if creator else ""
-            },
-            "attachments": notice.attachments
+            **notice_list_json(notice, legacy_creators([notice])),
+            "content": content,
+            "recipientEmails": notice.get('recipient_emails', []),
+            "sendOptions": notice.get('send_options', {"email": False, "web": True}),
+            "scheduleDate": notice.get('schedule_date', False),
+            "scheduleTime": notice.get('schedule_time', False),
+            "date": notice.get('date'),
+            "time": notice.get('time'),
+            "from": notice.get('from_field'),
+            "updatedAt": isoformat(notice.get('updated_at')),
+            "duplicateOf": notice.get('duplicate_of'),
+            "attachments": notice.get('attachments', [])
         }), 200
         
     except Exception as e:
         print(f"Error fetching notice: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+# Notice bodies are immutable per (id, version): update_notice bumps the
+# version whenever the content changes. Each is compressed once and cached.
+notice_body_cache = PrecompressedCache(int(os.environ.get('NOTICE_BODY_CACHE_BYTES', 32 * 1024 * 1024)))
+
+@app.route("/api/notices/<notice_id>/content", methods=["GET"])
+@token_required
+def get_notice_content(current_user, notice_id):
+    try:
+        notice = Notice.objects(id=ObjectId(notice_id)).only('version').as_pymongo().first() if ObjectId.is_valid(notice_id) else None
+        if not notice:
+            return jsonify({"error": "Notice not found"}), 404
+
+        etag = f"{notice_id}-v{notice.get('version', 1)}"
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            entry = notice_body_cache.get(etag)
+            if entry is None:
+                notice = Notice.objects(id=ObjectId(notice_id)).only('content', 'version').first()
+                if not notice:
+                    return jsonify({"error": "Notice not found"}), 404
+                etag = f"{notice_id}-v{notice.version or 1}"
+                entry = notice_body_cache.put(etag, notice_content(notice).encode('utf-8'))
+            encoding = choose_encoding(request.accept_encodings)
+            response = app.response_class(entry[encoding or 'identity'], mimetype='text/html')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+            # Stored RTE HTML: never run its scripts if the URL is opened directly
+            response.headers['Content-Security-Policy'] = 'sandbox'
+
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/notices/<notice_id>", methods=["PUT"])
 @token_required
 @role_required(['admin'])
@@ -980,11 +1496,23 @@ def update_notice(current_user, notice_id):
             return jsonify({"error": "Notice not found or unauthorized"}), 404
             
         form_data = request.form
-        
+
+        # 'silent' | 'new_recipients' | 'all' - controls who hears about this edit
+        delivery_mode = form_data.get('delivery_mode', 'new_recipients')
+        if delivery_mode not in DELIVERY_MODES:
+            return jsonify({"error": f"Invalid delivery_mode. Expected one of: {', '.join(DELIVERY_MODES)}"}), 400
+
+        was_published = notice.status == 'published'
+        previous_content = (notice.title, notice.subject, notice_content(notice))
+        previous_recipients = {e.strip().lower() for e in notice.recipient_emails}
+
         # ... (all your field updates) ...
         notice.title = form_data.get('title', notice.title)
         notice.subject = form_data.get('subject', notice.subject)
-        notice.content = form_data.get('content', notice.content)
+        # Legacy notices move their inline body out on their first edit
+        body_changed = form_data.get('content', previous_content[2]) != previous_content[2] or notice.content is not None
+        if body_changed:
+            set_notice_content(notice, form_data.get('content', previous_content[2]))
         notice.notice_type = form_data.get('notice_type', notice.notice_type)
         notice.departments = json.loads(form_data.get('departments', json.dumps(notice.departments)))
         notice.program_course = form_data.get('program_course', notice.program_course)
@@ -1004,31 +1532,48 @@ def update_notice(current_user, notice_id):
         # ... (attachment handling) ...
 
         # Update scheduling
-        if notice.schedule_date and notice.date:
-            if notice.schedule_time and notice.time:
-                datetime_str = f"{notice.date} {notice.time}"
-                notice.publish_at = datetime.datetime.strptime(datetime_str, '%Y-%m-%d %H:%M')
-            else:
-                notice.publish_at = datetime.datetime.strptime(notice.date, '%Y-%m-%d')
-            
-            if notice.publish_at > datetime.datetime.now():
-                notice.status = 'scheduled'
-            else:
-                notice.status = 'published'
+        apply_schedule(notice)
+
+        # A new content version gives every recipient a fresh idempotency key;
+        # "re-send to all" forces one even when only the audience changed
+        if (notice.title, notice.subject, notice_content(notice)) != previous_content or delivery_mode == 'all':
+            notice.version = (notice.version or 1) + 1
 
+        notice.content_hash = classification_hash(notice)
         notice.updated_at = datetime.datetime.now()
+        if body_changed:
+            write_notice_body(notice)
         notice.save()
-        
+        queue_classification(notice)
+        if notice.status == 'draft':
+            near_duplicate_index.remove(str(notice.id))
+        else:
+            near_duplicate_index.add(str(notice.id), near_duplicate_index.signature(classification_text(notice)), notice.created_at)
+
+        if notice.status == 'scheduled':
+            notice_scheduler.schedule(str(notice.id), notice.publish_at)
+        else:
+            notice_scheduler.cancel(str(notice.id))
+
         # Send email if the notice is published and has recipients (checkbox is ignored)
+        queued_for = 0
         if notice.status == 'published' and notice.recipient_emails:
-            print(f"Attempting to send email for updated notice: {notice.title}")
-            send_bulk_email(
-                recipient_emails=notice.recipient_emails,
-                subject=notice.subject or notice.title,
-                body=notice.content
-            )
+            if not was_published or delivery_mode == 'all':
+                targets = notice.recipient_emails
+            elif delivery_mode == 'new_recipients':
+                targets = [e for e in notice.recipient_emails if e.strip().lower() not in previous_recipients]
+            else:
+                targets = []
 
-        return jsonify({"message": "Notice updated successfully"}), 200
+            if targets:
+                print(f"Attempting to send email for updated notice: {notice.title}")
+                queued_for = deliver_notice(notice, email_recipients=targets, whatsapp=False)
+
+        return jsonify({
+            "message": "Notice updated successfully",
+            "version": notice.version,
+            "queuedFor": queued_for
+        }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1037,12 +1582,15 @@ def update_notice(current_user, notice_id):
 @role_required(['admin'])
 def delete_notice(current_user, notice_id):
     try:
-        notice = Notice.objects(id=ObjectId(notice_id), createdBy=str(current_user.id)).first()
+        notice = Notice.objects(id=ObjectId(notice_id), created_by=str(current_user.id)).first()
         
         if not notice:
             return jsonify({"error": "Notice not found or unauthorized"}), 404
             
         notice.delete()
+        NoticeBody.objects(notice_id=notice_id).delete()
+        vector_index.remove(notice_id)
+        near_duplicate_index.remove(notice_id)
         return jsonify({"message": "Notice deleted successfully"}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1055,31 +1603,128 @@ def get_users(current_user):
         # if current_user.role != "admin":
             # return jsonify({"error": "Unauthorized"}), 403
                 
-        users = User.objects().only('id', 'name', 'email')
-        return jsonify([{
-            "id": str(user.id),
-            "name": user.name,
-            "email": user.email
-        } for user in users]), 200
+        users = User.objects().only(*USER_LIST_FIELDS).as_pymongo()
+        return stream_json(array_chunks(user_json(user) for user in users))
     except Exception as e:
         print(f"Users error: {str(e)}")
         return jsonify({"error": "Failed to fetch users"}), 500
 
+@app.route("/api/users/<user_id>", methods=["PUT"])
+@token_required
+def update_user(current_user, user_id):
+    try:
+        if current_user.role != "admin" and str(current_user.id) != user_id:
+            return jsonify({"error": "Unauthorized"}), 403
+
+        user = User.objects(id=ObjectId(user_id)).first() if ObjectId.is_valid(user_id) else None
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        data = request.json or {}
+        name = (data.get('name') or user.name).strip()
+        email = (data.get('email') or user.email).strip()
+        if email != user.email and User.objects(email=email).first():
+            return jsonify({"error": "Email already exists"}), 400
+
+        user.name = name
+        user.email = email
+        user.save()
+
+        # Keep the creator copies on this user's notices in step
+        Notice.objects(created_by=user_id).update(set__creator_name=name, set__creator_email=email)
+        creator_cache.invalidate(user_id)
+
+        return jsonify({"id": str(user.id), "name": user.name, "email": user.email}), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+# Digest opt-in is per recipient address, so it is set by whoever notices are
+# sent to: students (official_email, from a /api/students/login token) as well
+# as staff (their login email). Normal-priority notices to an opted-in address
+# arrive as one email per digest window.
+def recipient_token_required(f):
+    # Like token_required, but takes student or user tokens and passes the
+    # address the holder receives notices at
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        auth_header = request.headers.get('Authorization', '')
+        parts = auth_header.split()
+        if len(parts) != 2 or parts[0].lower() != 'bearer':
+            return jsonify({'message': 'Token is missing or malformed!'}), 401
+
+        try:
+            data = jwt.decode(parts[1], app.config['SECRET_KEY'], algorithms=["HS256"])
+            if data.get('student_id'):
+                student = Student.objects(id=ObjectId(data['student_id'])).only('official_email').first()
+                recipient_email = student.official_email if student else None
+            else:
+                user = User.objects(id=ObjectId(data['user_id'])).only('email').first()
+                recipient_email = user.email if user else None
+            if not recipient_email:
+                return jsonify({'message': 'No email address to send notices to!'}), 401
+        except jwt.ExpiredSignatureError:
+            return jsonify({'message': 'Token has expired!'}), 401
+        except Exception as e:
+            print(f"Token validation error: {str(e)}")
+            return jsonify({'message': 'Token is invalid!'}), 401
+
+        return f(recipient_email, *args, **kwargs)
+
+    return decorated
+
+@app.route("/api/me/digest", methods=["GET"])
+@recipient_token_required
+def get_digest_preference(recipient_email):
+    return jsonify({"digest": bool(digest_recipients([recipient_email]))}), 200
+
+@app.route("/api/me/digest", methods=["PUT"])
+@recipient_token_required
+def update_digest_preference(recipient_email):
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get('digest'), bool):
+        return jsonify({"error": "digest must be true or false"}), 400
+    try:
+        set_digest_preference(recipient_email, data['digest'])
+        return jsonify({"digest": data['digest']}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 
 @app.route("/api/notices/analytics", methods=["GET"])
 @token_required
 @role_required(['admin'])
 def get_all_notices_analytics(current_user):
     try:
-        # If you add readBy field to schema
-        total_reads = sum(len(notice.readBy) for notice in Notice.objects())
-        
-        # Or if you don't have read tracking
-        total_notices = Notice.objects.count()
+        # One aggregation over the stored labels; the model is never called here
+        result = list(Notice.objects.aggregate([
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "notices": {"$sum": 1},
+                    "reads": {"$sum": "$read_count"},
+                    "classified": {"$sum": {"$cond": [{"$ifNull": ["$classified_at", False]}, 1, 0]}}
+                }}],
+                "byCategory": [
+                    {"$match": {"predicted_category": {"$ne": None}}},
+                    {"$group": {"_id": "$predicted_category", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}}
+                ],
+                "byPriority": [
+                    {"$match": {"predicted_priority": {"$ne": None}}},
+                    {"$group": {"_id": "$predicted_priority", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}}
+                ]
+            }}
+        ]))[0]
+        totals = result["totals"][0] if result["totals"] else {"notices": 0, "reads": 0, "classified": 0}
         
         return jsonify({
-            "totalNotices": total_notices,
-            # "totalReads": total_reads,  # Only include if you have readBy field
+            "totalNotices": totals["notices"],
+            "totalReads": totals["reads"],
+            "classifiedNotices": totals["classified"],
+            "predictedCategories": {row["_id"]: row["count"] for row in result["byCategory"]},
+            "predictedPriorities": {row["_id"]: row["count"] for row in result["byPriority"]}
         }), 200
         
     except Exception as e:
@@ -1097,6 +1742,16 @@ def get_users_count(current_user):
         print(f"Error counting users: {str(e)}")
         return jsonify({"error": "Failed to count users"}), 500 
 
+@app.route("/api/delivery/metrics", methods=["GET"])
+@token_required
+@role_required(['admin'])
+def get_delivery_metrics(current_user):
+    try:
+        # Per-priority lane queue depth and wait times
+        return jsonify(delivery_queue.metrics()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 
 @app.route("/api/auth/current-user", methods=["GET"])
 @token_required
@@ -1126,36 +1781,8 @@ def get_notices_by_creator(current_user, user_id):
         if current_user.role != "admin" and str(current_user.id) != user_id:
             return jsonify({"error": "Unauthorized"}), 403
 
-        notices = Notice.objects(created_by=user_id).order_by('-created_at')
-        
-        user_map = {str(user.id): user for user in User.objects.only('id', 'name', 'email')}
-        
-        notices_data = []
-        for notice in notices:
-            creator = user_map.get(notice.created_by)
-            notices_data.append({
-                "id": str(notice.id),
-                "title": notice.title,
-                "content": notice.content,
-                "notice_type": notice.notice_type,
-                "departments": notice.departments,
-                "year": notice.year,
-                "section": notice.section,
-                "recipient_emails": notice.recipient_emails,
-                "priority": notice.priority,
-                "status": notice.status,
-                "publish_at": notice.publish_at.isoformat() if notice.publish_at else None,
-                "created_at": notice.created_at.isoformat(),
-                "updated_at": notice.updated_at.isoformat(),
-                "created_by": {
-                    "id": notice.created_by,
-                    "name": creator.name if creator else "Unknown",
-                    "email": creator.email if creator else ""
-                },
-                "attachments": notice.attachments
-            })
-            
-        return jsonify(notices_data), 200
+        notices = Notice.objects(created_by=user_id).only(*CREATOR_NOTICE_FIELDS).order_by('-created_at').as_pymongo()
+        return stream_json(array_chunks(serialize_notices(notices, creator_notice_json)))
         
     except Exception as e:
         print(f"Error fetching user's notices: {str(e)}")
@@ -1303,6 +1930,7 @@ def upload_student_details(current_user):
 
         if students_to_create:
             Student.objects.insert(students_to_create)
+            taxonomy_cache.invalidate()
 
         message = f"Process complete. Successfully created {len(students_to_create)} new students."
         if not students_to_create and not conflicts and not errors:
@@ -1351,10 +1979,81 @@ def add_student_manual(current_user):
             raw_password=raw_password
         )
         student.save()
+        taxonomy_cache.invalidate()
         return jsonify({"message": f"Successfully created student '{data.get('name')}'."}), 201
     except Exception as e:
         return jsonify({"error": f"An unexpected server error: {str(e)}"}), 500
     
+# --- Priority Model ---
+# By default priority comes from the AI service's /predict/all, which shares
+# one encoder pass between the category and priority heads, so this process
+# never loads TensorFlow. Until a priority head is trained
+# (train_priority_head.py) notices are reported as unclassified, Normal.
+# PRIORITY_MODEL_SOURCE=local opts into the in-process RoBERTa model instead,
+# loaded once per process through the registry.
+PRIORITY_MODEL_SOURCE = os.environ.get('PRIORITY_MODEL_SOURCE', 'service').lower()  # service | local
+CLASSIFIER_SERVICE_URL = os.environ.get('CLASSIFIER_SERVICE_URL', 'http://127.0.0.1:5002').rstrip('/')
+CLASSIFIER_SERVICE_TIMEOUT = float(os.environ.get('CLASSIFIER_SERVICE_TIMEOUT', 2))  # Per-call deadline, seconds
+PRIORITY_MODEL_PATH = os.environ.get(
+    'PRIORITY_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'roberta_priority_classifier_final')
+)
+PRIORITY_MODEL_EAGER = os.environ.get('PRIORITY_MODEL_EAGER', 'false').lower() == 'true'
+PRIORITY_LABELS = {
+    0: "Normal",
+    1: "Urgent",
+    2: "Highly Urgent"
+}
+
+def load_priority_model():
+    from transformers import TFRobertaForSequenceClassification, RobertaTokenizer
+
+    tokenizer = RobertaTokenizer.from_pretrained(PRIORITY_MODEL_PATH)
+    model = TFRobertaForSequenceClassification.from_pretrained(PRIORITY_MODEL_PATH, from_pt=False)
+    return tokenizer, model
+
+def run_priority_model(priority_model, text):
+    tokenizer, model = priority_model
+    inputs = tokenizer(text, return_tensors="tf", truncation=True, padding=True)
+    logits = model(**inputs).logits.numpy()
+    return PRIORITY_LABELS.get(int(logits[0].argmax()), "Normal")
+
+# Pooled, deadline-bound client; returns "unclassified" instead of waiting on
+# a slow or failing AI service
+inference_client = InferenceClient(
+    CLASSIFIER_SERVICE_URL,
+    timeout=CLASSIFIER_SERVICE_TIMEOUT,
+    pool_size=int(os.environ.get('CLASSIFIER_POOL_SIZE', 10)),
+    failure_threshold=int(os.environ.get('CLASSIFIER_FAILURE_THRESHOLD', 5)),
+    reset_seconds=float(os.environ.get('CLASSIFIER_RESET_SECONDS', 30))
+)
+
+model_registry = ModelRegistry()
+model_registry.register(
+    'priority',
+    load_priority_model,
+    warmup=lambda priority_model: run_priority_model(priority_model, "Warm-up notice")
+)
+
+@app.route("/api/predict-priority/ready", methods=["GET"])
+def predict_priority_ready():
+    if PRIORITY_MODEL_SOURCE == 'service':
+        try:
+            response = inference_client.session.get(f"{CLASSIFIER_SERVICE_URL}/ready", timeout=CLASSIFIER_SERVICE_TIMEOUT)
+            status = response.json()
+            # Without a priority head the service still answers (Normal)
+            ready = response.status_code == 200
+        except (requests.RequestException, ValueError) as e:
+            status, ready = {"error": str(e)}, False
+        return jsonify({
+            "ready": ready,
+            "source": "service",
+            "service": status,
+            "client": inference_client.metrics()
+        }), 200 if ready else 503
+    status = model_registry.status()['priority']
+    return jsonify(status), 200 if status['ready'] else 503
+
 # Place this near other routes
 @app.route("/api/predict-priority", methods=["POST"])
 def predict_priority():
@@ -1366,25 +2065,27 @@ def predict_priority():
         if not subject and not body:
             return jsonify({"error": "Subject or body is required"}), 400
 
-        from transformers import TFRobertaForSequenceClassification, RobertaTokenizer
-        import tensorflow as tf
-
-        MODEL_PATH = "/home/somani/Desktop/akshat-smart-agent/models/roberta_priority_classifier_final/content/roberta_priority_classifier_final"
-
-        tokenizer = RobertaTokenizer.from_pretrained(MODEL_PATH)
-        model = TFRobertaForSequenceClassification.from_pretrained(MODEL_PATH, from_pt=False)
-
-        label_map = {
-            0: "Normal",
-            1: "Urgent",
-            2: "Highly Urgent"
-        }
+        if PRIORITY_MODEL_SOURCE == 'service':
+            result = inference_client.classify(f"{subject} {body}", priority=True)
+            if result["status"] != "classified":
+                return jsonify({"error": "Priority prediction is unavailable right now", **result}), 503
+            if result["priority"] is None:
+                # No priority head trained yet: Normal, flagged as unclassified
+                return jsonify({
+                    "priority": "Normal",
+                    "confidence": None,
+                    "category": result["category"],
+                    "status": "unclassified",
+                    "reason": "No priority head installed in the classifier service"
+                }), 200
+            return jsonify({
+                "priority": result["priority"],
+                "confidence": result["priorityConfidence"],
+                "category": result["category"]
+            }), 200
 
-        full_text = f"{subject} {body}"
-        inputs = tokenizer(full_text, return_tensors="tf", truncation=True, padding=True)
-        logits = model(**inputs).logits
-        predicted_class = tf.argmax(logits, axis=1).numpy()[0]
-        priority = label_map.get(predicted_class, "Normal")
+        priority_model = model_registry.get('priority')
+        priority = run_priority_model(priority_model, f"{subject} {body}")
 
         return jsonify({"priority": priority}), 200
     except Exception as e:
@@ -1392,6 +2093,183 @@ def predict_priority():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+# Category suggestion for the notice form, proxied so the browser never
+# talks to the AI service directly
+@app.route("/api/classify", methods=["POST"])
+@token_required
+def classify_notice(current_user):
+    data = request.get_json(silent=True) or {}
+    text = (data.get("text") or "").strip()
+    if not text:
+        return jsonify({"error": "Text is required"}), 400
+    return jsonify(inference_client.classify(text)), 200
+
+# --- Auto-classification ---
+# Every saved notice is classified in the background; the request never waits
+# on the model and an unavailable AI service only leaves the labels empty.
+AUTO_CLASSIFY_TIMEOUT = float(os.environ.get('AUTO_CLASSIFY_TIMEOUT', 10))
+classification_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('AUTO_CLASSIFY_WORKERS', 2)),
+    thread_name_prefix='classify'
+)
+
+def classification_text(notice):
+    content = html.unescape(HTML_TAG.sub(' ', notice_content(notice)))
+    return f"{notice.title or ''} {notice.subject or ''} {content}".strip()
+
+def classification_hash(notice):
+    return hashlib.sha256(classification_text(notice).encode('utf-8')).hexdigest()
+
+def queue_classification(notice):
+    # Call after saving a notice whose content_hash is current
+    if notice.content_hash and notice.content_hash == notice.classified_hash:
+        return  # Text unchanged since the last classification
+    classification_pool.submit(classify_and_store, str(notice.id), notice.content_hash, classification_text(notice))
+
+def classify_and_store(notice_id, content_hash, text):
+    try:
+        # Matching on content_hash drops results if the notice was edited
+        # meanwhile; the edit queued its own classification
+        result = inference_client.classify(text, timeout=AUTO_CLASSIFY_TIMEOUT, priority=True, embed=True)
+        if result["status"] == "classified":
+            Notice.objects(id=notice_id, content_hash=content_hash).update_one(
+                set__predicted_category=result["category"],
+                set__predicted_priority=result["priority"],
+                set__category_confidence=result["categoryConfidence"],
+                set__priority_confidence=result["priorityConfidence"],
+                set__model_version=result["modelVersion"],
+                set__classified_at=datetime.datetime.now(),
+                set__classified_hash=content_hash
+            )
+        else:
+            print(f"⚠️ Notice {notice_id} left unclassified: {result['reason']}")
+
+        # The embedding comes from the classification pass; only without a
+        # priority head (or a classification) does /embed encode the text again
+        embedding = result.get("embedding")
+        if embedding is None:
+            embeddings = inference_client.embed([text], timeout=AUTO_CLASSIFY_TIMEOUT)
+            embedding = embeddings[0] if embeddings else None
+        if embedding and Notice.objects(id=notice_id, content_hash=content_hash).count():
+            vector_index.upsert(notice_id, embedding)
+    except Exception as e:
+        print(f"❌ Failed to classify notice {notice_id}: {e}")
+
+# --- Semantic search ---
+# Notice embeddings (the AI service's normalized encoder output) are appended
+# to a memory-mapped index as notices are classified; a query is embedded the
+# same way and ranked by cosine similarity. Rebuild with build_search_index.py
+# after changing the model, then restart the API to open the new index.
+vector_index = VectorIndex(os.environ.get(
+    'VECTOR_INDEX_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_index')
+))
+SEMANTIC_SEARCH_MAX_K = 50
+
+@app.route("/api/notices/semantic-search", methods=["GET"])
+@token_required
+def semantic_search(current_user):
+    try:
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify({"error": "Query is required"}), 400
+        k = min(max(request.args.get('k', 10, type=int), 1), SEMANTIC_SEARCH_MAX_K)
+
+        embeddings = inference_client.embed([query])
+        if embeddings is None:
+            return jsonify({"error": "Semantic search is unavailable right now"}), 503
+
+        matches = vector_index.search(embeddings[0], k)
+        notices = {str(doc['_id']): doc for doc in Notice.objects(id__in=[notice_id for notice_id, _ in matches]).only(
+            'id', 'title', 'subject', 'notice_type', 'priority', 'status', 'created_at', 'predicted_category',
+            'category_confidence', 'predicted_priority', 'priority_confidence', 'model_version', 'classified_at',
+            'content_hash', 'classified_hash'
+        ).as_pymongo()}
+
+        return jsonify([{
+            "id": notice_id,
+            "score": round(score, 4),
+            "title": notices[notice_id].get('title'),
+            "subject": notices[notice_id].get('subject'),
+            "noticeType": notices[notice_id].get('notice_type'),
+            "priority": notices[notice_id].get('priority', "Normal"),
+            "status": notices[notice_id].get('status', "draft"),
+            "createdAt": isoformat(notices[notice_id].get('created_at')),
+            "classification": classification_json(notices[notice_id])
+        } for notice_id, score in matches if notice_id in notices]), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+# --- Near-duplicate detection ---
+# Sent notices from the last NEAR_DUPLICATE_WINDOW_DAYS are kept as MinHash
+# signatures in an in-process LSH index; create_notice looks a new notice up
+# before it is sent. The index is filled from MongoDB in the background at
+# startup and kept current as notices are created, edited and deleted. Until
+# the load finishes, create_notice waits up to NEAR_DUPLICATE_LOAD_WAIT_SECONDS
+# and then sends without the check rather than miss older duplicates silently.
+DUPLICATE_ACTIONS = ('warn', 'link', 'ignore')
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.8))  # Estimated Jaccard similarity
+NEAR_DUPLICATE_WINDOW_DAYS = int(os.environ.get('NEAR_DUPLICATE_WINDOW_DAYS', 30))
+NEAR_DUPLICATE_LOAD_WAIT = float(os.environ.get('NEAR_DUPLICATE_LOAD_WAIT_SECONDS', 5))
+near_duplicate_index = NearDuplicateIndex(
+    window=timedelta(days=NEAR_DUPLICATE_WINDOW_DAYS),
+    max_items=int(os.environ.get('NEAR_DUPLICATE_MAX_NOTICES', 50000))
+)
+near_duplicate_loader = None
+near_duplicate_loader_lock = threading.Lock()
+near_duplicate_ready = threading.Event()
+
+def ensure_near_duplicate_index(timeout=None):
+    # Starts the load (again, if the last one failed) and waits up to
+    # `timeout` seconds for it; True once the index holds every recent notice
+    global near_duplicate_loader
+    with near_duplicate_loader_lock:
+        if not near_duplicate_ready.is_set() and (near_duplicate_loader is None or not near_duplicate_loader.is_alive()):
+            near_duplicate_loader = threading.Thread(target=load_near_duplicate_index, daemon=True)
+            near_duplicate_loader.start()
+    return near_duplicate_ready.wait(timeout)
+
+def load_near_duplicate_index():
+    try:
+        cutoff = datetime.datetime.now() - timedelta(days=NEAR_DUPLICATE_WINDOW_DAYS)
+        notices = iter(Notice.objects(status__ne='draft', created_at__gte=cutoff).only(
+            'id', 'title', 'subject', 'content', 'created_at'
+        ).order_by('created_at'))
+        for batch in iter(lambda: attach_bodies(itertools.islice(notices, STREAM_BATCH_SIZE)), []):
+            for notice in batch:
+                near_duplicate_index.add(str(notice.id), near_duplicate_index.signature(classification_text(notice)),
+                                         notice.created_at, replace=False)
+        near_duplicate_ready.set()
+        print(f"✅ Near-duplicate index loaded with {len(near_duplicate_index)} notices")
+    except Exception as e:
+        print(f"❌ Failed to load the near-duplicate index: {e}")
+
+def near_duplicate_json(matches):
+    notices = {str(n.id): n for n in Notice.objects(id__in=[notice_id for notice_id, _ in matches]).only(
+        'id', 'title', 'departments', 'status', 'created_at'
+    )}
+    return [{
+        "id": notice_id,
+        "similarity": round(similarity, 3),
+        "title": notices[notice_id].title,
+        "departments": notices[notice_id].departments,
+        "status": notices[notice_id].status,
+        "createdAt": notices[notice_id].created_at.isoformat()
+    } for notice_id, similarity in matches if notice_id in notices]
+
+def exclude_original_recipients(notice, email_recipients, numbers):
+    # A linked near-duplicate only goes to people the original did not reach
+    original = Notice.objects(id=notice.duplicate_of).only('recipient_emails', 'recipient_numbers').first()
+    if not original:
+        return email_recipients, numbers
+    reached_emails = {e.strip().lower() for e in original.recipient_emails}
+    reached_numbers = {n.strip() for n in original.recipient_numbers}
+    return (
+        [e for e in email_recipients if e.strip().lower() not in reached_emails],
+        [n for n in numbers if n.strip() not in reached_numbers]
+    )
+
 # Get students by branch/course (for notice targeting)
 @app.route("/api/students", methods=["GET"])
 @token_required
@@ -1406,17 +2284,8 @@ def get_students(current_user):
         if course:
             query["course"] = course
             
-        students = Student.objects(**query).only(
-            'email', 'official_email', 'name', 'univ_roll_no', 'course', 'branch'
-        )
-        
-        return jsonify([{
-            "email": s.official_email or s.email,
-            "name": s.name,
-            "univ_roll_no": s.univ_roll_no,
-            "course": s.course,
-            "branch": s.branch
-        } for s in students]), 200
+        students = Student.objects(**query).only(*STUDENT_LIST_FIELDS).as_pymongo()
+        return stream_json(array_chunks(student_list_json(s) for s in students))
         
     except Exception as e:
         traceback.print_exc()
@@ -1536,10 +2405,20 @@ def seed_departments():
             courses = [Course(name=c['name'], code=c['code']) for c in dept_info['courses']]
             department = Department(name=dept_info['name'], code=dept_info['code'], courses=courses)
             department.save()
+        taxonomy_cache.invalidate()
         return jsonify({"message": f"Successfully seeded {len(department_data)} departments."}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500        
 
 
 if __name__ == "__main__":
+    # The debug reloader runs this block in two processes; start background
+    # workers only in the one that actually serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true" and NOTICE_SCHEDULER_IN_PROCESS:
+        notice_scheduler.start()
+        digest_sender.start()
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true" and PRIORITY_MODEL_EAGER and PRIORITY_MODEL_SOURCE == 'local':
+        model_registry.load_in_background('priority')
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        ensure_near_duplicate_index(timeout=0)  # Loaded before the first notice is created
     app.run(debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,115 @@
+# Delivery throughput benchmark against the local stand-in servers.
+#
+#   cd backend/app
+#   python -m benchmarks.delivery_benchmark --sizes 1000 10000 50000 --latency-ms 5 --error-rate 0.01
+#
+# Starts dev_servers.fake_smtp_server and dev_servers.fake_ultramsg_server
+# in-process and points the real send_bulk_email / send_bulk_whatsapp at them.
+# Recipients are chunked and run through the same DeliveryQueue as notice
+# delivery. For each send it reports messages/sec and p50/p99 per-recipient
+# latency (from the start of the send until the server accepted the message
+# carrying that recipient), plus how many sends failed and how many recipients
+# were left undelivered.
+import argparse
+import contextlib
+import io
+import os
+import threading
+import time
+
+from dev_servers.fake_smtp_server import FakeSMTPServer
+from dev_servers.fake_ultramsg_server import FakeUltraMsgServer
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_chunks(queue, send, recipients, chunk_size):
+    chunks = [recipients[i:i + chunk_size] for i in range(0, len(recipients), chunk_size)]
+    remaining = [len(chunks)]
+    failed = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def job(chunk):
+        ok = False
+        try:
+            ok = send(chunk)
+        finally:
+            with lock:
+                failed[0] += 0 if ok else 1
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+
+    for chunk in chunks:
+        queue.submit("Normal", job, chunk)
+    done.wait()
+    return len(chunks), failed[0]
+
+
+def report(channel, size, started, elapsed, stats, chunks, failed_chunks):
+    latencies = sorted(accepted - started for accepted in stats.accepted.values())
+    delivered = len(latencies)
+    print(f"{channel:<9} {size:>7} recipients | {delivered / elapsed:>9.1f} msg/s | "
+          f"p50 {percentile(latencies, 0.50) * 1000:>8.1f} ms | p99 {percentile(latencies, 0.99) * 1000:>8.1f} ms | "
+          f"failed sends {failed_chunks}/{chunks} | undelivered {size - delivered}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark email and WhatsApp delivery throughput")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--channels", nargs="+", default=["email", "whatsapp"], choices=["email", "whatsapp"])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated server latency per message")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Simulated server failure rate")
+    parser.add_argument("--workers", type=int, default=4, help="Delivery queue workers")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Recipients per queued send")
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    parser.add_argument("--ultramsg-port", type=int, default=8081)
+    args = parser.parse_args()
+
+    smtp = FakeSMTPServer(port=args.smtp_port, latency_ms=args.latency_ms, error_rate=args.error_rate).start_background()
+    ultramsg = FakeUltraMsgServer(port=args.ultramsg_port, latency_ms=args.latency_ms, error_rate=args.error_rate).start_background()
+
+    # The delivery modules read their endpoints at import time
+    os.environ.update({
+        "SMTP_SERVER": "127.0.0.1",
+        "SMTP_PORT": str(args.smtp_port),
+        "SMTP_USE_TLS": "false",
+        "ULTRAMSG_API_URL": f"http://127.0.0.1:{args.ultramsg_port}",
+    })
+    from utils.email_send_function import send_bulk_email
+    from utils.whatsapp_sender_function import send_bulk_whatsapp
+    from utils.delivery_queue import DeliveryQueue
+
+    queue = DeliveryQueue(workers=args.workers, reserved_workers=0)
+    senders = {
+        "email": (smtp.stats, lambda chunk: send_bulk_email(chunk, "Benchmark notice", "<p>Benchmark body</p>")),
+        "whatsapp": (ultramsg.stats, lambda chunk: send_bulk_whatsapp(chunk, "Benchmark notice")),
+    }
+
+    print(f"workers={args.workers} chunk={args.chunk_size} latency={args.latency_ms}ms error_rate={args.error_rate}")
+    for channel in args.channels:
+        stats, send = senders[channel]
+        for size in args.sizes:
+            if channel == "email":
+                recipients = [f"student{i}@bench.local" for i in range(size)]
+            else:
+                recipients = [f"91{9000000000 + i}" for i in range(size)]
+            stats.reset()
+            started = time.perf_counter()
+            # The send functions log every call; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                chunks, failed_chunks = run_chunks(queue, send, recipients, args.chunk_size)
+            elapsed = time.perf_counter() - started
+            report(channel, size, started, elapsed, stats, chunks, failed_chunks)
+
+    smtp.shutdown()
+    ultramsg.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# Rows/sec of the list endpoints' serialization: MongoEngine Documents versus
+# raw documents mapped by utils.serializers.
+#
+#   cd backend/app
+#   python -m benchmarks.serialization_benchmark --rows 20000
+#   python -m benchmarks.serialization_benchmark --live   # against MONGO_URI
+#
+# By default no database is needed: synthetic raw documents (what pymongo
+# returns) are either hydrated into Documents and picked apart field by field,
+# as the endpoints used to do, or passed straight to the serializers. That
+# isolates the per-row CPU cost. --live runs both query paths against the
+# configured database instead, so cursor and network time are included.
+import argparse
+import datetime
+import random
+import time
+
+from bson import ObjectId
+
+from app2 import Notice, Student, User
+from utils.serializers import (
+    NOTICE_LIST_FIELDS, STUDENT_LIST_FIELDS, USER_LIST_FIELDS,
+    notice_list_json, student_list_json, user_json
+)
+
+
+def document_notice_json(notice):
+    # The per-row code get_notices used before the raw path
+    classification = None
+    if notice.classified_at:
+        classification = {
+            "category": notice.predicted_category,
+            "categoryConfidence": notice.category_confidence,
+            "priority": notice.predicted_priority,
+            "priorityConfidence": notice.priority_confidence,
+            "modelVersion": notice.model_version,
+            "classifiedAt": notice.classified_at.isoformat(),
+            "stale": notice.classified_hash != notice.content_hash
+        }
+    return {
+        "id": str(notice.id),
+        "title": notice.title,
+        "subject": notice.subject,
+        "excerpt": notice.excerpt,
+        "wordCount": notice.word_count,
+        "noticeType": notice.notice_type,
+        "departments": notice.departments,
+        "programCourse": notice.program_course,
+        "specialization": notice.specialization,
+        "year": notice.year,
+        "section": notice.section,
+        "priority": notice.priority,
+        "status": notice.status,
+        "publishAt": notice.publish_at.isoformat() if notice.publish_at else None,
+        "createdAt": notice.created_at.isoformat(),
+        "readCount": notice.read_count,
+        "classification": classification,
+        "createdBy": {"id": notice.created_by, "name": notice.creator_name, "email": notice.creator_email}
+    }
+
+
+def document_student_json(s):
+    return {"email": s.official_email or s.email, "name": s.name, "univ_roll_no": s.univ_roll_no,
+            "course": s.course, "branch": s.branch}
+
+
+def document_user_json(user):
+    return {"id": str(user.id), "name": user.name, "email": user.email}
+
+
+def synthetic_notice(i):
+    now = datetime.datetime.now()
+    return {
+        '_id': ObjectId(), 'title': f"Notice {i}", 'subject': "Examination schedule",
+        'excerpt': "Students are informed about the schedule. " * 6, 'word_count': 120,
+        'notice_type': "Academic", 'departments': ["Computer Science", "Electronics"],
+        'program_course': ["B.Tech"], 'specialization': "core", 'year': ["2", "3"], 'section': ["A", "B"],
+        'priority': random.choice(["Normal", "Urgent"]), 'status': "published", 'publish_at': now,
+        'created_at': now, 'read_count': random.randint(0, 500), 'created_by': str(ObjectId()),
+        'creator_name': "Admin", 'creator_email': "admin@example.edu", 'predicted_category': "Exams",
+        'category_confidence': 0.93, 'predicted_priority': "Normal", 'priority_confidence': 0.81,
+        'model_version': "abc123", 'classified_at': now, 'content_hash': "h", 'classified_hash': "h"
+    }
+
+
+def synthetic_student(i):
+    return {'_id': ObjectId(), 'email': f"s{i}@example.edu", 'official_email': f"s{i}@example.edu",
+            'name': f"Student {i}", 'univ_roll_no': str(2100000 + i), 'course': "B.Tech", 'branch': "Computer Science"}
+
+
+def synthetic_user(i):
+    return {'_id': ObjectId(), 'name': f"User {i}", 'email': f"u{i}@example.edu"}
+
+
+def rate(fn, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return rows / best if best else float('inf')
+
+
+def report(name, documents, raw):
+    print(f"{name:<10} documents {documents:>12,.0f} rows/s | raw {raw:>12,.0f} rows/s | {raw / documents:.1f}x")
+
+
+def run_synthetic(rows, repeat):
+    cases = [
+        ("notices", Notice, synthetic_notice, document_notice_json, lambda doc: notice_list_json(doc, {})),
+        ("students", Student, synthetic_student, document_student_json, student_list_json),
+        ("users", User, synthetic_user, document_user_json, user_json),
+    ]
+    for name, document, make, old, new in cases:
+        docs = [make(i) for i in range(rows)]
+        report(
+            name,
+            rate(lambda: [old(document._from_son(doc)) for doc in docs], rows, repeat),
+            rate(lambda: [new(doc) for doc in docs], rows, repeat)
+        )
+
+
+def run_live(repeat):
+    cases = [
+        ("notices", Notice, NOTICE_LIST_FIELDS, document_notice_json, lambda doc: notice_list_json(doc, {})),
+        ("students", Student, STUDENT_LIST_FIELDS, document_student_json, student_list_json),
+        ("users", User, USER_LIST_FIELDS, document_user_json, user_json),
+    ]
+    for name, document, fields, old, new in cases:
+        rows = document.objects.count()
+        if not rows:
+            print(f"{name:<10} no rows")
+            continue
+        report(
+            name,
+            rate(lambda: [old(doc) for doc in document.objects.only(*fields)], rows, repeat),
+            rate(lambda: [new(doc) for doc in document.objects.only(*fields).as_pymongo()], rows, repeat)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Document and raw serialization of the list endpoints")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic rows per endpoint")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is reported")
+    parser.add_argument("--live", action="store_true", help="Query the configured MongoDB instead")
+    args = parser.parse_args()
+
+    if args.live:
+        run_live(args.repeat)
+    else:
+        run_synthetic(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
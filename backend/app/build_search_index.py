@@ -0,0 +1,74 @@
+# Rebuilds the semantic search index from every notice in MongoDB.
+#
+#   python build_search_index.py --batch-size 64
+#
+# New and edited notices are added to the index as they are classified, so
+# this is only needed for notices saved before semantic search existed and
+# after the AI service's model changes (embeddings from different models are
+# not comparable). The index is built in a new version directory under
+# VECTOR_INDEX_DIR and published with one atomic rename of its CURRENT file,
+# so the live index is never modified. A running API keeps serving (and
+# appending to) the version it opened, so restart it once the rebuild is
+# done; notices classified during the rebuild are only in the old version,
+# so re-save them or run the rebuild again.
+import argparse
+import itertools
+import os
+import shutil
+import sys
+import time
+
+from app2 import CLASSIFIER_SERVICE_URL, Notice, attach_bodies, classification_text, vector_index
+from utils.inference_client import InferenceClient
+from utils.vector_index import VectorIndex, current_version, publish_version
+
+
+def remove_old_versions(root, keep):
+    # Everything except the new version and the one running APIs still use
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and name not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+    if '' not in keep:
+        for name in ('vectors.f32', 'ids.txt', 'meta.json'):
+            if os.path.exists(os.path.join(root, name)):
+                os.remove(os.path.join(root, name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the semantic search index")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds allowed per embedding batch")
+    args = parser.parse_args()
+
+    root = vector_index.root
+    previous = current_version(root)
+    version = time.strftime('%Y%m%d-%H%M%S')
+    index = VectorIndex(os.path.join(root, version))
+    client = InferenceClient(CLASSIFIER_SERVICE_URL, timeout=args.timeout, failure_threshold=1)
+
+    notices = iter(Notice.objects.only('id', 'title', 'subject', 'content').order_by('id'))
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        embeddings = client.embed([text for _, text in batch])
+        if embeddings is None:
+            sys.exit(f"❌ Embedding failed; the live index was left in place ({index.directory} is incomplete)")
+        for (notice_id, _), embedding in zip(batch, embeddings):
+            index.upsert(notice_id, embedding)
+        batch.clear()
+        print(f"  {len(index)} notices | {len(index) / (time.perf_counter() - started):.1f} notices/s")
+
+    # Bodies are fetched one batch at a time, alongside the embedding call
+    for notices_batch in iter(lambda: attach_bodies(itertools.islice(notices, args.batch_size)), []):
+        batch.extend((str(notice.id), classification_text(notice)) for notice in notices_batch)
+        flush()
+
+    publish_version(root, version)
+    remove_old_versions(root, keep={version, previous})
+    print(f"✅ Indexed {len(index)} notices into {index.directory}; restart the API to use it")
+
+
+if __name__ == "__main__":
+    main()
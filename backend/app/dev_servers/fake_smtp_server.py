@@ -0,0 +1,136 @@
+# Local stand-in for the SMTP relay, for load tests and offline development.
+#
+#   python -m dev_servers.fake_smtp_server --port 2525 --latency-ms 20 --error-rate 0.01
+#
+# Point delivery at it with:
+#   SMTP_SERVER=127.0.0.1 SMTP_PORT=2525 SMTP_USE_TLS=false
+#
+# Speaks enough SMTP for smtplib (EHLO/HELO, AUTH, MAIL, RCPT, DATA, RSET, NOOP,
+# QUIT). Messages are counted, not stored. Every accepted recipient is recorded
+# with the time the message was accepted so callers can compute per-recipient
+# latency.
+import argparse
+import random
+import socketserver
+import threading
+import time
+
+
+class SMTPStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.rejected = 0
+        self.accepted = {}  # recipient -> perf_counter() when the message was accepted
+
+    def reset(self):
+        with self.lock:
+            self.messages = 0
+            self.rejected = 0
+            self.accepted = {}
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"messages": self.messages, "rejected": self.rejected, "recipients": len(self.accepted)}
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        self.reply("220 fake-smtp ready")
+        recipients = []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            command = line[:4].upper()
+
+            if command == "EHLO":
+                self.reply("250-fake-smtp")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif command == "HELO":
+                self.reply("250 fake-smtp")
+            elif command == "AUTH":
+                parts = line.split()
+                if len(parts) == 2 and parts[1].upper() == "LOGIN":
+                    # Username and password prompts; any credentials are accepted
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self.reply("235 2.7.0 Authentication successful")
+            elif command == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                address = line.split(":", 1)[1].strip().strip("<>") if ":" in line else ""
+                recipients.append(address)
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                if server.latency:
+                    time.sleep(server.latency)
+                if random.random() < server.error_rate:
+                    with server.stats.lock:
+                        server.stats.rejected += 1
+                    self.reply("451 4.3.0 Simulated temporary failure")
+                else:
+                    now = time.perf_counter()
+                    with server.stats.lock:
+                        server.stats.messages += 1
+                        for address in recipients:
+                            server.stats.accepted[address] = now
+                    self.reply("250 OK queued")
+                recipients = []
+            elif command == "RSET":
+                recipients = []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 2525, latency_ms: float = 0.0, error_rate: float = 0.0):
+        super().__init__((host, port), SMTPHandler)
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.stats = SMTPStats()
+
+    def start_background(self) -> "FakeSMTPServer":
+        threading.Thread(target=self.serve_forever, name="fake-smtp", daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake SMTP server for delivery testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before each message is accepted")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of messages rejected with a 451")
+    args = parser.parse_args()
+
+    server = FakeSMTPServer(args.host, args.port, args.latency_ms, args.error_rate)
+    print(f"📮 Fake SMTP server listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Stopped. {server.stats.snapshot()}")
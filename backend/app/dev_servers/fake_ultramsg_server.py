@@ -0,0 +1,119 @@
+# Local stand-in for the UltraMsg WhatsApp HTTP API, for load tests and offline
+# development.
+#
+#   python -m dev_servers.fake_ultramsg_server --port 8081 --latency-ms 50 --error-rate 0.02
+#
+# Point delivery at it with:
+#   ULTRAMSG_API_URL=http://127.0.0.1:8081
+#
+# Accepts POST /<instance>/messages/<chat|image|document> and answers like the
+# real API: {"sent": "true", ...} on success, {"error": "..."} on a simulated
+# failure (half of them as HTTP 500s, half as 200s with an error body, both of
+# which the real service produces). Keep-alive (HTTP/1.1) is supported.
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class UltraMsgStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.accepted = {}  # recipient -> perf_counter() when the message was accepted
+
+    def reset(self):
+        with self.lock:
+            self.sent = 0
+            self.failed = 0
+            self.accepted = {}
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"sent": self.sent, "failed": self.failed, "recipients": len(self.accepted)}
+
+
+class UltraMsgHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Buffer each response into a single write; separate header/body segments
+    # stall keep-alive clients on delayed ACKs
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # Keep load tests quiet
+
+    def respond(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        parts = self.path.strip("/").split("/")
+
+        if len(parts) != 3 or parts[1] != "messages" or parts[2] not in ("chat", "image", "document"):
+            self.respond(404, {"error": "Not found"})
+            return
+        if not form.get("token") or not form.get("to"):
+            self.respond(200, {"error": "token and to are required"})
+            return
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if random.random() < server.error_rate:
+            with server.stats.lock:
+                server.stats.failed += 1
+            if random.random() < 0.5:
+                self.respond(500, {"error": "Simulated server error"})
+            else:
+                self.respond(200, {"error": "Simulated delivery failure"})
+            return
+
+        now = time.perf_counter()
+        with server.stats.lock:
+            server.stats.sent += 1
+            message_id = server.stats.sent
+            server.stats.accepted[form["to"][0]] = now
+        self.respond(200, {"sent": "true", "message": "ok", "id": message_id})
+
+
+class FakeUltraMsgServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081, latency_ms: float = 0.0, error_rate: float = 0.0):
+        super().__init__((host, port), UltraMsgHandler)
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.stats = UltraMsgStats()
+
+    def start_background(self) -> "FakeUltraMsgServer":
+        threading.Thread(target=self.serve_forever, name="fake-ultramsg", daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake UltraMsg API server for delivery testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before each request is answered")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    args = parser.parse_args()
+
+    server = FakeUltraMsgServer(args.host, args.port, args.latency_ms, args.error_rate)
+    print(f"💬 Fake UltraMsg server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Stopped. {server.stats.snapshot()}")
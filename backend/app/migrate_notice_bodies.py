@@ -0,0 +1,65 @@
+# Moves the HTML of notices saved before notice_bodies existed out of the
+# notices collection, and fills in their excerpt and word count.
+#
+#   python migrate_notice_bodies.py --batch-size 500
+#
+# Until a notice is migrated the API reads its inline content, so this can run
+# while the API is serving. It is safe to interrupt and re-run: only notices
+# that still hold inline content are read, an existing body (written by an
+# edit since) is never overwritten, and content is only removed from a notice
+# if it is still exactly what was copied.
+import argparse
+import datetime
+import time
+
+from pymongo import UpdateOne
+
+from app2 import Notice, NoticeBody
+from utils.notice_text import excerpt, plain_text, word_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move inline notice bodies into notice_bodies")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    notices = Notice._get_collection()
+    bodies = NoticeBody._get_collection()  # Also creates the notice_id index
+    query = {'content': {'$type': 'string'}}
+    remaining = notices.count_documents(query)
+    print(f"{remaining} notices to migrate")
+
+    started = time.perf_counter()
+    moved = 0
+    last_id = None
+    while True:
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        docs = list(notices.find(query, {'content': 1, 'version': 1}).sort('_id', 1).limit(args.batch_size))
+        if not docs:
+            break
+
+        now = datetime.datetime.now()
+        body_writes, notice_writes = [], []
+        for doc in docs:
+            notice_id = str(doc['_id'])
+            body_writes.append(UpdateOne({'notice_id': notice_id}, {'$setOnInsert': {
+                'notice_id': notice_id, 'content': doc['content'], 'version': doc.get('version', 1), 'updated_at': now
+            }}, upsert=True))
+            text = plain_text(doc['content'])
+            notice_writes.append(UpdateOne(
+                {'_id': doc['_id'], 'content': doc['content']},
+                {'$set': {'excerpt': excerpt(text), 'word_count': word_count(text)}, '$unset': {'content': ''}}
+            ))
+        # Bodies first: a notice never loses its content before the copy exists
+        bodies.bulk_write(body_writes, ordered=False)
+        moved += notices.bulk_write(notice_writes, ordered=False).modified_count
+
+        last_id = docs[-1]['_id']
+        print(f"  {moved}/{remaining} | {moved / (time.perf_counter() - started):.0f} notices/s")
+
+    print(f"✅ Moved {moved} notice bodies into {bodies.name}")
+
+
+if __name__ == "__main__":
+    main()
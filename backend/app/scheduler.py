@@ -0,0 +1,22 @@
+# Standalone scheduler process: promotes status='scheduled' notices when their
+# publish_at time arrives and triggers delivery, and flushes notice digests at
+# the end of each digest window.
+#
+#   python scheduler.py
+#
+# The API starts an in-process scheduler with the first request each worker
+# serves (see start_background_workers in app2.py). Run this instead, with
+# NOTICE_SCHEDULER_IN_PROCESS=false on the API, when notices must publish on
+# time while the API sees no traffic. Several copies can run side by side;
+# the atomic status flip in publish_scheduled_notice keeps delivery single.
+# Notices scheduled through the API are picked up within
+# SCHEDULER_RESYNC_SECONDS (15s by default).
+from app2 import notice_scheduler, digest_sender
+
+if __name__ == "__main__":
+    print("🗓️ Notice scheduler started.")
+    digest_sender.start()
+    try:
+        notice_scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("Notice scheduler stopped.")
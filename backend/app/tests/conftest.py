@@ -0,0 +1,64 @@
+# Tests run against an in-memory MongoDB (mongomock), so no server is needed:
+#
+#   cd backend/app
+#   pip install -r ../requirements-dev.txt
+#   python -m pytest -q
+import datetime
+import os
+import sys
+import tempfile
+
+import jwt
+import mongomock
+import pytest
+from mongoengine import connect, disconnect
+from mongoengine.connection import get_db
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('VECTOR_INDEX_DIR', tempfile.mkdtemp(prefix='search-index-'))
+
+import app2  # noqa: E402
+
+disconnect()
+connect('smart-notice-test', host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    yield
+    # Emptied rather than dropped, so the unique indexes stay in place
+    db = get_db()
+    for name in db.list_collection_names():
+        db[name].delete_many({})
+
+
+@pytest.fixture
+def client():
+    app2.app.config['TESTING'] = True
+    return app2.app.test_client()
+
+
+@pytest.fixture
+def admin():
+    return app2.User(name="Admin", email="admin@example.edu", password="x", role="admin").save()
+
+
+@pytest.fixture
+def auth(admin):
+    token = jwt.encode({'user_id': str(admin.id), 'exp': datetime.datetime.utcnow() + datetime.timedelta(minutes=15)},
+                       app2.app.config['SECRET_KEY'])
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    # Runs queued sends inline and records every email sent
+    emails = []
+
+    def send_bulk_email(recipient_emails, subject, body, attachments=None):
+        emails.append({'recipients': list(recipient_emails), 'subject': subject, 'body': body})
+        return True
+
+    monkeypatch.setattr(app2, 'send_bulk_email', send_bulk_email)
+    monkeypatch.setattr(app2.delivery_queue, 'submit', lambda lane, fn, *args: fn(*args))
+    return emails
@@ -0,0 +1,108 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from werkzeug.datastructures import Accept
+
+import app2
+from utils import compression
+from utils.compression import PrecompressedCache, choose_encoding, compress_stream, peek
+
+BODY = "<p>Exams start on Monday in the main hall.</p>" * 100
+
+
+def test_encoding_follows_accept_encoding_quality():
+    assert choose_encoding(Accept([('gzip', 1), ('deflate', 1)])) == 'gzip'
+    assert choose_encoding(Accept([('identity', 1)])) is None
+    assert choose_encoding(Accept([('gzip', 0)])) is None
+    assert choose_encoding(Accept([('*', 1)])) == compression.supported_encodings()[0]
+
+
+def test_brotli_is_preferred_when_installed():
+    pytest.importorskip('brotli')
+    assert choose_encoding(Accept([('gzip', 1), ('br', 1)])) == 'br'
+    assert choose_encoding(Accept([('gzip', 1), ('br', 0.5)])) == 'gzip'
+
+
+def test_streams_decompress_to_the_input_and_flush_every_chunk():
+    chunks = [b'[', b'{"a":1}', b',', b'{"b":2}', b']']
+    compressed = list(compress_stream(iter(chunks), 'gzip'))
+    assert gzip.decompress(b''.join(compressed)) == b''.join(chunks)
+    # Each input chunk can be decoded as soon as it arrives
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decoder.decompress(compressed[0]) == b'['
+
+
+def test_peek_keeps_every_chunk():
+    head, rest, ended = peek(iter([b'ab', b'cd', b'ef']), 3)
+    assert (head, ended) == ([b'ab', b'cd'], False)
+    assert list(rest) == [b'ef']
+    assert peek(iter([b'a']), 3)[2] is True
+
+
+def test_precompressed_bodies_are_evicted_least_recently_used_first():
+    body = BODY.encode()
+    size = sum(len(data) for data in PrecompressedCache().put('probe', body).values())
+    cache = PrecompressedCache(max_bytes=2 * size)
+    cache.put('a', body)
+    cache.put('b', body)
+    cache.get('a')
+    cache.put('c', body)
+    assert cache.get('b') is None and cache.get('a') is not None
+    assert gzip.decompress(cache.get('c')['gzip']) == body
+
+
+@pytest.fixture
+def notice(admin):
+    notice = app2.Notice(title="Exam", created_by=str(admin.id), status='published')
+    app2.set_notice_content(notice, BODY)
+    notice.save()
+    app2.write_notice_body(notice)
+    return notice
+
+
+def content(client, auth, notice, **headers):
+    return client.get(f'/api/notices/{notice.id}/content', headers={**auth, **headers})
+
+
+def test_notice_body_is_compressed_and_revalidated_by_version(client, auth, notice):
+    response = content(client, auth, notice, **{'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()).decode() == BODY
+    assert 'Accept-Encoding' in response.headers['Vary']
+    etag = response.headers['ETag']
+    assert etag == f'"{notice.id}-v1"'
+
+    assert content(client, auth, notice, **{'If-None-Match': etag}).status_code == 304
+    app2.Notice.objects(id=notice.id).update(set__version=2)
+    response = content(client, auth, notice, **{'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] == f'"{notice.id}-v2"'
+    assert 'Content-Encoding' not in response.headers and response.get_data(as_text=True) == BODY
+
+
+def test_large_json_is_compressed_with_a_weak_etag(client, auth, notice):
+    response = client.get(f'/api/notices/{notice.id}', headers={**auth, 'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data()))["content"] == BODY
+
+    response = client.get('/api/notices', headers={**auth, 'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers  # Below COMPRESSION_MIN_BYTES
+
+
+def test_compressed_etags_are_weak_and_still_revalidate(client, auth, monkeypatch):
+    monkeypatch.setattr(app2, 'taxonomy_cache', app2.EtagCache(lambda: {"departments": [{"name": "CSE"}] * 200}))
+    response = client.get('/api/taxonomy', headers={**auth, 'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].startswith('W/')
+    revalidated = client.get('/api/taxonomy', headers={**auth, 'Accept-Encoding': 'gzip',
+                                                       'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_streamed_lists_are_compressed_as_they_stream(client, auth, admin, monkeypatch):
+    monkeypatch.setattr(app2, 'COMPRESSION_MIN_BYTES', 10)
+    response = client.get('/api/users', headers={**auth, 'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'admin@example.edu' in gzip.decompress(response.get_data())
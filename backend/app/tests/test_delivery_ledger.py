@@ -0,0 +1,146 @@
+import datetime
+
+import app2
+from utils.delivery_ledger import (
+    ClaimOwner, DeliveryRecord, beat, claim_deliveries, delivery_key, mark_delivered, release_deliveries,
+    stale_claims
+)
+
+
+def age_claims(seconds, owner_alive=False):
+    # Claims made `seconds` ago by a process that stopped then, unless it is
+    # still beating
+    ago = datetime.datetime.utcnow() - datetime.timedelta(seconds=seconds)
+    DeliveryRecord.objects(state='claimed').update(set__claimed_at=ago)
+    if owner_alive:
+        beat()
+    else:
+        ClaimOwner.objects.update(set__seen_at=ago)
+
+
+def test_claim_returns_only_new_recipients():
+    assert claim_deliveries('n1', 1, 'email', ['a@x.edu', 'b@x.edu']) == ['a@x.edu', 'b@x.edu']
+    assert claim_deliveries('n1', 1, 'email', [' A@x.edu ', 'c@x.edu', 'c@x.edu', '']) == ['c@x.edu']
+    # Another version or channel is a separate delivery
+    assert claim_deliveries('n1', 2, 'email', ['a@x.edu']) == ['a@x.edu']
+    assert claim_deliveries('n1', 1, 'whatsapp', ['a@x.edu']) == ['a@x.edu']
+
+
+def test_released_claims_can_be_claimed_again():
+    claim_deliveries('n1', 1, 'email', ['a@x.edu', 'b@x.edu'])
+    release_deliveries('n1', 1, 'email', ['a@x.edu'])
+    assert claim_deliveries('n1', 1, 'email', ['a@x.edu', 'b@x.edu']) == ['a@x.edu']
+
+
+def test_stale_claims_are_taken_over_once():
+    claim_deliveries('n1', 1, 'email', ['a@x.edu', 'b@x.edu'])
+    mark_delivered('n1', 1, 'email', ['b@x.edu'])
+    age_claims(7200)
+
+    assert list(stale_claims(3600)) == [('n1', 1, 'email', ['a@x.edu'])]
+    # Sent recipients are never re-claimed, lost ones are, by one claimer only
+    assert claim_deliveries('n1', 1, 'email', ['a@x.edu', 'b@x.edu'], timeout_seconds=3600) == ['a@x.edu']
+    assert claim_deliveries('n1', 1, 'email', ['a@x.edu', 'b@x.edu'], timeout_seconds=3600) == []
+    assert list(stale_claims(3600)) == []
+
+
+def test_fresh_claims_are_not_stale():
+    claim_deliveries('n1', 1, 'email', ['a@x.edu'])
+    assert list(stale_claims(3600)) == []
+    assert claim_deliveries('n1', 1, 'email', ['a@x.edu'], timeout_seconds=3600) == []
+
+
+def test_claims_of_a_live_process_are_never_stale():
+    claim_deliveries('n1', 1, 'email', ['a@x.edu'])
+    age_claims(7200, owner_alive=True)
+    assert list(stale_claims(3600)) == []
+    assert claim_deliveries('n1', 1, 'email', ['a@x.edu'], timeout_seconds=3600) == []
+
+    ClaimOwner.objects.delete()  # The process went away without a trace
+    assert list(stale_claims(3600)) == [('n1', 1, 'email', ['a@x.edu'])]
+
+
+def test_claims_without_an_owner_expire_by_age():
+    claim_deliveries('n1', 1, 'email', ['a@x.edu'])
+    DeliveryRecord.objects.update(unset__owner=True)
+    age_claims(7200, owner_alive=True)
+    assert list(stale_claims(3600)) == [('n1', 1, 'email', ['a@x.edu'])]
+
+
+def test_records_without_state_count_as_sent():
+    DeliveryRecord(key=delivery_key('n1', 1, 'a@x.edu', 'email'), notice_id='n1', version=1,
+                   recipient='a@x.edu', channel='email',
+                   created_at=datetime.datetime.utcnow() - datetime.timedelta(days=1)).save()
+    assert claim_deliveries('n1', 1, 'email', ['a@x.edu'], timeout_seconds=0) == []
+    assert list(stale_claims(0)) == []
+
+
+def published_notice(**fields):
+    notice = app2.Notice(title="Exam", subject="Schedule", created_by="u", status='published',
+                         send_options={"email": True}, **fields)
+    app2.set_notice_content(notice, "<p>Exams start on Monday</p>")
+    notice.save()
+    app2.write_notice_body(notice)
+    return notice
+
+
+def test_successful_send_marks_claims_sent(sent):
+    notice = published_notice(recipient_emails=['a@x.edu', 'b@x.edu'])
+    assert app2.deliver_notice(notice) == 2
+    assert sent[0]['recipients'] == ['a@x.edu', 'b@x.edu']
+    assert set(DeliveryRecord.objects.distinct('state')) == {'sent'}
+    # Saving again sends nothing
+    assert app2.deliver_notice(notice) == 0
+    assert len(sent) == 1
+
+
+def test_failed_send_releases_claims(sent, monkeypatch):
+    monkeypatch.setattr(app2, 'send_bulk_email', lambda **kwargs: False)
+    notice = published_notice(recipient_emails=['a@x.edu'])
+    app2.deliver_notice(notice)
+    assert DeliveryRecord.objects.count() == 0
+
+
+def test_lost_sends_are_redelivered(sent, monkeypatch):
+    notice = published_notice(recipient_emails=['a@x.edu', 'b@x.edu'])
+    # The process stops after claiming, with the sends still queued in memory
+    monkeypatch.setattr(app2.delivery_queue, 'submit', lambda lane, fn, *args: None)
+    app2.deliver_notice(notice)
+    monkeypatch.setattr(app2.delivery_queue, 'submit', lambda lane, fn, *args: fn(*args))
+
+    app2.redeliver_stale_claims()
+    assert sent == []  # Not expired yet
+
+    age_claims(app2.DELIVERY_CLAIM_TIMEOUT + 60)
+    app2.redeliver_stale_claims()
+    assert [email['recipients'] for email in sent] == [['a@x.edu', 'b@x.edu']]
+    assert set(DeliveryRecord.objects.distinct('state')) == {'sent'}
+
+
+def test_sends_queued_past_the_timeout_are_not_redelivered(sent, monkeypatch):
+    notice = published_notice(recipient_emails=['a@x.edu'])
+    # A backed-up lane: the send is still queued in a process that is alive
+    queued = []
+    monkeypatch.setattr(app2.delivery_queue, 'submit', lambda lane, fn, *args: queued.append((fn, args)))
+    app2.deliver_notice(notice)
+    age_claims(app2.DELIVERY_CLAIM_TIMEOUT + 60, owner_alive=True)
+
+    app2.redeliver_stale_claims()
+    assert len(queued) == 1
+
+    fn, args = queued[0]
+    fn(*args)
+    assert [email['recipients'] for email in sent] == [['a@x.edu']]
+    assert set(DeliveryRecord.objects.distinct('state')) == {'sent'}
+
+
+def test_lost_sends_of_an_edited_notice_are_dropped(sent, monkeypatch):
+    notice = published_notice(recipient_emails=['a@x.edu'])
+    monkeypatch.setattr(app2.delivery_queue, 'submit', lambda lane, fn, *args: None)
+    app2.deliver_notice(notice)
+    app2.Notice.objects(id=notice.id).update(set__version=2)
+
+    age_claims(app2.DELIVERY_CLAIM_TIMEOUT + 60)
+    app2.redeliver_stale_claims()
+    assert sent == []
+    assert DeliveryRecord.objects.count() == 0
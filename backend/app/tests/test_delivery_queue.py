@@ -0,0 +1,38 @@
+import threading
+from collections import Counter
+
+from utils.delivery_queue import DeliveryQueue
+
+
+def test_lanes_are_picked_by_weight():
+    queue = DeliveryQueue(workers=1, reserved_workers=0)
+    for lane in queue._lanes:
+        queue._lanes[lane].extend([None] * 100)
+
+    picks = [queue._pick_lane(("Highly Urgent", "Urgent", "Normal")) for _ in range(13)]
+    assert Counter(picks) == {"Highly Urgent": 8, "Urgent": 4, "Normal": 1}
+    # Smooth round-robin interleaves lanes instead of draining one at a time
+    assert picks[:3] != ["Highly Urgent"] * 3
+
+
+def test_empty_lanes_are_skipped():
+    queue = DeliveryQueue(workers=1, reserved_workers=0)
+    queue._lanes["Normal"].append(None)
+    assert [queue._pick_lane(("Highly Urgent", "Urgent", "Normal")) for _ in range(3)] == ["Normal"] * 3
+    assert queue._pick_lane(("Highly Urgent", "Urgent")) is None
+
+
+def test_jobs_returning_false_count_as_failed():
+    queue = DeliveryQueue(workers=1, reserved_workers=0)
+    done = threading.Event()
+    queue.submit("Normal", lambda: False)
+    queue.submit("Normal", lambda: None)
+    queue.submit("Normal", done.set)
+    assert done.wait(5)
+
+    for _ in range(100):
+        lane = queue.metrics()["lanes"]["Normal"]
+        if lane["completed"] + lane["failed"] == 3:
+            break
+        threading.Event().wait(0.01)
+    assert (lane["completed"], lane["failed"]) == (2, 1)
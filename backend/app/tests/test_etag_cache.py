@@ -0,0 +1,64 @@
+import threading
+
+import app2
+from utils.etag_cache import EtagCache
+
+
+def counting_cache(value, **kwargs):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return value
+
+    return EtagCache(build, **kwargs), builds
+
+
+def test_body_is_built_once_until_invalidated():
+    cache, builds = counting_cache({"departments": []})
+    body, etag = cache.get()
+    assert body == b'{"departments":[]}'
+    assert cache.get() == (body, etag) and len(builds) == 1
+    cache.invalidate()
+    assert cache.get() == (body, etag)  # Same data, same ETag
+    assert len(builds) == 2
+
+
+def test_entries_expire_after_max_age():
+    cache, builds = counting_cache([1], max_age_seconds=0)
+    cache.get()
+    cache.get()
+    assert len(builds) == 2
+
+
+def test_builds_started_before_an_invalidate_are_not_cached():
+    started, release = threading.Event(), threading.Event()
+    values = iter([["old"], ["new"]])
+
+    def build():
+        started.set()
+        release.wait(5)
+        return next(values)
+
+    cache = EtagCache(build)
+    result = []
+    worker = threading.Thread(target=lambda: result.append(cache.get()))
+    worker.start()
+    assert started.wait(5)
+    cache.invalidate()
+    release.set()
+    worker.join(5)
+    assert result[0][0] == b'["old"]'
+    assert cache.get()[0] == b'["new"]'
+
+
+def test_taxonomy_is_revalidated_with_its_etag(client, auth, monkeypatch):
+    monkeypatch.setattr(app2, 'taxonomy_cache', EtagCache(lambda: {"departments": [{"name": "CSE"}]}))
+    response = client.get('/api/taxonomy', headers=auth)
+    assert response.status_code == 200
+    assert response.get_json() == {"departments": [{"name": "CSE"}]}
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    etag = response.headers['ETag']
+    assert client.get('/api/taxonomy', headers={**auth, 'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/taxonomy', headers={**auth, 'If-None-Match': '"stale"'}).status_code == 200
@@ -0,0 +1,50 @@
+import app2
+from utils.id_cache import IdCache
+
+
+def recording_loader(values):
+    calls = []
+
+    def load_many(ids):
+        calls.append(sorted(ids))
+        return {item_id: values[item_id] for item_id in ids if item_id in values}
+
+    return load_many, calls
+
+
+def test_missing_ids_load_in_one_call_and_unknown_ids_are_cached():
+    cache = IdCache()
+    load_many, calls = recording_loader({"a": 1, "b": 2})
+    assert cache.get_many(["a", "b", "a", "ghost"], load_many) == {"a": 1, "b": 2, "ghost": None}
+    assert cache.get_many(["a", "ghost"], load_many) == {"a": 1, "ghost": None}
+    assert calls == [["a", "b", "ghost"]]
+
+
+def test_least_recently_used_ids_are_evicted_and_invalidated_ids_reloaded():
+    cache = IdCache(max_items=2)
+    load_many, calls = recording_loader({"a": 1, "b": 2, "c": 3})
+    cache.get_many(["a"], load_many)
+    cache.get_many(["b"], load_many)
+    cache.get_many(["a"], load_many)  # "b" is now the oldest
+    cache.get_many(["c"], load_many)
+    cache.get_many(["a", "b"], load_many)
+    assert calls[-1] == ["b"]
+
+    cache.invalidate("a")
+    cache.get_many(["a"], load_many)
+    assert calls[-1] == ["a"]
+
+
+def test_legacy_notices_resolve_their_creator_and_renames_reach_every_notice(client, auth, admin):
+    legacy = app2.Notice(title="Old", created_by=str(admin.id), status='published', excerpt="", word_count=0)
+    legacy.save()
+    app2.Notice.objects(id=legacy.id).update(unset__creator_name=1, unset__creator_email=1)
+    app2.Notice(title="New", created_by=str(admin.id), status='published', creator_name="Admin",
+                creator_email="admin@example.edu", excerpt="", word_count=0).save()
+
+    creators = {n["title"]: n["createdBy"]["name"] for n in client.get('/api/notices', headers=auth).get_json()}
+    assert creators == {"Old": "Admin", "New": "Admin"}
+
+    client.put(f'/api/users/{admin.id}', json={"name": "Registrar"}, headers=auth)
+    creators = {n["title"]: n["createdBy"]["name"] for n in client.get('/api/notices', headers=auth).get_json()}
+    assert creators == {"Old": "Registrar", "New": "Registrar"}
@@ -0,0 +1,170 @@
+import json
+import threading
+
+import pytest
+import requests
+
+import app2
+from utils.inference_client import CircuitBreaker, InferenceClient
+
+CATEGORY = {"predictions": [{"label": "Examination", "confidence": 0.91}], "modelVersion": "v1"}
+ALL = {"category": [{"label": "Examination", "confidence": 0.91}],
+       "priority": {"label": "Urgent", "confidence": 0.8}, "modelVersion": "v1"}
+NO_HEAD = {"error": "No priority head installed", "priorityHead": False}
+
+
+def response(status, body):
+    result = requests.Response()
+    result.status_code = status
+    result._content = (body if isinstance(body, str) else json.dumps(body)).encode()
+    return result
+
+
+def client_answering(routes, **kwargs):
+    # routes maps a path to (status, body); every call is recorded
+    client = InferenceClient("http://ai", **kwargs)
+    calls = []
+
+    def post(url, json, timeout):
+        path = url[len("http://ai"):]
+        calls.append(path)
+        if path not in routes:
+            raise requests.ConnectionError("refused")
+        return response(*routes[path])
+
+    client.session.post = post
+    return client, calls
+
+
+def test_category_only_calls_use_predict():
+    client, calls = client_answering({"/predict": (200, CATEGORY)})
+    result = client.classify("Exam on Monday")
+    assert calls == ["/predict"]
+    assert (result["status"], result["category"], result["priority"]) == ("classified", "Examination", None)
+
+
+def test_priority_comes_from_predict_all():
+    client, calls = client_answering({"/predict/all": (200, ALL)})
+    result = client.classify("Exam on Monday", priority=True)
+    assert calls == ["/predict/all"]
+    assert (result["category"], result["priority"], result["priorityConfidence"]) == ("Examination", "Urgent", 0.8)
+
+
+def test_embedding_comes_back_with_the_priority():
+    client, calls = client_answering({"/predict/all": (200, {**ALL, "embedding": [0.6, 0.8]})})
+    assert client.classify("Exam", priority=True, embed=True)["embedding"] == [0.6, 0.8]
+    client, _ = client_answering({"/predict/all": (200, ALL)})
+    assert client.classify("Exam", priority=True, embed=True)["status"] == "unclassified"
+    client, _ = client_answering({"/predict/all": (503, NO_HEAD), "/predict": (200, CATEGORY)})
+    assert "embedding" not in client.classify("Exam", priority=True, embed=True)
+
+
+def test_missing_priority_head_falls_back_to_the_category():
+    client, calls = client_answering({"/predict/all": (503, NO_HEAD), "/predict": (200, CATEGORY)})
+    result = client.classify("Exam on Monday", priority=True)
+    assert calls == ["/predict/all", "/predict"]
+    assert (result["status"], result["category"], result["priority"]) == ("classified", "Examination", None)
+    assert client.breaker.state() == "closed"
+
+
+@pytest.mark.parametrize("body", [
+    [], "null", {"predictions": None}, {"predictions": []}, {"predictions": "Exam"},
+    {"predictions": [{"label": 3, "confidence": 0.9}]}, {"predictions": [{"label": "Exam", "confidence": "high"}]},
+])
+def test_malformed_bodies_are_unclassified(body):
+    client, _ = client_answering({"/predict": (200, body)})
+    assert client.classify("Exam")["status"] == "unclassified"
+    assert client.metrics()["failed"] == 1
+
+
+def test_malformed_priority_is_unclassified():
+    client, _ = client_answering({"/predict/all": (200, {**ALL, "priority": ["Urgent"]})})
+    assert client.classify("Exam", priority=True)["status"] == "unclassified"
+
+
+def test_malformed_embeddings_are_none():
+    client, _ = client_answering({"/embed": (200, {"embeddings": [[0.1], None]})})
+    assert client.embed(["a", "b"]) is None
+    client, _ = client_answering({"/embed": (200, {"embeddings": [[0.6, 0.8]]})})
+    assert client.embed(["a"]) == [[0.6, 0.8]]
+
+
+def test_circuit_opens_after_repeated_failures():
+    client, calls = client_answering({}, failure_threshold=2, reset_seconds=60)
+    assert [client.classify(f"notice {i}")["status"] for i in range(3)] == ["unclassified"] * 3
+    assert len(calls) == 2  # The third call never reached the service
+    assert client.metrics()["shortCircuited"] == 1 and client.breaker.state() == "open"
+
+
+def test_half_open_circuit_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow() is True
+    assert breaker.allow() is False  # The trial is still running
+    breaker.record_success()
+    assert breaker.state() == "closed" and breaker.allow() is True
+
+
+def test_concurrent_calls_for_one_text_share_a_request():
+    client = InferenceClient("http://ai")
+    entered, release, calls = threading.Event(), threading.Event(), []
+
+    def post(url, json, timeout):
+        calls.append(url)
+        entered.set()
+        release.wait(5)
+        return response(200, CATEGORY)
+
+    client.session.post = post
+    results = []
+    leader = threading.Thread(target=lambda: results.append(client.classify("Exam", timeout=5)))
+    leader.start()
+    assert entered.wait(5)
+    follower = threading.Thread(target=lambda: results.append(client.classify("Exam", timeout=5)))
+    follower.start()
+    for _ in range(100):
+        if client.metrics()["coalesced"]:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert [result["category"] for result in results] == ["Examination", "Examination"]
+
+
+def test_followers_get_the_result_when_the_leader_fails():
+    client = InferenceClient("http://ai")
+    entered, release = threading.Event(), threading.Event()
+
+    def post(url, json, timeout):
+        entered.set()
+        release.wait(5)
+        raise RuntimeError("connection pool is closed")  # Not a requests error
+
+    client.session.post = post
+    results = []
+    leader = threading.Thread(target=lambda: results.append(client.classify("Exam", timeout=30)))
+    leader.start()
+    assert entered.wait(5)
+    follower = threading.Thread(target=lambda: results.append(client.classify("Exam", timeout=30)))
+    follower.start()
+    for _ in range(100):
+        if client.metrics()["coalesced"]:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert not follower.is_alive()  # Well before its 30s deadline
+    assert [result["status"] for result in results] == ["unclassified", "unclassified"]
+    assert client.metrics()["failed"] == 1
+
+
+def test_classify_endpoint_requires_a_token(client, auth, monkeypatch):
+    monkeypatch.setattr(app2.inference_client, 'classify', lambda text: {"status": "classified", "category": "Events"})
+    assert client.post('/api/classify', json={"text": "Fest"}).status_code == 401
+    response = client.post('/api/classify', json={"text": "Fest"}, headers=auth)
+    assert response.get_json()["category"] == "Events"
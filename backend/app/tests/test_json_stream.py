@@ -0,0 +1,56 @@
+import datetime
+import json
+
+import pytest
+
+import app2
+from utils.json_stream import array_chunks, object_chunks, primed
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 16, 64 * 1024])
+def test_chunks_join_into_the_same_json_as_the_list(chunk_bytes):
+    items = [{"id": i, "title": f"Notice {i}", "when": datetime.date(2026, 1, 1)} for i in range(50)]
+    chunks = list(array_chunks(items, chunk_bytes))
+    assert json.loads(b''.join(chunks)) == json.loads(json.dumps(items, default=str))
+    # The first item alone, then chunks of about chunk_bytes
+    assert len(chunks) == (2 if chunk_bytes == 64 * 1024 else len(items) + 1)
+    assert json.loads(b''.join(array_chunks([]))) == []
+
+
+def test_the_first_item_is_yielded_without_waiting_for_a_full_chunk():
+    def rows():
+        yield {"n": 0}
+        raise AssertionError("read past the first row")
+
+    assert next(array_chunks(rows())) == b'[{"n":0}'
+
+
+def test_trailer_reports_totals_counted_while_streaming():
+    seen = []
+
+    def rows():
+        for i in range(3):
+            seen.append(i)
+            yield {"n": i}
+
+    body = b''.join(object_chunks("reads", rows(), lambda: {"total": len(seen)}, chunk_bytes=4))
+    assert json.loads(body) == {"reads": [{"n": 0}, {"n": 1}, {"n": 2}], "total": 3}
+
+
+def test_query_errors_raise_before_the_response_starts():
+    def failing():
+        raise RuntimeError("query failed")
+        yield
+
+    with pytest.raises(RuntimeError):
+        primed(array_chunks(failing()))
+
+
+def test_list_endpoints_stream_valid_json(client, auth, admin):
+    for i in range(3):
+        app2.User(name=f"User {i}", email=f"u{i}@example.edu", password="x", role="user").save()
+    response = client.get('/api/users', headers=auth)
+    assert response.status_code == 200 and response.is_streamed
+    assert sorted(user["email"] for user in response.get_json()) == [
+        "admin@example.edu", "u0@example.edu", "u1@example.edu", "u2@example.edu"
+    ]
@@ -0,0 +1,74 @@
+import sys
+
+import pytest
+from mongomock.collection import BulkOperationBuilder
+
+import app2
+import migrate_notice_bodies
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['migrate_notice_bodies.py', '--batch-size', '1'])
+
+
+@pytest.fixture(autouse=True)
+def bulk_update_sort(monkeypatch):
+    # pymongo >= 4.11 passes UpdateOne's sort to the bulk builder, which
+    # mongomock does not accept yet; the script never sets it
+    add_update = BulkOperationBuilder.add_update
+
+    def without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    monkeypatch.setattr(BulkOperationBuilder, 'add_update', without_sort)
+
+
+def legacy_notice(content, **fields):
+    # As saved before notice_bodies existed: inline content, no excerpt
+    doc = {'title': "Exam", 'created_by': "u", 'status': 'published', 'content': content, 'version': 1, **fields}
+    return str(app2.Notice._get_collection().insert_one(doc).inserted_id)
+
+
+def raw(notice_id):
+    return app2.Notice.objects(id=notice_id).as_pymongo().first()
+
+
+def test_inline_bodies_move_to_notice_bodies(client, auth):
+    first = legacy_notice("<p>Exams start on Monday</p>")
+    second = legacy_notice("<p>Fest &amp; fair</p>", version=3)
+    migrate_notice_bodies.main()
+
+    assert 'content' not in raw(first)
+    assert (raw(first)['excerpt'], raw(first)['word_count']) == ("Exams start on Monday", 4)
+    body = app2.NoticeBody.objects.get(notice_id=second)
+    assert (body.content, body.version) == ("<p>Fest &amp; fair</p>", 3)
+    assert client.get(f'/api/notices/{first}', headers=auth).get_json()["content"] == "<p>Exams start on Monday</p>"
+
+    # Nothing is left to do on a second run
+    migrate_notice_bodies.main()
+    assert app2.NoticeBody.objects.count() == 2
+
+
+def test_bodies_written_since_are_not_overwritten():
+    notice_id = legacy_notice("<p>Old text</p>")
+    app2.NoticeBody(notice_id=notice_id, content="<p>Edited text</p>", version=2).save()
+    migrate_notice_bodies.main()
+    assert app2.NoticeBody.objects.get(notice_id=notice_id).content == "<p>Edited text</p>"
+
+
+def test_content_changed_during_the_copy_stays_on_the_notice(monkeypatch):
+    notice_id = legacy_notice("<p>Old text</p>")
+    bodies = app2.NoticeBody._get_collection()
+
+    class EditDuringCopy:
+        name = bodies.name
+
+        def bulk_write(self, requests, ordered):
+            app2.Notice.objects(id=notice_id).update(set__content="<p>New text</p>")
+            return bodies.bulk_write(requests, ordered=ordered)
+
+    monkeypatch.setattr(app2.NoticeBody, '_get_collection', classmethod(lambda cls: EditDuringCopy()))
+    migrate_notice_bodies.main()
+    assert raw(notice_id)['content'] == "<p>New text</p>"
+    assert 'excerpt' not in raw(notice_id)
@@ -0,0 +1,94 @@
+import datetime
+import threading
+
+import pytest
+
+import app2
+from utils.near_duplicate import NearDuplicateIndex
+
+NOW = datetime.datetime.now()
+EXAM = "Mid-semester examinations for all second year students begin on Monday in the main hall at ten"
+EXAM_EDITED = "Mid-semester examinations for all second year students begin on Monday in the main hall at ten sharp"
+FEST = "The annual cultural fest registrations are open until Friday evening for every department"
+
+
+def ago(days):
+    return NOW - datetime.timedelta(days=days)
+
+
+def test_near_identical_texts_match_and_unrelated_ones_do_not():
+    index = NearDuplicateIndex()
+    index.add('exam', index.signature(EXAM), NOW)
+    index.add('fest', index.signature(FEST), NOW)
+    matches = index.query(index.signature(EXAM_EDITED), 0.8)
+    assert [item for item, _ in matches] == ['exam']
+    assert matches[0][1] >= 0.8
+    assert index.query(index.signature("!!"), 0.1) == []
+
+
+def test_oldest_notices_are_evicted_whatever_the_insertion_order():
+    index = NearDuplicateIndex(max_items=2)
+    # A live add first, then a background load of older notices
+    index.add('new', index.signature(EXAM), ago(1))
+    index.add('oldest', index.signature(FEST), ago(3))
+    index.add('older', index.signature(EXAM_EDITED), ago(2))
+    assert len(index) == 2
+    assert index.query(index.signature(FEST), 0.9) == []
+    assert {item for item, _ in index.query(index.signature(EXAM), 0.5)} == {'new', 'older'}
+
+
+def test_notices_past_the_window_are_evicted():
+    index = NearDuplicateIndex(window=datetime.timedelta(days=30))
+    index.add('stale', index.signature(EXAM), ago(31))
+    index.add('fresh', index.signature(FEST), ago(1))
+    assert len(index) == 1 and index.query(index.signature(EXAM), 0.5) == []
+
+
+def test_loads_keep_entries_added_meanwhile():
+    index = NearDuplicateIndex()
+    index.add('n1', index.signature(EXAM_EDITED), ago(1))
+    index.add('n1', index.signature(EXAM), ago(1), replace=False)
+    assert index.query(index.signature(EXAM_EDITED), 0.99)[0][0] == 'n1'
+    index.remove('n1')
+    assert len(index) == 0
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(app2, 'near_duplicate_index', NearDuplicateIndex())
+    monkeypatch.setattr(app2, 'near_duplicate_ready', threading.Event())
+    monkeypatch.setattr(app2, 'near_duplicate_loader', None)
+    monkeypatch.setattr(app2, 'queue_classification', lambda notice: None)
+
+
+def saved_notice(text, status='published'):
+    notice = app2.Notice(title="Exam", created_by="u", status=status)
+    app2.set_notice_content(notice, f"<p>{text}</p>")
+    notice.save()
+    app2.write_notice_body(notice)
+    return notice
+
+
+def create(client, auth, text, **form):
+    return client.post('/api/notices', data={"title": "Exam", "content": f"<p>{text}</p>", "status": "published",
+                                             **form}, headers=auth)
+
+
+def test_loaded_notices_are_found_by_create_notice(client, auth, sent, fresh_index):
+    original = saved_notice(EXAM)
+    saved_notice(FEST, status='draft')
+    assert app2.ensure_near_duplicate_index(timeout=5) is True
+    assert len(app2.near_duplicate_index) == 1
+
+    response = create(client, auth, EXAM_EDITED)
+    assert response.status_code == 409
+    assert response.get_json()["duplicates"][0]["id"] == str(original.id)
+    assert create(client, auth, EXAM_EDITED, duplicate_action='ignore').status_code == 201
+
+
+def test_check_is_skipped_until_the_index_has_loaded(client, auth, sent, fresh_index, monkeypatch):
+    saved_notice(EXAM)
+    monkeypatch.setattr(app2, 'ensure_near_duplicate_index', lambda timeout=None: False)
+    assert create(client, auth, EXAM_EDITED).status_code == 201
+    # The new notice is still indexed for later checks
+    assert len(app2.near_duplicate_index) == 1
@@ -0,0 +1,120 @@
+import datetime
+
+from werkzeug.security import generate_password_hash
+
+import app2
+from utils.delivery_ledger import DeliveryRecord
+from utils.notice_digest import (
+    DigestEntry, DigestSender, add_to_digest, digest_recipients, set_digest_preference, window_end_for
+)
+
+MORNING = datetime.datetime(2026, 3, 2, 9, 30)
+
+
+def test_windows_align_to_midnight():
+    assert window_end_for(MORNING) == datetime.datetime(2026, 3, 3)
+    assert window_end_for(MORNING, 60) == datetime.datetime(2026, 3, 2, 10, 0)
+    # A moment on a boundary belongs to the window that starts there
+    assert window_end_for(datetime.datetime(2026, 3, 2, 10, 0), 60) == datetime.datetime(2026, 3, 2, 11, 0)
+
+
+def collecting_sender(notices):
+    sends = []
+    sender = DigestSender(load_notices=lambda ids: {i: notices[i] for i in ids if i in notices},
+                          send=lambda batch_id, recipients, subject, body: sends.append((batch_id, sorted(recipients), body)))
+    return sender, sends
+
+
+def test_recipients_with_the_same_notices_share_one_digest():
+    notices = {n: {"title": n, "subject": "", "content": f"<p>{n}</p>"} for n in ("n1", "n2")}
+    add_to_digest("n1", ["a@x.edu", "b@x.edu", "c@x.edu"])
+    add_to_digest("n2", ["a@x.edu", "b@x.edu"])
+    sender, sends = collecting_sender(notices)
+
+    assert sender.flush_due(datetime.datetime.now()) == 0  # Window still open
+    assert sender.flush_due(datetime.datetime.now() + datetime.timedelta(days=1)) == 2
+    assert sorted(recipients for _, recipients, _ in sends) == [["a@x.edu", "b@x.edu"], ["c@x.edu"]]
+
+
+def test_stale_claims_are_flushed_again():
+    notices = {"n1": {"title": "n1", "subject": "", "content": ""}}
+    add_to_digest("n1", ["a@x.edu"])
+    later = datetime.datetime.now() + datetime.timedelta(days=1)
+    sender, sends = collecting_sender(notices)
+
+    sender.flush_due(later)  # Claimed, but never completed nor released
+    assert sender.flush_due(later + datetime.timedelta(minutes=5)) == 0
+    assert sender.flush_due(later + datetime.timedelta(hours=2)) == 1
+    assert len(sends) == 2 and sends[0][0] != sends[1][0]
+
+
+def test_sent_digests_are_removed_and_failed_ones_released(monkeypatch):
+    add_to_digest("n1", ["a@x.edu", "b@x.edu"])
+    DigestEntry.objects.update(set__batch_id="batch", set__claimed_at=datetime.datetime.now())
+
+    monkeypatch.setattr(app2, 'send_bulk_email', lambda recipient_emails, **kwargs: recipient_emails == ["a@x.edu"])
+    assert app2.send_digest_chunk("batch", ["a@x.edu"], "Digest", "<p></p>") is True
+    assert app2.send_digest_chunk("batch", ["b@x.edu"], "Digest", "<p></p>") is False
+    entry = DigestEntry.objects.get()
+    assert (entry.recipient, entry.batch_id, entry.claimed_at) == ("b@x.edu", None, None)
+
+
+def test_preferences_are_per_address():
+    set_digest_preference(" A@X.edu", True)
+    set_digest_preference("b@x.edu", True)
+    set_digest_preference("b@x.edu", False)
+    assert digest_recipients(["a@x.edu", "B@x.edu", "c@x.edu"]) == {"a@x.edu"}
+
+
+def notice(priority):
+    notice = app2.Notice(title="Trip", created_by="u", status='published', priority=priority,
+                         recipient_emails=['a@x.edu', 'b@x.edu'], send_options={"email": True})
+    app2.set_notice_content(notice, "<p>Trip</p>")
+    return notice.save()
+
+
+def test_opted_in_recipients_get_normal_notices_in_the_digest(sent):
+    set_digest_preference("a@x.edu", True)
+    normal = notice('Normal')
+    assert app2.deliver_notice(normal) == 2
+    assert [email['recipients'] for email in sent] == [['b@x.edu']]
+    assert [e.recipient for e in DigestEntry.objects] == ['a@x.edu']
+    assert DeliveryRecord.objects.get(channel='digest').state == 'sent'
+
+    sent.clear()
+    app2.deliver_notice(notice('Urgent'))
+    assert [email['recipients'] for email in sent] == [['a@x.edu', 'b@x.edu']]
+
+
+def test_users_set_their_own_preference(client, auth):
+    assert client.get('/api/me/digest', headers=auth).get_json() == {"digest": False}
+    assert client.put('/api/me/digest', json={"digest": "yes"}, headers=auth).status_code == 400
+    assert client.put('/api/me/digest', json={"digest": True}, headers=auth).status_code == 200
+    assert client.get('/api/me/digest', headers=auth).get_json() == {"digest": True}
+    assert digest_recipients(["admin@example.edu"]) == {"admin@example.edu"}
+
+
+def student_token(client):
+    app2.Student(univ_roll_no="2301", name="Asha", course="BTech", branch="CSE", official_email="Asha@x.edu",
+                 password=generate_password_hash("pw")).save()
+    response = client.post('/api/students/login', json={"univ_roll_no": "2301", "password": "pw"})
+    return {'Authorization': f"Bearer {response.get_json()['accessToken']}"}
+
+
+def test_students_opt_in_and_get_normal_notices_in_the_digest(client, sent):
+    headers = student_token(client)
+    assert client.get('/api/me/digest', headers=headers).get_json() == {"digest": False}
+    assert client.put('/api/me/digest', json={"digest": True}, headers=headers).status_code == 200
+    assert client.get('/api/me/digest', headers=headers).get_json() == {"digest": True}
+
+    notice = app2.Notice(title="Trip", created_by="u", status='published', priority='Normal',
+                         recipient_emails=['asha@x.edu', 'b@x.edu'], send_options={"email": True})
+    app2.set_notice_content(notice, "<p>Trip</p>")
+    notice.save()
+    app2.deliver_notice(notice)
+    assert [email['recipients'] for email in sent] == [['b@x.edu']]
+    assert [e.recipient for e in DigestEntry.objects] == ['asha@x.edu']
+
+
+def test_student_tokens_still_cannot_reach_staff_routes(client):
+    assert client.get('/api/notices', headers=student_token(client)).status_code == 401
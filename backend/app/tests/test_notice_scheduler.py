@@ -0,0 +1,130 @@
+import datetime
+import threading
+
+import pytest
+
+import app2
+from utils.delivery_ledger import DeliveryRecord
+from utils.notice_scheduler import NoticeScheduler
+
+NOW = datetime.datetime(2026, 1, 1, 9, 0)
+
+
+def scheduler():
+    return NoticeScheduler(load_pending=lambda: [], publish=lambda notice_id: True)
+
+
+def test_due_notices_pop_in_publish_order():
+    s = scheduler()
+    s.schedule('late', NOW + datetime.timedelta(minutes=5))
+    s.schedule('early', NOW - datetime.timedelta(minutes=5))
+    s.schedule('now', NOW)
+    assert s._pop_due(NOW) == ['early', 'now']
+    assert s.pending_count() == 1
+    assert s._pop_due(NOW + datetime.timedelta(hours=1)) == ['late']
+
+
+def test_cancelled_and_rescheduled_entries_are_skipped():
+    s = scheduler()
+    s.schedule('cancelled', NOW)
+    s.schedule('moved', NOW)
+    s.cancel('cancelled')
+    s.schedule('moved', NOW + datetime.timedelta(hours=1))
+    assert s._pop_due(NOW) == []
+    assert s._pop_due(NOW + datetime.timedelta(hours=1)) == ['moved']
+
+
+def test_resync_replaces_pending_and_runs_maintenance():
+    published, ran = [], threading.Event()
+    pending = [('a', datetime.datetime.now() - datetime.timedelta(seconds=1)), ('b', None)]
+    s = NoticeScheduler(load_pending=lambda: pending, publish=lambda notice_id: published.append(notice_id) or True,
+                        maintenance=ran.set)
+    s.start()
+    try:
+        assert ran.wait(5)
+        for _ in range(100):
+            if published:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        s.stop()
+    assert published == ['a']
+
+
+def test_notices_scheduled_elsewhere_are_picked_up_on_the_next_resync():
+    published, maintained, pending = [], [], []
+    loaded = threading.Event()
+
+    def load_pending():
+        loaded.set()
+        return list(pending)
+
+    s = NoticeScheduler(load_pending=load_pending, publish=lambda notice_id: published.append(notice_id) or True,
+                        resync_seconds=0.05, maintenance=lambda: maintained.append(1), maintenance_seconds=3600)
+    s.start()
+    try:
+        assert loaded.wait(5)
+        # Another process schedules a notice that is already due
+        pending.append(('elsewhere', datetime.datetime.now()))
+        for _ in range(100):
+            if published:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        s.stop()
+    assert published == ['elsewhere']
+    assert maintained == [1]  # On its own, longer interval
+
+
+def test_the_first_request_starts_the_scheduler(client, monkeypatch):
+    started = []
+    monkeypatch.setattr(app2.notice_scheduler, 'start', lambda: started.append('scheduler'))
+    monkeypatch.setattr(app2.digest_sender, 'start', lambda: started.append('digest'))
+    monkeypatch.setattr(app2.background_workers_started, 'is_set', lambda: bool(started))
+    monkeypatch.setitem(app2.app.config, 'TESTING', False)
+
+    client.get('/')
+    client.get('/')
+    assert started == ['scheduler', 'digest']
+
+
+def scheduled_notice(**fields):
+    notice = app2.Notice(title="Exam", created_by="u", status='scheduled', send_options={"email": True},
+                         publish_at=datetime.datetime.now() - datetime.timedelta(minutes=1), **fields)
+    app2.set_notice_content(notice, "<p>Exams</p>")
+    notice.save()
+    app2.write_notice_body(notice)
+    return notice
+
+
+def test_publish_delivers_then_flips_status_once(sent):
+    notice = scheduled_notice(recipient_emails=['a@x.edu'])
+    assert app2.publish_scheduled_notice(str(notice.id)) is True
+    assert app2.Notice.objects.get(id=notice.id).status == 'published'
+    assert [email['recipients'] for email in sent] == [['a@x.edu']]
+    assert app2.publish_scheduled_notice(str(notice.id)) is False
+    assert len(sent) == 1
+
+
+def test_notice_stays_scheduled_when_delivery_fails(sent, monkeypatch):
+    notice = scheduled_notice(recipient_emails=['a@x.edu'])
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("stopped")
+
+    monkeypatch.setattr(app2.delivery_queue, 'submit', crash)
+    with pytest.raises(RuntimeError):
+        app2.publish_scheduled_notice(str(notice.id))
+    assert app2.Notice.objects.get(id=notice.id).status == 'scheduled'
+
+    # The retry publishes it; the claimed recipient is left to redelivery
+    monkeypatch.setattr(app2.delivery_queue, 'submit', lambda lane, fn, *args: fn(*args))
+    assert app2.publish_scheduled_notice(str(notice.id)) is True
+    assert DeliveryRecord.objects.get().state == 'claimed'
+
+
+def test_future_notices_are_not_published(sent):
+    notice = scheduled_notice(recipient_emails=['a@x.edu'])
+    app2.Notice.objects(id=notice.id).update(set__publish_at=datetime.datetime.now() + datetime.timedelta(hours=1))
+    assert app2.publish_scheduled_notice(str(notice.id)) is False
+    assert sent == []
@@ -0,0 +1,44 @@
+import app2
+
+
+def never_load(name):
+    raise AssertionError("The local priority model must not be loaded")
+
+
+def test_priority_comes_from_the_service_by_default(client, monkeypatch):
+    assert app2.PRIORITY_MODEL_SOURCE == 'service'
+    monkeypatch.setattr(app2.model_registry, 'get', never_load)
+    monkeypatch.setattr(app2.inference_client, 'classify', lambda text, priority: {
+        "status": "classified", "category": "Examination", "priority": "Urgent", "priorityConfidence": 0.9
+    })
+
+    response = client.post('/api/predict-priority', json={"subject": "Exam", "body": "exam hall changed"})
+    assert response.get_json() == {"priority": "Urgent", "confidence": 0.9, "category": "Examination"}
+    assert client.post('/api/predict-priority', json={"subject": ""}).status_code == 400
+
+
+def test_without_a_priority_head_notices_are_normal_and_unclassified(client, monkeypatch):
+    monkeypatch.setattr(app2.model_registry, 'get', never_load)
+    monkeypatch.setattr(app2.inference_client, 'classify', lambda text, priority: {
+        "status": "classified", "category": "Examination", "priority": None, "priorityConfidence": None
+    })
+
+    response = client.post('/api/predict-priority', json={"subject": "Exam"})
+    assert response.status_code == 200
+    assert (response.get_json()["priority"], response.get_json()["status"]) == ("Normal", "unclassified")
+
+
+def test_unavailable_service_is_a_503(client, monkeypatch):
+    monkeypatch.setattr(app2.inference_client, 'classify', lambda text, priority: {
+        "status": "unclassified", "category": None, "priority": None, "reason": "down"
+    })
+    assert client.post('/api/predict-priority', json={"subject": "Exam"}).status_code == 503
+
+
+def test_local_model_is_an_explicit_opt_in(client, monkeypatch):
+    monkeypatch.setattr(app2, 'PRIORITY_MODEL_SOURCE', 'local')
+    monkeypatch.setattr(app2.model_registry, 'get', lambda name: 'model')
+    monkeypatch.setattr(app2, 'run_priority_model', lambda model, text: 'Urgent')
+
+    response = client.post('/api/predict-priority', json={"subject": "Exam"})
+    assert (response.status_code, response.get_json()) == (200, {"priority": "Urgent"})
@@ -0,0 +1,44 @@
+import datetime
+
+import app2
+from utils.notice_text import excerpt, plain_text
+from utils.serializers import NOTICE_LIST_FIELDS, classification_json, notice_list_json
+
+
+def test_missing_fields_fall_back_to_the_document_defaults():
+    doc = {'_id': 'n1', 'title': "Exam", 'created_by': 'u1', 'creator_name': "Admin"}
+    row = notice_list_json(doc, {})
+    assert (row["priority"], row["status"], row["specialization"], row["readCount"]) == ("Normal", "draft", "core", 0)
+    assert (row["departments"], row["publishAt"], row["classification"]) == ([], None, None)
+    assert row["createdBy"] == {"id": 'u1', "name": "Admin", "email": ""}
+
+
+def test_unmigrated_notices_get_their_excerpt_from_the_inline_content():
+    content = "<p>Exams &amp; results</p>" + "<p>word </p>" * 100
+    row = notice_list_json({'_id': 'n1', 'content': content, 'created_by': 'u1'}, {})
+    assert row["excerpt"] == excerpt(plain_text(content))
+    assert row["excerpt"].startswith("Exams & results word") and row["excerpt"].endswith("…")
+    assert row["wordCount"] == 103
+    # Unknown legacy creators are named, not dropped
+    assert row["createdBy"]["name"] == "Unknown"
+
+
+def test_classification_is_stale_once_the_text_changes():
+    doc = {'classified_at': datetime.datetime(2026, 1, 1), 'predicted_category': "Examination",
+           'content_hash': "h2", 'classified_hash': "h1"}
+    assert classification_json(doc)["stale"] is True
+    assert classification_json({**doc, 'classified_hash': "h2"})["stale"] is False
+
+
+def test_raw_rows_match_the_document_fields(admin):
+    notice = app2.Notice(title="Exam", subject="Schedule", created_by=str(admin.id), creator_name="Admin",
+                         creator_email="admin@example.edu", status='published', priority='Urgent', departments=['CSE'])
+    app2.set_notice_content(notice, "<p>Exams start on Monday</p>")
+    notice.save()
+
+    doc = app2.Notice.objects(id=notice.id).only(*NOTICE_LIST_FIELDS).as_pymongo().first()
+    row = notice_list_json(doc, {})
+    assert row["id"] == str(notice.id)
+    assert (row["title"], row["priority"], row["departments"]) == ("Exam", "Urgent", ["CSE"])
+    assert (row["excerpt"], row["wordCount"]) == ("Exams start on Monday", 4)
+    assert row["createdAt"] == app2.Notice.objects.get(id=notice.id).created_at.isoformat()
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+import app2
+
+
+@pytest.fixture(autouse=True)
+def no_classification(monkeypatch):
+    monkeypatch.setattr(app2, 'queue_classification', lambda notice: None)
+
+
+@pytest.fixture
+def notice(admin, sent):
+    notice = app2.Notice(title="Exam", subject="Schedule", created_by=str(admin.id), status='published',
+                         recipient_emails=['a@x.edu'], send_options={"email": True})
+    app2.set_notice_content(notice, "<p>Exams start on Monday</p>")
+    notice.save()
+    app2.write_notice_body(notice)
+    app2.deliver_notice(notice)
+    sent.clear()
+    return notice
+
+
+def update(client, auth, notice, **form):
+    if 'recipient_emails' in form:
+        form['recipient_emails'] = json.dumps(form['recipient_emails'])
+    return client.put(f"/api/notices/{notice.id}", data=form, headers=auth)
+
+
+def recipients(sent):
+    return sorted(r for email in sent for r in email['recipients'])
+
+
+def test_new_recipients_mode_only_emails_added_recipients(client, auth, notice, sent):
+    response = update(client, auth, notice, recipient_emails=['a@x.edu', 'b@x.edu'])
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 1
+    assert recipients(sent) == ['b@x.edu']
+
+
+def test_content_edit_bumps_version_without_resending(client, auth, notice, sent):
+    response = update(client, auth, notice, content="<p>Exams start on Tuesday</p>")
+    assert response.get_json()['version'] == 2
+    assert sent == []
+
+
+def test_all_mode_resends_to_everyone(client, auth, notice, sent):
+    response = update(client, auth, notice, recipient_emails=['a@x.edu', 'b@x.edu'], delivery_mode='all')
+    assert response.get_json()['version'] == 2
+    assert recipients(sent) == ['a@x.edu', 'b@x.edu']
+    assert sent[0]['body'] == "<p>Exams start on Monday</p>"
+
+
+def test_silent_mode_sends_nothing(client, auth, notice, sent):
+    response = update(client, auth, notice, recipient_emails=['a@x.edu', 'b@x.edu'], delivery_mode='silent')
+    assert response.status_code == 200
+    assert sent == []
+
+
+def test_publishing_a_draft_emails_everyone(client, auth, admin, sent):
+    draft = app2.Notice(title="Trip", created_by=str(admin.id), status='draft',
+                        recipient_emails=['a@x.edu', 'b@x.edu'], send_options={"email": True})
+    app2.set_notice_content(draft, "<p>Trip</p>")
+    draft.save()
+    app2.write_notice_body(draft)
+
+    update(client, auth, draft, status='published')
+    assert recipients(sent) == ['a@x.edu', 'b@x.edu']
+
+
+def test_invalid_delivery_mode_is_rejected(client, auth, notice, sent):
+    response = update(client, auth, notice, delivery_mode='everyone')
+    assert response.status_code == 400
+    assert sent == []
@@ -0,0 +1,185 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+import app2
+import build_search_index
+from utils.near_duplicate import NearDuplicateIndex
+from utils.vector_index import VectorIndex, current_version, publish_version
+
+
+def test_search_ranks_by_cosine_similarity(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.upsert('exam', [1, 0, 0])
+    index.upsert('fest', [0, 2, 0])
+    index.upsert('both', [1, 1, 0])
+    assert [item for item, _ in index.search([1, 0.1, 0], k=2)] == ['exam', 'both']
+    assert index.search([0, 1, 0], k=1)[0] == ('fest', pytest.approx(1.0))
+
+
+def test_upserts_overwrite_and_removed_ids_are_skipped(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    for item in ('a', 'b', 'c'):
+        index.upsert(item, [1, 0])
+    index.upsert('a', [0, 1])
+    index.remove('b')
+    assert [item for item, _ in index.search([0, 1], k=3)] == ['a', 'c']
+    assert len(index) == 2
+    with pytest.raises(ValueError):
+        index.upsert('d', [1, 0, 0])
+
+    # Reopening reads the same rows back from disk
+    assert [item for item, _ in VectorIndex(str(tmp_path)).search([1, 0], k=3)] == ['c', 'a']
+
+
+def test_a_torn_append_is_truncated_on_open(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.upsert('a', [1, 0])
+    with open(os.path.join(index.directory, 'vectors.f32'), 'ab') as f:
+        f.write(np.ones(2, dtype=np.float32).tobytes())  # Vector written, id never was
+    assert len(VectorIndex(str(tmp_path))) == 1
+    assert os.path.getsize(os.path.join(index.directory, 'vectors.f32')) == 8
+
+
+def test_writers_sharing_an_index_see_each_others_rows(tmp_path):
+    first, second = VectorIndex(str(tmp_path)), VectorIndex(str(tmp_path))
+    first.upsert('a', [1, 0])
+    second.upsert('b', [0, 1])
+    first.upsert('c', [1, 1])
+    second.remove('a')
+
+    for index in (first, second, VectorIndex(str(tmp_path))):
+        assert {item for item, _ in index.search([1, 1], k=5)} == {'b', 'c'}
+    assert os.path.getsize(os.path.join(first.directory, 'vectors.f32')) == 3 * 2 * 4
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_concurrent_appends_from_processes_keep_rows_aligned(tmp_path):
+    VectorIndex(str(tmp_path), dim=2).upsert('seed', [1, 0])
+    children = []
+    for worker in range(4):
+        pid = os.fork()
+        if pid == 0:
+            index = VectorIndex(str(tmp_path))
+            for n in range(25):
+                index.upsert(f"w{worker}-{n}", [worker + 1, n + 1])
+            os._exit(0)
+        children.append(pid)
+    for pid in children:
+        assert os.waitpid(pid, 0)[1] == 0
+
+    index = VectorIndex(str(tmp_path))
+    assert len(index) == 101
+    assert os.path.getsize(os.path.join(index.directory, 'vectors.f32')) == 101 * 2 * 4
+    assert index.search([3, 5], k=1)[0][0] == 'w2-4'
+
+
+def test_open_indexes_keep_their_version_until_reopened(tmp_path):
+    root = str(tmp_path)
+    live = VectorIndex(root)
+    live.upsert('old', [1, 0])
+
+    rebuilt = VectorIndex(os.path.join(root, 'v2'))
+    rebuilt.upsert('new', [1, 0])
+    publish_version(root, 'v2')
+
+    assert current_version(root) == 'v2'
+    live.upsert('added', [0, 1])
+    assert {item for item, _ in live.search([1, 1], k=5)} == {'old', 'added'}
+    assert [item for item, _ in VectorIndex(root).search([1, 0], k=5)] == ['new']
+
+
+def test_rebuild_publishes_a_new_version_and_keeps_the_live_one(tmp_path, monkeypatch):
+    class Client:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def embed(self, texts):
+            return [[1.0, float(i)] for i, _ in enumerate(texts)]
+
+    notice = app2.Notice(title="Exam", created_by="u", status='published')
+    app2.set_notice_content(notice, "<p>Exams</p>")
+    notice.save()
+    app2.write_notice_body(notice)
+
+    live = VectorIndex(str(tmp_path))
+    live.upsert('stale', [0, 1])
+    monkeypatch.setattr(build_search_index, 'vector_index', live)
+    monkeypatch.setattr(build_search_index, 'InferenceClient', Client)
+    monkeypatch.setattr(sys, 'argv', ['build_search_index.py'])
+    build_search_index.main()
+
+    version = current_version(str(tmp_path))
+    assert version and os.path.exists(os.path.join(live.directory, 'vectors.f32'))
+    assert [item for item, _ in VectorIndex(str(tmp_path)).search([1, 0])] == [str(notice.id)]
+    assert [item for item, _ in live.search([0, 1])] == ['stale']
+
+
+def test_deleting_a_notice_removes_its_body_vector_and_fingerprint(client, auth, admin, tmp_path, monkeypatch):
+    monkeypatch.setattr(app2, 'vector_index', VectorIndex(str(tmp_path)))
+    monkeypatch.setattr(app2, 'near_duplicate_index', NearDuplicateIndex())
+    notice = app2.Notice(title="Exam", created_by=str(admin.id), status='published')
+    app2.set_notice_content(notice, "<p>Mid-semester exams start on Monday in the main hall</p>")
+    notice.save()
+    app2.write_notice_body(notice)
+    notice_id = str(notice.id)
+    fingerprint = app2.near_duplicate_index.signature(app2.classification_text(notice))
+    app2.near_duplicate_index.add(notice_id, fingerprint, notice.created_at)
+    app2.vector_index.upsert(notice_id, [1, 0])
+
+    response = client.delete(f'/api/notices/{notice_id}', headers=auth)
+    assert response.status_code == 200
+    assert app2.Notice.objects(id=notice_id).count() == 0
+    assert app2.NoticeBody.objects(notice_id=notice_id).count() == 0
+    assert app2.vector_index.search([1, 0]) == []
+    assert app2.near_duplicate_index.query(fingerprint, 0.5) == []
+
+
+def test_only_the_author_can_delete_a_notice(client, auth):
+    notice = app2.Notice(title="Exam", created_by="someone-else", status='published')
+    app2.set_notice_content(notice, "<p>Exams</p>")
+    notice.save()
+    assert client.delete(f'/api/notices/{notice.id}', headers=auth).status_code == 404
+    assert app2.Notice.objects(id=notice.id).count() == 1
+
+
+def test_notices_are_embedded_without_a_classification(tmp_path, monkeypatch):
+    monkeypatch.setattr(app2, 'vector_index', VectorIndex(str(tmp_path)))
+    monkeypatch.setattr(app2.inference_client, 'classify', lambda text, timeout, priority, embed: {
+        "status": "unclassified", "reason": "Classifier service is unavailable"
+    })
+    monkeypatch.setattr(app2.inference_client, 'embed', lambda texts, timeout: [[0.6, 0.8]])
+    notice = app2.Notice(title="Exam", created_by="u", status='published')
+    app2.set_notice_content(notice, "<p>Exams</p>")
+    notice.save()
+
+    app2.classify_and_store(str(notice.id), notice.content_hash, "Exam")
+    assert app2.vector_index.search([0.6, 0.8]) == [(str(notice.id), pytest.approx(1.0))]
+    # A notice edited meanwhile is left to the classification its edit queued
+    edited = app2.Notice(title="Fest", created_by="u", status='published')
+    app2.set_notice_content(edited, "<p>Fest</p>")
+    edited.save()
+    app2.classify_and_store(str(edited.id), "older-hash", "Fest")
+    assert len(app2.vector_index) == 1
+
+
+def test_classification_embeddings_are_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(app2, 'vector_index', VectorIndex(str(tmp_path)))
+    monkeypatch.setattr(app2.inference_client, 'classify', lambda text, timeout, priority, embed: {
+        "status": "classified", "category": "Examination", "categoryConfidence": 0.9, "priority": "Urgent",
+        "priorityConfidence": 0.8, "modelVersion": "v1", "embedding": [1.0, 0.0]
+    })
+
+    def second_pass(texts, timeout):
+        raise AssertionError("The text was already encoded by the classification")
+
+    monkeypatch.setattr(app2.inference_client, 'embed', second_pass)
+    notice = app2.Notice(title="Exam", created_by="u", status='published')
+    app2.set_notice_content(notice, "<p>Exams</p>")
+    notice.save()
+
+    app2.classify_and_store(str(notice.id), notice.content_hash, "Exam")
+    assert app2.Notice.objects.get(id=notice.id).predicted_priority == "Urgent"
+    assert app2.vector_index.search([1.0, 0.0]) == [(str(notice.id), pytest.approx(1.0))]
@@ -0,0 +1,114 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional; without it only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'image/svg+xml')
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    # Preferred first
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    # accept_encodings: werkzeug's request.accept_encodings. Highest q-value
+    # wins; ties go to the better codec. None means send it uncompressed
+    best, best_quality = None, 0
+    for encoding in supported_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    # Defaults are tuned for per-request work; higher levels (brotli 11,
+    # gzip 9) only pay off for bodies compressed outside a request
+    if encoding == 'br':
+        return brotli.compress(data, quality=5 if level is None else level)
+    return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    # Each input chunk is flushed through the compressor, so the client gets
+    # data as soon as the application produces it
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def peek(chunks: Iterable[bytes], min_bytes: int) -> Tuple[List[bytes], Iterator[bytes], bool]:
+    # Reads chunks until min_bytes are buffered or the stream ends.
+    # Returns (buffered chunks, the rest, whether the stream ended)
+    chunks = iter(chunks)
+    head, size = [], 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_bytes:
+            return head, chunks, False
+    return head, chunks, True
+
+
+class PrecompressedCache:
+    """LRU of immutable bodies, kept both raw and in every supported encoding.
+
+    Keys must change whenever the body does (e.g. notice id + version), so
+    entries never need invalidating. Bodies are compressed once when first
+    stored, at the per-request levels since that happens inside the request
+    that missed; the cache holds up to `max_bytes` of raw plus compressed
+    bytes.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, body: bytes) -> Dict[str, bytes]:
+        entry = {'identity': body}
+        for encoding in supported_encodings():
+            entry[encoding] = compress(body, encoding)
+        size = sum(len(data) for data in entry.values())
+        if size > self.max_bytes:
+            return entry  # Served, but too big to keep
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= sum(len(data) for data in previous.values())
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= sum(len(data) for data in evicted.values())
+        return entry
@@ -0,0 +1,180 @@
+from mongoengine import Document, StringField, IntField, DateTimeField
+from pymongo.errors import BulkWriteError
+from typing import Iterable, Iterator, List, Tuple
+import datetime
+import os
+import socket
+import threading
+import time
+import uuid
+
+DUPLICATE_KEY_ERROR = 11000
+# A claim that is neither marked sent nor released within this time, and
+# whose process stopped sending heartbeats this long ago, is assumed lost
+# (the process stopped with the send still queued in memory)
+DEFAULT_CLAIM_TIMEOUT_SECONDS = 3600
+
+
+class DeliveryRecord(Document):
+    # One row per (notice, version, recipient, channel). A row is 'claimed'
+    # while its send is queued and 'sent' once the send went through; rows
+    # written before states existed have none and count as sent.
+    key = StringField(required=True, unique=True)
+    notice_id = StringField(required=True)
+    version = IntField(required=True)
+    recipient = StringField(required=True)
+    channel = StringField(required=True)
+    state = StringField(choices=('claimed', 'sent'))
+    owner = StringField()  # claim_owner() of the process holding the send
+    created_at = DateTimeField(default=datetime.datetime.utcnow)
+    claimed_at = DateTimeField()
+    sent_at = DateTimeField()
+
+    meta = {
+        'collection': 'delivery_records',
+        'indexes': [
+            {'fields': ['notice_id', 'version']},
+            {'fields': ['state', 'claimed_at']}
+        ]
+    }
+
+
+class ClaimOwner(Document):
+    # Heartbeat of a process that holds claims. Its queued sends are only
+    # taken over once it stops beating, however long they wait in the queue.
+    owner = StringField(required=True, unique=True)
+    seen_at = DateTimeField(required=True)
+
+    meta = {'collection': 'delivery_claim_owners'}
+
+
+_owner = {}
+_heartbeat_owner = None
+_heartbeat_lock = threading.Lock()
+
+
+def claim_owner() -> str:
+    # Per process, so forked workers get their own (and their own heartbeat)
+    pid = os.getpid()
+    if pid not in _owner:
+        _owner.clear()
+        _owner[pid] = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+    return _owner[pid]
+
+
+def beat() -> None:
+    ClaimOwner.objects(owner=claim_owner()).update_one(set__seen_at=datetime.datetime.utcnow(), upsert=True)
+
+
+def keep_alive(interval_seconds: float) -> None:
+    # Beats now, then every interval_seconds from a daemon thread that stops
+    # with the process and so lets its claims expire
+    global _heartbeat_owner
+    with _heartbeat_lock:
+        if _heartbeat_owner == claim_owner():
+            return
+        _heartbeat_owner = claim_owner()
+    beat()
+
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                beat()
+            except Exception as e:
+                print(f"❌ Delivery heartbeat failed: {e}")
+
+    threading.Thread(target=run, name='delivery-heartbeat', daemon=True).start()
+
+
+def _live_owners(cutoff: datetime.datetime) -> List[str]:
+    return list(ClaimOwner.objects(seen_at__gte=cutoff).distinct('owner'))
+
+
+def delivery_key(notice_id: str, version: int, recipient: str, channel: str) -> str:
+    return f"{notice_id}:{version}:{channel}:{recipient.strip().lower()}"
+
+
+def claim_deliveries(notice_id: str, version: int, channel: str, recipients: Iterable[str],
+                     timeout_seconds: int = DEFAULT_CLAIM_TIMEOUT_SECONDS) -> List[str]:
+    """Record the recipients about to be sent to and return only the new ones.
+
+    Uses the unique index on `key` as the idempotency check, so recipients that
+    already got this version on this channel (from an earlier save, a retry or
+    another process) are filtered out in one round trip. Claims older than
+    `timeout_seconds` that were never marked sent, and whose process has not
+    beaten for as long, are taken over and returned as well. Callers must
+    mark_delivered() or release_deliveries() every recipient returned.
+    """
+    recipients = list(dict.fromkeys(r.strip() for r in recipients if r and r.strip()))
+    if not recipients:
+        return []
+
+    keep_alive(max(1, timeout_seconds // 4))
+    now = datetime.datetime.utcnow()
+    docs = [{
+        'key': delivery_key(notice_id, version, r, channel),
+        'notice_id': notice_id,
+        'version': version,
+        'recipient': r,
+        'channel': channel,
+        'state': 'claimed',
+        'owner': claim_owner(),
+        'created_at': now,
+        'claimed_at': now
+    } for r in recipients]
+
+    try:
+        DeliveryRecord._get_collection().insert_many(docs, ordered=False)
+        return recipients
+    except BulkWriteError as e:
+        errors = e.details.get('writeErrors', [])
+        if any(err.get('code') != DUPLICATE_KEY_ERROR for err in errors):
+            raise
+        duplicates = {err['index'] for err in errors}
+
+    taken = _take_over_stale([docs[i]['key'] for i in duplicates], now, timeout_seconds)
+    return [r for i, r in enumerate(recipients) if i not in duplicates or docs[i]['key'] in taken]
+
+
+def _take_over_stale(keys: List[str], now: datetime.datetime, timeout_seconds: int) -> set:
+    # Re-stamping claimed_at only succeeds for the process that read the old
+    # stamp, so a lost claim is retried by exactly one claimer
+    collection = DeliveryRecord._get_collection()
+    cutoff = now - datetime.timedelta(seconds=timeout_seconds)
+    taken = set()
+    for doc in collection.find({'key': {'$in': keys}, 'state': 'claimed', 'claimed_at': {'$lt': cutoff},
+                                'owner': {'$nin': _live_owners(cutoff)}},
+                               {'key': 1, 'claimed_at': 1}):
+        result = collection.update_one({'_id': doc['_id'], 'state': 'claimed', 'claimed_at': doc['claimed_at']},
+                                       {'$set': {'claimed_at': now, 'owner': claim_owner()}})
+        if result.modified_count:
+            taken.add(doc['key'])
+    return taken
+
+
+def mark_delivered(notice_id: str, version: int, channel: str, recipients: Iterable[str]) -> None:
+    keys = [delivery_key(notice_id, version, r, channel) for r in recipients]
+    if keys:
+        DeliveryRecord.objects(key__in=keys).update(set__state='sent', set__sent_at=datetime.datetime.utcnow())
+
+
+def release_deliveries(notice_id: str, version: int, channel: str, recipients: Iterable[str]) -> None:
+    # Undo a claim after a failed send so a later attempt can retry it
+    keys = [delivery_key(notice_id, version, r, channel) for r in recipients]
+    if keys:
+        DeliveryRecord.objects(key__in=keys).delete()
+
+
+def stale_claims(timeout_seconds: int = DEFAULT_CLAIM_TIMEOUT_SECONDS) -> Iterator[Tuple[str, int, str, List[str]]]:
+    # (notice_id, version, channel, recipients) for every claim older than
+    # timeout_seconds that was never marked sent or released and whose owner
+    # stopped beating. Claims from before owners were recorded go by age alone.
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=timeout_seconds)
+    groups = DeliveryRecord._get_collection().aggregate([
+        {'$match': {'state': 'claimed', 'claimed_at': {'$lt': cutoff}, 'owner': {'$nin': _live_owners(cutoff)}}},
+        {'$group': {'_id': {'notice_id': '$notice_id', 'version': '$version', 'channel': '$channel'},
+                    'recipients': {'$push': '$recipient'}}}
+    ])
+    for group in groups:
+        yield group['_id']['notice_id'], group['_id']['version'], group['_id']['channel'], group['recipients']
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Sequence
+
+# --- CONFIGURATION ---
+LANES = ("Highly Urgent", "Urgent", "Normal")
+URGENT_LANES = ("Highly Urgent", "Urgent")
+DEFAULT_WEIGHTS = {"Highly Urgent": 8, "Urgent": 4, "Normal": 1}
+WAIT_SAMPLES = 1000  # Recent wait times kept per lane for percentiles
+
+
+class DeliveryQueue:
+    """Weighted per-priority delivery lanes served by a fixed worker pool.
+
+    General workers pick the next job by smooth weighted round-robin across
+    non-empty lanes, so a large Normal send is interleaved with urgent work
+    instead of blocking it. `reserved_workers` additionally only ever serve the
+    urgent lanes, which keeps capacity free for an emergency notice even when
+    every general worker is busy with a long Normal job. Workers start lazily
+    on the first submit.
+    """
+
+    def __init__(self,
+                 workers: int = 4,
+                 reserved_workers: int = 1,
+                 weights: Optional[Dict[str, int]] = None,
+                 urgent_lanes: Sequence[str] = URGENT_LANES):
+        self._workers = max(1, workers)
+        self._reserved_workers = max(0, reserved_workers)
+        self._weights = dict(weights or DEFAULT_WEIGHTS)
+        self._urgent_lanes = tuple(urgent_lanes)
+        self._lanes = {lane: deque() for lane in LANES}
+        self._current_weight = {lane: 0 for lane in LANES}
+        self._stats = {lane: {"submitted": 0, "completed": 0, "failed": 0, "in_flight": 0,
+                              "waits": deque(maxlen=WAIT_SAMPLES)} for lane in LANES}
+        self._cond = threading.Condition()
+        self._threads = []
+
+    # --- Public API ---
+    def submit(self, lane: str, fn: Callable, *args) -> None:
+        lane = lane if lane in self._lanes else "Normal"
+        with self._cond:
+            self._ensure_started()
+            self._lanes[lane].append((time.monotonic(), fn, args))
+            self._stats[lane]["submitted"] += 1
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            lanes = {}
+            for lane in LANES:
+                stats = self._stats[lane]
+                waits = sorted(stats["waits"])
+                lanes[lane] = {
+                    "depth": len(self._lanes[lane]),
+                    "inFlight": stats["in_flight"],
+                    "submitted": stats["submitted"],
+                    "completed": stats["completed"],
+                    "failed": stats["failed"],
+                    "oldestWaitSeconds": round(time.monotonic() - self._lanes[lane][0][0], 3) if self._lanes[lane] else 0.0,
+                    "waitSeconds": {
+                        "p50": _percentile(waits, 0.50),
+                        "p95": _percentile(waits, 0.95),
+                        "max": round(waits[-1], 3) if waits else 0.0
+                    }
+                }
+            return {
+                "workers": self._workers,
+                "reservedUrgentWorkers": self._reserved_workers,
+                "weights": self._weights,
+                "lanes": lanes
+            }
+
+    # --- Internals ---
+    def _ensure_started(self) -> None:
+        # Called with the lock held
+        if self._threads:
+            return
+        for i in range(self._workers):
+            self._spawn(f"delivery-worker-{i}", LANES)
+        for i in range(self._reserved_workers):
+            self._spawn(f"delivery-urgent-{i}", self._urgent_lanes)
+
+    def _spawn(self, name: str, lanes: Sequence[str]) -> None:
+        thread = threading.Thread(target=self._work, args=(tuple(lanes),), name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _pick_lane(self, eligible: Sequence[str]) -> Optional[str]:
+        # Smooth weighted round-robin over the eligible lanes that have work
+        ready = [lane for lane in eligible if self._lanes[lane]]
+        if not ready:
+            return None
+        total = 0
+        for lane in ready:
+            self._current_weight[lane] += self._weights.get(lane, 1)
+            total += self._weights.get(lane, 1)
+        chosen = max(ready, key=lambda lane: self._current_weight[lane])
+        self._current_weight[chosen] -= total
+        return chosen
+
+    def _work(self, eligible: Sequence[str]) -> None:
+        while True:
+            with self._cond:
+                lane = self._pick_lane(eligible)
+                while lane is None:
+                    self._cond.wait()
+                    lane = self._pick_lane(eligible)
+                enqueued_at, fn, args = self._lanes[lane].popleft()
+                stats = self._stats[lane]
+                stats["waits"].append(time.monotonic() - enqueued_at)
+                stats["in_flight"] += 1
+
+            try:
+                # A job that returns False (e.g. a failed send) counts as failed
+                ok = fn(*args) is not False
+            except Exception as e:
+                ok = False
+                print(f"❌ Delivery job failed in lane '{lane}': {e}")
+
+            with self._cond:
+                stats["in_flight"] -= 1
+                stats["completed" if ok else "failed"] += 1
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return round(sorted_values[index], 3)
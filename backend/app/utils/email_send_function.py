@@ -6,11 +6,15 @@ from email import encoders
 from typing import List
 import os
 
-# --- CONFIGURATION (Unchanged) ---
+# --- CONFIGURATION ---
+# Every setting can be overridden from the environment, e.g. to point delivery
+# at the local stand-in server in dev_servers/fake_smtp_server.py
 EMAIL_SENDER_ADDRESS = os.environ.get("EMAIL_SENDER_ADDRESS", "team.smart.notice@gmail.com")
 EMAIL_SENDER_PASSWORD = os.environ.get("EMAIL_SENDER_PASSWORD", "sqbpaqxlstzrxabk")
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
+SMTP_SERVER = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
+SMTP_USE_TLS = os.environ.get("SMTP_USE_TLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", 30))
 
 # MODIFIED: The function now accepts an 'attachments' parameter
 def send_bulk_email(recipient_emails: List[str], subject: str, body: str, attachments: List[str] = None) -> bool:
@@ -52,8 +56,9 @@ def send_bulk_email(recipient_emails: List[str], subject: str, body: str, attach
     # The rest of the function remains the same
     try:
         print(f"Connecting to email server {SMTP_SERVER}...")
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_USE_TLS:
+            server.starttls()
         server.login(EMAIL_SENDER_ADDRESS, EMAIL_SENDER_PASSWORD)
         print(f"Sending email to {len(recipient_emails)} recipients...")
         server.sendmail(EMAIL_SENDER_ADDRESS, recipient_emails, message.as_string())
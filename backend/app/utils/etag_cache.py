@@ -0,0 +1,53 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+
+class EtagCache:
+    """One JSON response body, built on demand and cached with its ETag.
+
+    `build()` returns the JSON-serializable value. The serialized body and a
+    hash of it are kept until invalidate() is called or `max_age_seconds`
+    pass; the age limit bounds staleness from writes made by other processes,
+    which cannot call invalidate() here. Concurrent misses build once. A build
+    that started before an invalidate() is returned to its caller but not
+    cached.
+    """
+
+    def __init__(self, build: Callable[[], Any], max_age_seconds: float = 300.0):
+        self._build = build
+        self.max_age_seconds = max_age_seconds
+        self._entry: Optional[Tuple[bytes, str, float]] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def get(self) -> Tuple[bytes, str]:
+        entry = self._fresh_entry()
+        if entry:
+            return entry
+        with self._build_lock:
+            entry = self._fresh_entry()  # Built by another thread while we waited
+            if entry:
+                return entry
+            with self._lock:
+                generation = self._generation
+            body = json.dumps(self._build(), separators=(',', ':')).encode('utf-8')
+            etag = hashlib.sha256(body).hexdigest()[:32]
+            with self._lock:
+                if generation == self._generation:
+                    self._entry = (body, etag, time.monotonic())
+            return body, etag
+
+    def _fresh_entry(self) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            if self._entry and time.monotonic() - self._entry[2] < self.max_age_seconds:
+                return self._entry[0], self._entry[1]
+        return None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entry = None
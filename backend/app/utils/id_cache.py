@@ -0,0 +1,42 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable
+
+
+class IdCache:
+    """Bounded least-recently-used cache of values keyed by document id.
+
+    get_many() returns the cached values and loads every missing id with one
+    `load_many(ids)` call, so a caller resolving many ids costs at most one
+    query however many distinct ids there are. invalidate() drops an id after
+    the underlying document changes.
+    """
+
+    def __init__(self, max_items: int = 10000):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, ids: Iterable[str], load_many: Callable[[list], Dict[str, Any]]) -> Dict[str, Any]:
+        found, missing = {}, []
+        with self._lock:
+            for item_id in set(ids):
+                if item_id in self._items:
+                    self._items.move_to_end(item_id)
+                    found[item_id] = self._items[item_id]
+                else:
+                    missing.append(item_id)
+        if missing:
+            loaded = load_many(missing)
+            # Ids that don't exist are cached as None, so they are not queried again
+            loaded = {item_id: loaded.get(item_id) for item_id in missing}
+            found.update(loaded)
+            with self._lock:
+                self._items.update(loaded)
+                while len(self._items) > self.max_items:
+                    self._items.popitem(last=False)
+        return found
+
+    def invalidate(self, item_id: str) -> None:
+        with self._lock:
+            self._items.pop(item_id, None)
@@ -0,0 +1,252 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def unclassified(reason: str) -> dict:
+    return {"status": "unclassified", "category": None, "priority": None, "reason": reason}
+
+
+def _prediction(value) -> tuple:
+    # (label, confidence) from one {"label", "confidence"} entry of a response
+    if not isinstance(value, dict) or not isinstance(value.get("label"), str) \
+            or isinstance(value.get("confidence"), bool) or not isinstance(value.get("confidence"), (int, float)):
+        raise ValueError(f"Unexpected prediction from the classifier: {value!r}")
+    return value["label"], value["confidence"]
+
+
+def _top_prediction(predictions) -> tuple:
+    if not isinstance(predictions, list) or not predictions:
+        raise ValueError(f"Unexpected predictions from the classifier: {predictions!r}")
+    return _prediction(predictions[0])
+
+
+def _missing_priority_head(response: requests.Response) -> bool:
+    # /predict/all answers 503 with priorityHead false until a head is trained
+    if response.status_code != 503:
+        return False
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and body.get("priorityHead") is False
+
+
+class CircuitBreaker:
+    """Stops calls to a failing service for a while instead of waiting on it.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    allow() returns False until `reset_seconds` have passed. Then a single
+    trial call is let through (half-open): success closes the circuit, failure
+    opens it again for another `reset_seconds`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+
+class InferenceClient:
+    """Client for the AI service's /predict (category), /predict/all
+    (category + priority) and /embed.
+
+    Calls share one keep-alive connection pool. Every call has a deadline and
+    never raises: when the service is slow, failing, answers with an
+    unexpected body or the circuit is open, the caller gets unclassified(...)
+    (or None from embed()) instead. Concurrent calls for the same text share a
+    single request.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 2.0, connect_timeout: float = 0.5, pool_size: int = 10,
+                 failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "coalesced": 0, "classified": 0, "failed": 0, "shortCircuited": 0, "embedded": 0}
+
+    def classify(self, text: str, timeout: Optional[float] = None, priority: bool = False,
+                 embed: bool = False) -> dict:
+        # Category only by default. priority=True also asks for the priority,
+        # which is None while the service has no priority head; with embed=True
+        # the result also carries the "embedding" from the same encoder pass
+        # when there is a head (callers fall back to embed() otherwise)
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        mode = ('embed' if embed else 'all') if priority else 'category'
+        key = f"{mode}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self._stats["coalesced"] += 1
+
+        if leader:
+            try:
+                future.set_result(self._request(text, deadline, priority, embed))
+            except Exception as e:
+                # Followers wait on the future, so it must resolve on any error
+                self.breaker.record_failure()
+                self._count("failed")
+                print(f"⚠️ Classifier call failed: {e}")
+                future.set_result(unclassified(str(e)))
+            finally:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            return unclassified("Timed out waiting for the classifier")
+
+    def embed(self, texts: List[str], timeout: Optional[float] = None) -> Optional[List[List[float]]]:
+        # Unit-length embeddings for semantic search, or None if unavailable
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        if not self.breaker.allow():
+            self._count("shortCircuited")
+            return None
+        try:
+            response = self.session.post(
+                f"{self.base_url}/embed",
+                json={"texts": texts},
+                timeout=(self.connect_timeout, max(0.0, deadline - time.monotonic()))
+            )
+            response.raise_for_status()
+            embeddings = response.json()["embeddings"]
+            if not isinstance(embeddings, list) or len(embeddings) != len(texts) \
+                    or not all(isinstance(row, list) and row for row in embeddings):
+                raise ValueError("Unexpected embeddings from the classifier")
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            self.breaker.record_failure()
+            self._count("failed")
+            print(f"⚠️ Embedding call failed: {e}")
+            return None
+
+        self.breaker.record_success()
+        self._count("embedded")
+        return embeddings
+
+    def _request(self, text: str, deadline: float, priority: bool, embed: bool = False) -> dict:
+        if deadline - time.monotonic() <= 0:
+            return unclassified("Timed out waiting for the classifier")
+        if not self.breaker.allow():
+            self._count("shortCircuited")
+            return unclassified("Classifier service is unavailable")
+        try:
+            data, with_priority = None, False
+            if priority:
+                response = self._post("/predict/all", {"text": text, "top_k": 1, "embed": embed}, deadline)
+                if not _missing_priority_head(response):
+                    response.raise_for_status()
+                    data, with_priority = response.json(), True
+            if data is None:
+                response = self._post("/predict", {"text": text, "top_k": 1}, deadline)
+                response.raise_for_status()
+                data = response.json()
+                data = {"category": data["predictions"], "modelVersion": data.get("modelVersion")}
+            result = self._result(data, with_priority, embed)
+        except (requests.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+            self.breaker.record_failure()
+            self._count("failed")
+            print(f"⚠️ Classifier call failed: {e}")
+            return unclassified(str(e))
+
+        self.breaker.record_success()
+        self._count("classified")
+        return result
+
+    def _post(self, path: str, body: dict, deadline: float) -> requests.Response:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout("Timed out waiting for the classifier")
+        return self.session.post(
+            f"{self.base_url}{path}",
+            json=body,
+            timeout=(min(self.connect_timeout, remaining), remaining)
+        )
+
+    def _result(self, data: dict, with_priority: bool, embed: bool = False) -> dict:
+        # Raises ValueError/KeyError/TypeError unless `data` has the expected shape
+        if not isinstance(data, dict):
+            raise ValueError(f"Unexpected response from the classifier: {data!r}")
+        category, category_confidence = _top_prediction(data["category"])
+        result = {
+            "status": "classified",
+            "category": category,
+            "categoryConfidence": category_confidence,
+            "priority": None,
+            "priorityConfidence": None,
+            "modelVersion": data.get("modelVersion")
+        }
+        if with_priority:
+            result["priority"], result["priorityConfidence"] = _prediction(data["priority"])
+            if embed:
+                embedding = data["embedding"]
+                if not isinstance(embedding, list) or not embedding \
+                        or not all(isinstance(v, (int, float)) for v in embedding):
+                    raise ValueError("Unexpected embedding from the classifier")
+                result["embedding"] = embedding
+        return result
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inFlight"] = len(self._in_flight)
+        stats["circuit"] = self.breaker.state()
+        return stats
@@ -0,0 +1,52 @@
+import itertools
+import json
+from typing import Any, Callable, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard library encoder is the fallback
+    orjson = None
+
+CHUNK_BYTES = 64 * 1024
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def array_chunks(items: Iterable[Any], chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    # A JSON array of `items`, encoded one item at a time. The opening bracket
+    # and first item go out at once so the client starts receiving without
+    # waiting on a full chunk; the rest is yielded in chunks of about
+    # chunk_bytes, so only one chunk is held in memory
+    buffer = bytearray(b'[')
+    for i, item in enumerate(items):
+        if i:
+            buffer += b','
+        buffer += dumps(item)
+        if not i or len(buffer) >= chunk_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    yield bytes(buffer)
+
+
+def object_chunks(key: str, items: Iterable[Any], trailer: Callable[[], dict], chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    # {"<key>": [items...], **trailer()}. trailer() is called once the items
+    # are consumed, so it can report totals counted while streaming
+    chunks = array_chunks(items, chunk_bytes)
+    yield b'{' + dumps(key) + b':' + next(chunks)
+    yield from chunks
+    for name, value in trailer().items():
+        yield b',' + dumps(name) + b':' + dumps(value)
+    yield b'}'
+
+
+def primed(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # Produces the first chunk before the response is returned. The first
+    # chunk already holds rows, so a failing query still raises inside the
+    # view (and gets an error status) instead of cutting off a started response
+    first = next(chunks)
+    return itertools.chain([first], chunks)
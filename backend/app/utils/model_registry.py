@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class ModelRegistry:
+    """Loads each registered model once per process and hands out the instance.
+
+    A model is loaded either lazily on the first get() (concurrent first callers
+    wait on a per-model lock instead of loading it twice) or eagerly with
+    load()/load_in_background(). The optional warm-up runs one throwaway
+    prediction so the first real request doesn't pay for graph tracing and
+    allocator growth. is_ready() is cheap and never triggers a load, so it is
+    safe to call from a readiness probe.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None) -> None:
+        with self._lock:
+            self._entries[name] = {
+                "loader": loader,
+                "warmup": warmup,
+                "model": None,
+                "error": None,
+                "load_seconds": None,
+                "lock": threading.Lock()
+            }
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        if entry["model"] is not None:
+            return entry["model"]
+        with entry["lock"]:
+            if entry["model"] is None:
+                self._load(name, entry)
+        return entry["model"]
+
+    def load(self, name: str) -> None:
+        self.get(name)
+
+    def load_in_background(self, name: str) -> threading.Thread:
+        def _run():
+            try:
+                self.get(name)
+            except Exception:
+                pass  # Recorded on the entry and reported by status()
+        thread = threading.Thread(target=_run, name=f"load-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return bool(entry and entry["model"] is not None)
+
+    def status(self) -> Dict[str, dict]:
+        return {name: {
+            "ready": entry["model"] is not None,
+            "loadSeconds": entry["load_seconds"],
+            "error": entry["error"]
+        } for name, entry in self._entries.items()}
+
+    def _load(self, name: str, entry: dict) -> None:
+        started = time.perf_counter()
+        print(f"⏳ Loading model '{name}'...")
+        try:
+            model = entry["loader"]()
+            if entry["warmup"]:
+                entry["warmup"](model)
+        except Exception as e:
+            entry["error"] = str(e)
+            print(f"❌ Failed to load model '{name}': {e}")
+            raise
+        entry["load_seconds"] = round(time.perf_counter() - started, 2)
+        entry["error"] = None
+        entry["model"] = model
+        print(f"✅ Model '{name}' ready in {entry['load_seconds']}s")
@@ -0,0 +1,138 @@
+import datetime
+import heapq
+import itertools
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+WORD = re.compile(r'[a-z0-9]+')
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    # Overlapping word n-grams of the lowercased text; punctuation, markup
+    # leftovers and spacing differences don't change the set
+    words = WORD.findall(text.lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """MinHash + LSH index of recent notices for near-duplicate lookups.
+
+    Each text is reduced to a `num_perm`-value MinHash signature over its word
+    shingles; the fraction of equal values estimates the Jaccard similarity of
+    two shingle sets. Signatures are split into `bands` bands and each band is
+    hashed into a bucket, so a query only compares against notices sharing at
+    least one bucket (pairs near the threshold almost always do, unrelated
+    notices almost never) instead of every notice in the window.
+
+    Entries older than `window` or beyond `max_items` are evicted oldest first
+    (by creation time, whatever order they were added in) as new ones are
+    added.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 5,
+                 window: datetime.timedelta = datetime.timedelta(days=30), max_items: int = 50000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.window = window
+        self.max_items = max_items
+
+        # Fixed seed: signatures are comparable across restarts and processes
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self._entries: Dict[str, Tuple[np.ndarray, datetime.datetime]] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(bands)]
+        # (created_at, seq, id) min-heap; entries removed or re-added since are
+        # skipped when they reach the top
+        self._ages: List[Tuple[datetime.datetime, int, str]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        # None for texts with no words; they never match anything
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return None
+        hashes = np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+        # One universal hash (a*x + b mod p) per permutation, for all shingles at once
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, signature: Optional[np.ndarray], threshold: float = 0.8, limit: int = 5) -> List[Tuple[str, float]]:
+        # [(id, estimated Jaccard similarity)] at or above threshold, best first
+        if signature is None:
+            return []
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(bucket.get(key, ()))
+            scored = [(item_id, float(np.mean(self._entries[item_id][0] == signature))) for item_id in candidates]
+        matches = sorted((match for match in scored if match[1] >= threshold), key=lambda match: match[1], reverse=True)
+        return matches[:limit]
+
+    def add(self, item_id: str, signature: Optional[np.ndarray], created_at: Optional[datetime.datetime] = None,
+            replace: bool = True) -> None:
+        # replace=False keeps an entry already present, so a bulk load never
+        # overwrites a notice added or edited while it ran
+        if signature is None:
+            return
+        created_at = created_at or datetime.datetime.now()
+        with self._lock:
+            if not replace and item_id in self._entries:
+                return
+            self._remove(item_id)
+            self._entries[item_id] = (signature, created_at)
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                bucket.setdefault(key, set()).add(item_id)
+            heapq.heappush(self._ages, (created_at, next(self._seq), item_id))
+            self._evict()
+
+    def remove(self, item_id: str) -> None:
+        with self._lock:
+            self._remove(item_id)
+
+    def _remove(self, item_id: str) -> None:
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        for bucket, key in zip(self._buckets, self._band_keys(entry[0])):
+            ids = bucket.get(key)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del bucket[key]
+
+    def _evict(self) -> None:
+        cutoff = datetime.datetime.now() - self.window
+        while self._ages:
+            created_at, _, oldest_id = self._ages[0]
+            entry = self._entries.get(oldest_id)
+            if entry is not None and entry[1] == created_at:
+                if len(self._entries) <= self.max_items and created_at >= cutoff:
+                    break
+                self._remove(oldest_id)
+            heapq.heappop(self._ages)
+        if len(self._ages) > 2 * len(self._entries) + 1024:
+            # Too many skipped entries from removals; rebuild from the live ones
+            self._ages = [(created_at, next(self._seq), item_id)
+                          for item_id, (_, created_at) in self._entries.items()]
+            heapq.heapify(self._ages)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,168 @@
+from mongoengine import Document, StringField, DateTimeField, BooleanField, Q
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from html import escape
+import datetime
+import threading
+import uuid
+
+# --- CONFIGURATION ---
+DEFAULT_WINDOW_MINUTES = 24 * 60  # One digest per day, windows aligned to local midnight
+# Entries claimed by a flush that never finished (the process stopped) are
+# claimed again by a later flush after this long
+DEFAULT_CLAIM_TIMEOUT_SECONDS = 3600
+
+
+class DigestPreference(Document):
+    # A recipient who gets Normal-priority notices as a digest instead of one
+    # email each. Keyed by the lowercased email notices are sent to.
+    email = StringField(required=True, unique=True)
+    digest = BooleanField(default=False)
+    updated_at = DateTimeField(default=datetime.datetime.now)
+
+    meta = {'collection': 'digest_preferences'}
+
+
+class DigestEntry(Document):
+    # A notice waiting to go out in a recipient's next digest
+    recipient = StringField(required=True)
+    notice_id = StringField(required=True)
+    window_end = DateTimeField(required=True)
+    batch_id = StringField()  # Set when a flush claims the entry
+    claimed_at = DateTimeField()
+    created_at = DateTimeField(default=datetime.datetime.now)
+
+    meta = {
+        'collection': 'digest_entries',
+        'indexes': [
+            {'fields': ['batch_id', 'window_end']},
+            {'fields': ['claimed_at', 'window_end']}
+        ]
+    }
+
+
+def digest_recipients(emails: Iterable[str]) -> Set[str]:
+    # The lowercased addresses among `emails` that opted into digests
+    emails = list({e.strip().lower() for e in emails if e and e.strip()})
+    if not emails:
+        return set()
+    return {p['email'] for p in DigestPreference.objects(email__in=emails, digest=True).only('email').as_pymongo()}
+
+
+def set_digest_preference(email: str, digest: bool) -> None:
+    DigestPreference.objects(email=email.strip().lower()).update_one(
+        set__digest=digest, set__updated_at=datetime.datetime.now(), upsert=True
+    )
+
+
+def window_end_for(moment: datetime.datetime, window_minutes: int = DEFAULT_WINDOW_MINUTES) -> datetime.datetime:
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = (moment - midnight).total_seconds()
+    windows = int(elapsed // (window_minutes * 60)) + 1
+    return midnight + datetime.timedelta(minutes=windows * window_minutes)
+
+
+def add_to_digest(notice_id: str, recipients: Iterable[str], window_minutes: int = DEFAULT_WINDOW_MINUTES) -> int:
+    window_end = window_end_for(datetime.datetime.now(), window_minutes)
+    now = datetime.datetime.now()
+    docs = [{'recipient': r, 'notice_id': notice_id, 'window_end': window_end, 'created_at': now}
+            for r in recipients]
+    if docs:
+        DigestEntry._get_collection().insert_many(docs, ordered=False)
+    return len(docs)
+
+
+def release_digest(batch_id: str, recipients: List[str]) -> None:
+    # Hand entries back to the next flush after a failed send
+    DigestEntry.objects(batch_id=batch_id, recipient__in=recipients).update(unset__batch_id=True, unset__claimed_at=True)
+
+
+def complete_digest(batch_id: str, recipients: List[str]) -> None:
+    # Drop entries once their digest is sent
+    DigestEntry.objects(batch_id=batch_id, recipient__in=recipients).delete()
+
+
+def render_digest(notices: List[dict]) -> Tuple[str, str]:
+    subject = f"Your notice digest: {len(notices)} new notice{'s' if len(notices) != 1 else ''}"
+    sections = []
+    for notice in notices:
+        heading = escape(notice['title'])
+        if notice.get('subject'):
+            heading += f" &mdash; {escape(notice['subject'])}"
+        sections.append(f"<h2>{heading}</h2>\n<div>{notice['content']}</div>")
+    body = "<h1>Notice Digest</h1>\n" + "\n<hr>\n".join(sections)
+    return subject, body
+
+
+class DigestSender:
+    """Flushes accumulated digest entries once their window has closed.
+
+    Recipients whose digests contain exactly the same notices are grouped, so
+    each distinct digest is rendered once and sent as one message per group
+    (the `send` callable chunks it further). The loop sleeps until the next
+    window boundary rather than polling. Entries are claimed with a batch id
+    before sending, so concurrent flushers never send the same entry twice.
+    `send` must complete_digest() or release_digest() the recipients it is
+    given; entries still claimed after `claim_timeout_seconds` are claimed
+    again by the next flush.
+    """
+
+    def __init__(self,
+                 load_notices: Callable[[List[str]], Dict[str, dict]],
+                 send: Callable[[str, List[str], str, str], None],
+                 window_minutes: int = DEFAULT_WINDOW_MINUTES,
+                 claim_timeout_seconds: int = DEFAULT_CLAIM_TIMEOUT_SECONDS):
+        self._load_notices = load_notices
+        self._send = send
+        self._window_minutes = window_minutes
+        self._claim_timeout = datetime.timedelta(seconds=claim_timeout_seconds)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def flush_due(self, now: Optional[datetime.datetime] = None) -> int:
+        now = now or datetime.datetime.now()
+        batch_id = uuid.uuid4().hex
+        unclaimed = Q(batch_id=None) | Q(claimed_at__lt=now - self._claim_timeout)
+        claimed = DigestEntry.objects(unclaimed, window_end__lte=now).update(set__batch_id=batch_id, set__claimed_at=now)
+        if not claimed:
+            return 0
+
+        by_recipient: Dict[str, List[str]] = {}
+        for entry in DigestEntry.objects(batch_id=batch_id).only('recipient', 'notice_id').order_by('created_at'):
+            notice_ids = by_recipient.setdefault(entry.recipient, [])
+            if entry.notice_id not in notice_ids:
+                notice_ids.append(entry.notice_id)
+
+        groups: Dict[tuple, List[str]] = {}
+        for recipient, notice_ids in by_recipient.items():
+            groups.setdefault(tuple(notice_ids), []).append(recipient)
+
+        notices = self._load_notices(list({nid for ids in groups for nid in ids}))
+        for notice_ids, recipients in groups.items():
+            items = [notices[nid] for nid in notice_ids if nid in notices]
+            if not items:
+                complete_digest(batch_id, recipients)  # Every notice was deleted
+                continue
+            subject, body = render_digest(items)
+            self._send(batch_id, recipients, subject, body)
+
+        print(f"📬 Digest flush: {claimed} entries -> {len(groups)} distinct digest(s) for {len(by_recipient)} recipient(s).")
+        return len(groups)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="notice-digest", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.flush_due()
+            except Exception as e:
+                print(f"❌ Digest flush failed: {e}")
+            next_boundary = window_end_for(datetime.datetime.now(), self._window_minutes)
+            self._stop.wait(max(1.0, (next_boundary - datetime.datetime.now()).total_seconds() + 1))
@@ -0,0 +1,132 @@
+import heapq
+import threading
+import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# --- CONFIGURATION ---
+# How often the scheduler re-reads pending notices from the database, i.e. the
+# most a notice scheduled by another process can publish late. In-process calls
+# to schedule() wake the loop immediately. The query is served by an index.
+DEFAULT_RESYNC_SECONDS = 15
+# How often `maintenance` runs
+DEFAULT_MAINTENANCE_SECONDS = 300
+
+
+class NoticeScheduler:
+    """Promotes scheduled notices at their publish_at time.
+
+    Keeps a min-heap of (publish_at, notice_id) and sleeps on a condition
+    variable until the earliest entry is due, so an idle scheduler costs no CPU.
+    `load_pending` returns (notice_id, publish_at) pairs for every scheduled
+    notice; `publish` must atomically claim a notice (scheduled -> published)
+    and return False if it was already claimed, which makes restarts and
+    multiple scheduler processes safe against double-publishing.
+    `maintenance`, if given, runs every `maintenance_seconds` (e.g. to retry
+    sends that a stopped process left unfinished).
+    """
+
+    def __init__(self,
+                 load_pending: Callable[[], Iterable[Tuple[str, datetime.datetime]]],
+                 publish: Callable[[str], bool],
+                 resync_seconds: int = DEFAULT_RESYNC_SECONDS,
+                 maintenance: Optional[Callable[[], None]] = None,
+                 maintenance_seconds: int = DEFAULT_MAINTENANCE_SECONDS):
+        self._load_pending = load_pending
+        self._publish = publish
+        self._maintenance = maintenance
+        self._resync_seconds = resync_seconds
+        self._maintenance_seconds = maintenance_seconds
+        self._heap: List[Tuple[datetime.datetime, str]] = []
+        self._pending: Dict[str, datetime.datetime] = {}  # notice_id -> current publish_at
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Public API ---
+    def schedule(self, notice_id: str, publish_at: datetime.datetime) -> None:
+        with self._cond:
+            self._pending[notice_id] = publish_at
+            heapq.heappush(self._heap, (publish_at, notice_id))
+            # Only wake the loop if this entry is now the earliest one
+            if self._heap[0][1] == notice_id:
+                self._cond.notify()
+
+    def cancel(self, notice_id: str) -> None:
+        # Heap entries are removed lazily when they reach the top
+        with self._cond:
+            self._pending.pop(notice_id, None)
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self.run_forever, name="notice-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def resync(self) -> None:
+        pending = {str(notice_id): publish_at for notice_id, publish_at in self._load_pending() if publish_at}
+        with self._cond:
+            changed = pending.keys() != self._pending.keys()
+            self._pending = pending
+            self._heap = [(publish_at, notice_id) for notice_id, publish_at in pending.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+        if changed:
+            print(f"🗓️ Scheduler loaded {len(pending)} scheduled notice(s).")
+
+    def run_forever(self) -> None:
+        next_resync = next_maintenance = datetime.datetime.now()
+        while True:
+            if datetime.datetime.now() >= next_resync:
+                try:
+                    self.resync()
+                except Exception as e:
+                    print(f"❌ Scheduler resync failed: {e}")
+                next_resync = datetime.datetime.now() + datetime.timedelta(seconds=self._resync_seconds)
+            if self._maintenance and datetime.datetime.now() >= next_maintenance:
+                try:
+                    self._maintenance()
+                except Exception as e:
+                    print(f"❌ Scheduler maintenance failed: {e}")
+                next_maintenance = datetime.datetime.now() + datetime.timedelta(seconds=self._maintenance_seconds)
+
+            with self._cond:
+                if self._stopped:
+                    return
+                due = self._pop_due(datetime.datetime.now())
+                if not due:
+                    wake_at = min(next_resync, next_maintenance) if self._maintenance else next_resync
+                    if self._heap and self._heap[0][0] < wake_at:
+                        wake_at = self._heap[0][0]
+                    timeout = (wake_at - datetime.datetime.now()).total_seconds()
+                    if timeout > 0:
+                        self._cond.wait(timeout)
+                    continue
+
+            for notice_id in due:
+                try:
+                    if self._publish(notice_id):
+                        print(f"✅ Scheduled notice {notice_id} published.")
+                except Exception as e:
+                    print(f"❌ Failed to publish scheduled notice {notice_id}: {e}")
+
+    # --- Internals (call with the lock held) ---
+    def _pop_due(self, now: datetime.datetime) -> List[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            publish_at, notice_id = heapq.heappop(self._heap)
+            # Skip entries that were cancelled or rescheduled since they were pushed
+            if self._pending.get(notice_id) != publish_at:
+                continue
+            del self._pending[notice_id]
+            due.append(notice_id)
+        return due
@@ -0,0 +1,25 @@
+import html
+import re
+
+HTML_TAG = re.compile(r'<[^>]+>')
+WHITESPACE = re.compile(r'\s+')
+EXCERPT_CHARS = 280
+
+
+def plain_text(content: str) -> str:
+    # Visible text of RTE HTML, whitespace collapsed
+    return WHITESPACE.sub(' ', html.unescape(HTML_TAG.sub(' ', content or ''))).strip()
+
+
+def excerpt(text: str, limit: int = EXCERPT_CHARS) -> str:
+    # First `limit` characters of plain text, cut back to a word boundary
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    if ' ' in cut:
+        cut = cut[:cut.rindex(' ')]
+    return cut.rstrip(' ,;:.') + '…'
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
@@ -0,0 +1,125 @@
+from typing import Dict, Mapping, Optional
+
+from utils.notice_text import excerpt, plain_text, word_count
+
+# Response builders for the hot read endpoints. They take raw documents
+# (QuerySet.as_pymongo() / pymongo dicts) instead of MongoEngine Documents,
+# so rows skip hydration and field validation. A missing key means the field
+# was never written; the fallbacks match the Document defaults.
+# The *_FIELDS tuples are the projections the queries pass to .only().
+# 'content' is only present on notices saved before bodies moved to
+# notice_bodies; their excerpt is derived from it until they are migrated.
+
+NOTICE_LIST_FIELDS = (
+    'id', 'title', 'subject', 'excerpt', 'word_count', 'content', 'notice_type', 'departments', 'program_course', 'specialization',
+    'year', 'section', 'priority', 'status', 'publish_at', 'created_at', 'read_count', 'created_by',
+    'creator_name', 'creator_email', 'predicted_category', 'category_confidence', 'predicted_priority',
+    'priority_confidence', 'model_version', 'classified_at', 'content_hash', 'classified_hash'
+)
+
+CREATOR_NOTICE_FIELDS = (
+    'id', 'title', 'excerpt', 'word_count', 'content', 'notice_type', 'departments', 'year', 'section', 'recipient_emails', 'priority',
+    'status', 'publish_at', 'created_at', 'updated_at', 'created_by', 'creator_name', 'creator_email', 'attachments'
+)
+
+STUDENT_LIST_FIELDS = ('email', 'official_email', 'name', 'univ_roll_no', 'course', 'branch')
+
+USER_LIST_FIELDS = ('id', 'name', 'email')
+
+
+def isoformat(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def classification_json(doc: Mapping) -> Optional[dict]:
+    if not doc.get('classified_at'):
+        return None
+    return {
+        "category": doc.get('predicted_category'),
+        "categoryConfidence": doc.get('category_confidence'),
+        "priority": doc.get('predicted_priority'),
+        "priorityConfidence": doc.get('priority_confidence'),
+        "modelVersion": doc.get('model_version'),
+        "classifiedAt": doc['classified_at'].isoformat(),
+        "stale": doc.get('classified_hash') != doc.get('content_hash')
+    }
+
+
+def excerpt_json(doc: Mapping) -> tuple:
+    # (excerpt, word count)
+    if doc.get('excerpt') is not None:
+        return doc['excerpt'], doc.get('word_count', 0)
+    text = plain_text(doc.get('content'))
+    return excerpt(text), word_count(text)
+
+
+def creator_json(doc: Mapping, legacy: Dict[str, Optional[dict]]) -> dict:
+    # legacy: creators of notices saved before creator_name existed, by user id
+    if doc.get('creator_name') is not None:
+        name, email = doc['creator_name'], doc.get('creator_email') or ""
+    else:
+        creator = legacy.get(doc['created_by'])
+        name, email = (creator["name"], creator["email"]) if creator else ("Unknown", "")
+    return {"id": doc['created_by'], "name": name, "email": email}
+
+
+def notice_list_json(doc: Mapping, legacy: Dict[str, Optional[dict]]) -> dict:
+    # The full HTML is served by /api/notices/<id> and /api/notices/<id>/content
+    summary, words = excerpt_json(doc)
+    return {
+        "id": str(doc['_id']),
+        "title": doc.get('title'),
+        "subject": doc.get('subject'),
+        "excerpt": summary,  # Plain text
+        "wordCount": words,
+        "noticeType": doc.get('notice_type'),
+        "departments": doc.get('departments', []),
+        "programCourse": doc.get('program_course', []),
+        "specialization": doc.get('specialization', "core"),
+        "year": doc.get('year', []),
+        "section": doc.get('section', []),
+        "priority": doc.get('priority', "Normal"),
+        "status": doc.get('status', "draft"),
+        "publishAt": isoformat(doc.get('publish_at')),
+        "createdAt": isoformat(doc.get('created_at')),
+        "readCount": doc.get('read_count', 0),
+        "classification": classification_json(doc),
+        "createdBy": creator_json(doc, legacy)
+    }
+
+
+def creator_notice_json(doc: Mapping, legacy: Dict[str, Optional[dict]]) -> dict:
+    # Row of /api/notices/created-by/<user_id> (snake_case keys)
+    summary, words = excerpt_json(doc)
+    return {
+        "id": str(doc['_id']),
+        "title": doc.get('title'),
+        "excerpt": summary,
+        "word_count": words,
+        "notice_type": doc.get('notice_type'),
+        "departments": doc.get('departments', []),
+        "year": doc.get('year', []),
+        "section": doc.get('section', []),
+        "recipient_emails": doc.get('recipient_emails', []),
+        "priority": doc.get('priority', "Normal"),
+        "status": doc.get('status', "draft"),
+        "publish_at": isoformat(doc.get('publish_at')),
+        "created_at": isoformat(doc.get('created_at')),
+        "updated_at": isoformat(doc.get('updated_at')),
+        "created_by": creator_json(doc, legacy),
+        "attachments": doc.get('attachments', [])
+    }
+
+
+def student_list_json(doc: Mapping) -> dict:
+    return {
+        "email": doc.get('official_email') or doc.get('email'),
+        "name": doc.get('name'),
+        "univ_roll_no": doc.get('univ_roll_no'),
+        "course": doc.get('course'),
+        "branch": doc.get('branch')
+    }
+
+
+def user_json(doc: Mapping) -> dict:
+    return {"id": str(doc['_id']), "name": doc.get('name'), "email": doc.get('email')}
@@ -0,0 +1,197 @@
+import contextlib
+import json
+import os
+import threading
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single writer there
+    fcntl = None
+
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = '.lock'
+
+
+@contextlib.contextmanager
+def file_lock(directory: str) -> Iterator[None]:
+    # Exclusive lock shared by every process writing under `directory`
+    with open(os.path.join(directory, LOCK_FILE), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def current_version(root: str) -> str:
+    # Subdirectory of `root` that holds the live index; '' is `root` itself,
+    # the layout of indexes written before rebuilds were versioned
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ''
+
+
+def publish_version(root: str, version: str) -> None:
+    # Points `root` at a fully built version in one atomic rename. Processes
+    # that already opened the index keep using their version until restarted.
+    with file_lock(root):
+        with open(os.path.join(root, f"{CURRENT_FILE}.tmp"), 'w') as f:
+            f.write(f"{version}\n")
+        os.replace(os.path.join(root, f"{CURRENT_FILE}.tmp"), os.path.join(root, CURRENT_FILE))
+
+
+class VectorIndex:
+    """Unit-length float32 vectors on disk, searched by cosine similarity.
+
+    The vectors live in one headerless float32 file (row-major, `dim` columns)
+    that is memory-mapped for search, so the matrix is paged in by the OS
+    instead of being loaded into the Python heap. A parallel text file holds
+    the id of each row. New ids are appended, re-indexed ids overwrite their
+    row in place, and removed ids are zeroed and marked "-" in the id file.
+    search() is one matrix-vector product plus argpartition for the top k.
+
+    The files are read from the version of `root` named by its CURRENT file
+    (see publish_version()), resolved once when the index is opened. Several
+    processes may write one index (API workers, scripts): every write holds
+    a file lock and first picks up rows the others appended or removed.
+    """
+
+    def __init__(self, root: str, dim: Optional[int] = None):
+        self.root = root
+        version = current_version(root)
+        self.directory = os.path.join(root, version) if version else root
+        os.makedirs(self.directory, exist_ok=True)
+        self._vectors_path = os.path.join(self.directory, 'vectors.f32')
+        self._ids_path = os.path.join(self.directory, 'ids.txt')
+        self._meta_path = os.path.join(self.directory, 'meta.json')
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._ids: List[Optional[str]] = []
+        self._rows = {}
+        self._stamp = None  # (size, mtime) of the ids file last read
+
+        self.dim = dim
+        with file_lock(self.directory):
+            self._refresh()
+            self._reconcile()
+
+    def _refresh(self) -> None:
+        # Re-reads the ids (and dim) if another process changed them since
+        try:
+            stat = os.stat(self._ids_path)
+            stamp = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._stamp:
+            return
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                self.dim = json.load(f)['dim']
+        self._ids = []
+        if stamp is not None:
+            with open(self._ids_path) as f:
+                self._ids = [None if line.strip() == '-' else line.strip() for line in f]
+        self._rows = {item_id: row for row, item_id in enumerate(self._ids) if item_id is not None}
+        self._stamp = stamp
+        self._matrix = None
+
+    def _mark_written(self) -> None:
+        stat = os.stat(self._ids_path)
+        self._stamp = (stat.st_size, stat.st_mtime_ns)
+
+    def _reconcile(self) -> None:
+        # An interrupted append can leave one file a row ahead of the other
+        rows = os.path.getsize(self._vectors_path) // (self.dim * 4) if self.dim and os.path.exists(self._vectors_path) else 0
+        count = min(rows, len(self._ids))
+        if rows != count:
+            with open(self._vectors_path, 'r+b') as f:
+                f.truncate(count * self.dim * 4)
+        if len(self._ids) != count:
+            self._ids = self._ids[:count]
+            self._rows = {item_id: row for row, item_id in enumerate(self._ids) if item_id is not None}
+            self._write_ids()
+            self._mark_written()
+
+    def _write_ids(self) -> None:
+        with open(f"{self._ids_path}.tmp", 'w') as f:
+            f.writelines(f"{item_id or '-'}\n" for item_id in self._ids)
+        os.replace(f"{self._ids_path}.tmp", self._ids_path)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def upsert(self, item_id: str, vector: Sequence[float]) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+
+        with self._lock, file_lock(self.directory):
+            self._refresh()
+            if self.dim is None:
+                self.dim = len(vector)
+            if not os.path.exists(self._meta_path):
+                with open(self._meta_path, 'w') as f:
+                    json.dump({'dim': self.dim}, f)
+            if len(vector) != self.dim:
+                raise ValueError(f"Vector has {len(vector)} dimensions, index has {self.dim}; rebuild the index")
+
+            row = self._rows.get(item_id)
+            if row is not None:
+                with open(self._vectors_path, 'r+b') as f:
+                    f.seek(row * self.dim * 4)
+                    f.write(vector.tobytes())
+                return
+
+            with open(self._vectors_path, 'ab') as f:
+                f.write(vector.tobytes())
+            with open(self._ids_path, 'a') as f:
+                f.write(f"{item_id}\n")
+            self._mark_written()
+            self._rows[item_id] = len(self._ids)
+            self._ids.append(item_id)
+            self._matrix = None  # Remapped at the new size on the next search
+
+    def remove(self, item_id: str) -> None:
+        with self._lock, file_lock(self.directory):
+            self._refresh()
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                return
+            with open(self._vectors_path, 'r+b') as f:
+                f.seek(row * self.dim * 4)
+                f.write(np.zeros(self.dim, dtype=np.float32).tobytes())
+            self._ids[row] = None
+            self._write_ids()
+            self._mark_written()
+
+    def search(self, vector: Sequence[float], k: int = 10) -> List[Tuple[str, float]]:
+        with self._lock:
+            self._refresh()  # Rows appended by other processes are searched too
+            if not self._rows:
+                return []
+            if self._matrix is None:
+                self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode='r', shape=(len(self._ids), self.dim))
+            matrix, ids, removed = self._matrix, list(self._ids), len(self._ids) - len(self._rows)
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = matrix @ query
+
+        # Removed rows score 0 and are skipped, so look a little deeper
+        top = min(len(ids), k + removed)
+        if top < len(ids):
+            candidates = np.argpartition(scores, -top)[-top:]
+        else:
+            candidates = np.arange(len(ids))
+        candidates = candidates[np.argsort(scores[candidates])[::-1]]
+        return [(ids[row], float(scores[row])) for row in candidates if ids[row] is not None][:k]
@@ -4,29 +4,46 @@ from typing import List
 import os
 import base64
 import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# --- CONFIGURATION (Unchanged) ---
-ULTRAMSG_INSTANCE_ID = "instance130052"  # Your UltraMsg Instance ID
-ULTRAMSG_TOKEN = "gxk8o0lq7caawdmh"      # Your UltraMsg Token
+# --- CONFIGURATION ---
+# Every setting can be overridden from the environment, e.g. to point delivery
+# at the local stand-in server in dev_servers/fake_ultramsg_server.py
+ULTRAMSG_API_URL = os.environ.get("ULTRAMSG_API_URL", "https://api.ultramsg.com").rstrip("/")
+ULTRAMSG_INSTANCE_ID = os.environ.get("ULTRAMSG_INSTANCE_ID", "instance130052")  # Your UltraMsg Instance ID
+ULTRAMSG_TOKEN = os.environ.get("ULTRAMSG_TOKEN", "gxk8o0lq7caawdmh")            # Your UltraMsg Token
+ULTRAMSG_TIMEOUT = float(os.environ.get("ULTRAMSG_TIMEOUT", 15))
+ULTRAMSG_CONCURRENCY = int(os.environ.get("ULTRAMSG_CONCURRENCY", 8))  # Parallel requests per bulk send
+
+# Long-lived sender threads, each with its own keep-alive session, instead of
+# a new TCP/TLS handshake per message
+_local = threading.local()
+_pool = ThreadPoolExecutor(max_workers=max(1, ULTRAMSG_CONCURRENCY), thread_name_prefix="ultramsg")
+
+def _session() -> requests.Session:
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+def _send_chat(url: str, number: str, message_body: str) -> bool:
+    payload = {"token": ULTRAMSG_TOKEN, "to": number, "body": message_body}
+    headers = {'content-type': 'application/x-www-form-urlencoded'}
+    try:
+        response = _session().post(url, data=payload, headers=headers, timeout=ULTRAMSG_TIMEOUT)
+        return response.ok and not response.json().get('error')
+    except Exception:
+        return False # Error handling can be improved here
 
-# This function for sending text remains the same
 def send_bulk_whatsapp(recipient_numbers: List[str], message_body: str) -> bool:
     if "instance12345" in ULTRAMSG_INSTANCE_ID or "your_ultramsg_token" in ULTRAMSG_TOKEN:
         print("\nERROR: UltraMsg credentials are not configured.")
         return False
     if not recipient_numbers: return False
 
-    url = f"https://api.ultramsg.com/{ULTRAMSG_INSTANCE_ID}/messages/chat"
-    success_count = 0
-    for number in recipient_numbers:
-        payload = {"token": ULTRAMSG_TOKEN, "to": number, "body": message_body}
-        headers = {'content-type': 'application/x-www-form-urlencoded'}
-        try:
-            response = requests.post(url, data=payload, headers=headers)
-            if response.ok and not response.json().get('error'):
-                success_count += 1
-        except Exception:
-            pass # Error handling can be improved here
+    url = f"{ULTRAMSG_API_URL}/{ULTRAMSG_INSTANCE_ID}/messages/chat"
+    results = list(_pool.map(lambda number: _send_chat(url, number, message_body), recipient_numbers))
+    success_count = sum(results)
     return success_count == len(recipient_numbers)
 
 # NEW: Function to send attachments (documents, images)
@@ -56,7 +73,7 @@ def send_whatsapp_attachment(recipient_numbers: List[str], file_path: str, capti
         print(f"Unsupported file type for WhatsApp: {mime_type}")
         return False
 
-    url = f"https://api.ultramsg.com/{ULTRAMSG_INSTANCE_ID}/messages/{endpoint}"
+    url = f"{ULTRAMSG_API_URL}/{ULTRAMSG_INSTANCE_ID}/messages/{endpoint}"
     
     success_count = 0
     print(f"Preparing to send WhatsApp attachment: {filename}")
@@ -73,7 +90,7 @@ def send_whatsapp_attachment(recipient_numbers: List[str], file_path: str, capti
 
         headers = {'content-type': 'application/x-www-form-urlencoded'}
         try:
-            response = requests.post(url, data=payload, headers=headers)
+            response = _session().post(url, data=payload, headers=headers, timeout=ULTRAMSG_TIMEOUT)
             if response.ok and not response.json().get('error'):
                 print(f"  -> Attachment sent successfully to {number}")
                 success_count += 1
@@ -255,10 +255,11 @@ export default function NoticeForm({ role = "academic" }) {
     }
 
     try {
-      const res = await fetch("http://localhost:5000/predict", {
+      const res = await fetch("http://localhost:5001/api/classify", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
+          Authorization: `Bearer ${token}`,
         },
         body: JSON.stringify({ text: textToClassify }),
       });
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { Bell, AlertTriangle, Info, CheckCircle, Filter, Search, Brain, Calendar, User, Star, ArrowRight, Clock, Tag, BarChart3, Eye, FileText, Shield, Users, Settings, RefreshCw, Loader2 } from 'lucide-react';
+import { Bell, AlertTriangle, Info, CheckCircle, Filter, Search, Brain, Calendar, User, Star, ArrowRight, Clock, Tag, BarChart3, Eye, FileText, Shield, Users, Settings, RefreshCw, Loader2, Mail } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
 
 const ProfessionalNoticePortal = () => {
@@ -11,6 +11,7 @@ const ProfessionalNoticePortal = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [refreshing, setRefreshing] = useState(false);
+  const [digest, setDigest] = useState(false);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -53,7 +54,7 @@ const ProfessionalNoticePortal = () => {
       const transformedNotices = data.map(notice => ({
         id: notice.id,
         title: notice.title,
-        content: notice.content,
+        content: notice.excerpt,
         priority: notice.priority.toLowerCase(),
         type: notice.notice_type || 'general',
         date: new Date(notice.createdAt).toLocaleDateString('en-CA'),
@@ -87,8 +88,39 @@ const ProfessionalNoticePortal = () => {
   // Load notices on component mount
   useEffect(() => {
     fetchNotices();
+    fetchDigestPreference();
   }, []);
 
+  // Daily digest: Normal-priority notices arrive as one email per day
+  const fetchDigestPreference = async () => {
+    try {
+      const response = await fetch('http://localhost:5001/api/me/digest', {
+        headers: { 'Authorization': `Bearer ${localStorage.getItem('token')}` },
+      });
+      if (response.ok) setDigest((await response.json()).digest);
+    } catch (err) {
+      console.error('Error fetching digest preference:', err);
+    }
+  };
+
+  const handleDigestChange = async (enabled) => {
+    setDigest(enabled);
+    try {
+      const response = await fetch('http://localhost:5001/api/me/digest', {
+        method: 'PUT',
+        headers: {
+          'Authorization': `Bearer ${localStorage.getItem('token')}`,
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ digest: enabled }),
+      });
+      if (!response.ok) setDigest(!enabled);
+    } catch (err) {
+      console.error('Error saving digest preference:', err);
+      setDigest(!enabled);
+    }
+  };
+
   // Manual refresh function
   const handleRefresh = () => {
     fetchNotices();
@@ -343,6 +375,21 @@ const ProfessionalNoticePortal = () => {
                   <span className="ml-2 text-sm text-gray-700">AI Insights</span>
                 </label>
               </div>
+              <div className="flex items-center space-x-2">
+                <Mail className="w-5 h-5 text-blue-600" />
+                <label className="flex items-center cursor-pointer">
+                  <input
+                    type="checkbox"
+                    checked={digest}
+                    onChange={(e) => handleDigestChange(e.target.checked)}
+                    className="sr-only"
+                  />
+                  <div className={`w-11 h-6 rounded-full transition-colors ${digest ? 'bg-blue-600' : 'bg-gray-300'}`}>
+                    <div className={`w-5 h-5 bg-white rounded-full shadow-md transform transition-transform ${digest ? 'translate-x-5' : 'translate-x-0'} mt-0.5`}></div>
+                  </div>
+                  <span className="ml-2 text-sm text-gray-700">Daily Digest</span>
+                </label>
+              </div>
             </div>
           </div>
         </div>
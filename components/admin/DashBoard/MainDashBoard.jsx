@@ -261,7 +261,7 @@ const AllNoticesAnalytics = () => {
                       <div className="text-sm font-medium text-gray-900">
                         {notice.title}
                         <div className="text-xs text-gray-500 mt-1">
-                          {notice.content.substring(0, 50)}...
+                          {notice.excerpt.substring(0, 50)}...
                         </div>
                       </div>
                     </div>
@@ -274,7 +274,7 @@ const fetchData = async () => {
                       <div className="text-sm font-medium text-gray-900">
                         {notice.title}
                         <div className="text-xs text-gray-500 mt-1">
-                          {notice.content.substring(0, 50)}...
+                          {notice.excerpt.substring(0, 50)}...
                         </div>
                       </div>
                     </div>
@@ -28,11 +28,8 @@ export default function NoticeForm() {
         }
     });
 
-    // --- STATE FOR DROPDOWN OPTIONS ---
-    const [departmentOptions, setDepartmentOptions] = useState([]);
-    const [courseOptions, setCourseOptions] = useState([]);
-    const [yearOptions, setYearOptions] = useState([]);
-    const [sectionOptions, setSectionOptions] = useState([]);
+    // --- DEPARTMENT -> COURSE -> YEAR -> SECTION TREE (one request) ---
+    const [taxonomy, setTaxonomy] = useState([]);
 
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState(null);
@@ -55,82 +52,60 @@ export default function NoticeForm() {
     const stringifiedCourseNames = useMemo(() => JSON.stringify(selectedCourseNames), [selectedCourseNames]);
     const stringifiedYears = useMemo(() => JSON.stringify(selectedYears), [selectedYears]);
 
-    // --- CHAINED DATA FETCHING LOGIC ---
+    // --- TAXONOMY FETCH; DROPDOWN OPTIONS ARE DERIVED FROM IT ---
     useEffect(() => {
         if (!token) return;
-        const fetchDepartments = async () => {
+        const fetchTaxonomy = async () => {
             try {
-                const response = await fetch('http://localhost:5001/api/departments', { headers: { "Authorization": `Bearer ${token}` } });
+                const response = await fetch('http://localhost:5001/api/taxonomy', { headers: { "Authorization": `Bearer ${token}` } });
                 if (!response.ok) throw new Error(`Failed to fetch departments`);
                 const data = await response.json();
-                setDepartmentOptions(data);
+                setTaxonomy(data.departments);
             } catch (err) { setError(err.message); }
         };
-        fetchDepartments();
+        fetchTaxonomy();
     }, [token]);
 
-    useEffect(() => {
-        const localSelectedDeptCodes = JSON.parse(stringifiedDeptCodes);
-        setValue("course", []); setCourseOptions([]);
-        if (!localSelectedDeptCodes || localSelectedDeptCodes.length === 0) return;
-        const fetchCourses = async () => {
-            try {
-                const response = await fetch(`http://localhost:5001/api/courses-by-departments`, {
-                    method: 'POST',
-                    headers: { 'Authorization': `Bearer ${token}`, 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ departments: localSelectedDeptCodes })
-                });
-                if (!response.ok) throw new Error('Failed to fetch courses');
-                const data = await response.json();
-                setCourseOptions(data);
-            } catch (err) { setError(err.message); }
-        };
-        fetchCourses();
-    }, [stringifiedDeptCodes, token, setValue]);
+    const departmentOptions = useMemo(
+        () => taxonomy.filter(d => d.code).map(d => ({ name: d.name, code: d.code })),
+        [taxonomy]
+    );
 
-    useEffect(() => {
-        const localSelectedDeptCodes = JSON.parse(stringifiedDeptCodes);
-        const localSelectedCourseNames = JSON.parse(stringifiedCourseNames);
-        setValue("year", []); setYearOptions([]);
-        const selectedDeptNames = departmentOptions.filter(opt => localSelectedDeptCodes.includes(opt.code)).map(opt => opt.name);
-        if (selectedDeptNames.length === 0 || localSelectedCourseNames.length === 0) return;
-        const params = new URLSearchParams();
-        selectedDeptNames.forEach(name => params.append('department', name));
-        localSelectedCourseNames.forEach(name => params.append('course', name));
-        const fetchYears = async () => {
-            try {
-                const response = await fetch(`http://localhost:5001/api/years?${params.toString()}`, { headers: { 'Authorization': `Bearer ${token}` } });
-                if (!response.ok) throw new Error('Failed to fetch years');
-                const data = await response.json();
-                setYearOptions(data);
-            } catch (err) { setError(err.message); }
-        };
-        fetchYears();
-    }, [stringifiedDeptCodes, stringifiedCourseNames, token, setValue, departmentOptions]);
+    const selectedDepartments = useMemo(
+        () => taxonomy.filter(d => d.code && JSON.parse(stringifiedDeptCodes).includes(d.code)),
+        [taxonomy, stringifiedDeptCodes]
+    );
 
-    useEffect(() => {
-        const localSelectedDeptCodes = JSON.parse(stringifiedDeptCodes);
-        const localSelectedCourseNames = JSON.parse(stringifiedCourseNames);
-        const localSelectedYears = JSON.parse(stringifiedYears);
-        setValue("section", []); setSectionOptions([]);
-        const selectedDeptNames = departmentOptions.filter(opt => localSelectedDeptCodes.includes(opt.code)).map(opt => opt.name);
-        if (selectedDeptNames.length === 0 || localSelectedCourseNames.length === 0 || localSelectedYears.length === 0) return;
-        const params = new URLSearchParams();
-        selectedDeptNames.forEach(name => params.append('department', name));
-        localSelectedCourseNames.forEach(name => params.append('course', name));
-        localSelectedYears.forEach(year => params.append('year', year));
-        const fetchSections = async () => {
-             try {
-                const response = await fetch(`http://localhost:5001/api/sections?${params.toString()}`, { headers: { 'Authorization': `Bearer ${token}` } });
-                if (!response.ok) throw new Error('Failed to fetch sections');
-                const data = await response.json();
-                setSectionOptions(data);
-            } catch (err) { setError(err.message); }
-        };
-        fetchSections();
-    }, [stringifiedDeptCodes, stringifiedCourseNames, stringifiedYears, token, setValue, departmentOptions]);
+    const courseOptions = useMemo(() => {
+        const courses = {};
+        selectedDepartments.forEach(d => d.courses.forEach(c => {
+            if (c.code && !courses[c.code]) courses[c.code] = { name: c.name, code: c.code };
+        }));
+        return Object.values(courses).sort((a, b) => a.name.localeCompare(b.name));
+    }, [selectedDepartments]);
+
+    const selectedYearNodes = useMemo(() => {
+        const courseNames = JSON.parse(stringifiedCourseNames);
+        return selectedDepartments.flatMap(d => d.courses.filter(c => courseNames.includes(c.name)).flatMap(c => c.years));
+    }, [selectedDepartments, stringifiedCourseNames]);
+
+    const yearOptions = useMemo(
+        () => [...new Set(selectedYearNodes.map(y => y.year))].sort(),
+        [selectedYearNodes]
+    );
+
+    const sectionOptions = useMemo(() => {
+        const years = JSON.parse(stringifiedYears);
+        const sections = selectedYearNodes.filter(y => years.includes(y.year)).flatMap(y => y.sections.map(s => s.section));
+        return [...new Set(sections)].sort();
+    }, [selectedYearNodes, stringifiedYears]);
+
+    // Changing a level clears the selections below it
+    useEffect(() => { setValue("course", []); }, [stringifiedDeptCodes, setValue]);
+    useEffect(() => { setValue("year", []); }, [stringifiedDeptCodes, stringifiedCourseNames, setValue]);
+    useEffect(() => { setValue("section", []); }, [stringifiedDeptCodes, stringifiedCourseNames, stringifiedYears, setValue]);
 
-    const onSubmit = async (data, publish = true) => {
+    const onSubmit = async (data, publish = true, duplicateAction = 'warn') => {
         setIsLoading(true);
         const formData = new FormData();
         const departmentObjects = departmentOptions.filter(d => data.department.includes(d.code));
@@ -146,6 +121,7 @@ export default function NoticeForm() {
         formData.append('status', publish ? 'published' : 'draft');
         formData.append('send_options', JSON.stringify(data.sendOptions));
         formData.append('recipient_emails', JSON.stringify(data.recipientEmails));
+        formData.append('duplicate_action', duplicateAction);
         if (data.attachments && data.attachments.length > 0) {
             data.attachments.forEach(file => formData.append('attachments', file));
         }
@@ -155,6 +131,18 @@ export default function NoticeForm() {
                 headers: { "Authorization": `Bearer ${token}` },
                 body: formData
             });
+            if (response.status === 409) {
+                // A nearly identical notice went out recently
+                const { duplicates } = await response.json();
+                const [match] = duplicates;
+                const sendAnyway = match && window.confirm(
+                    `"${match.title}" (${Math.round(match.similarity * 100)}% similar) was sent recently. ` +
+                    `Publish anyway, skipping everyone who already received it?`
+                );
+                if (sendAnyway) return onSubmit(data, publish, 'link');
+                setError("Not published: a nearly identical notice was sent recently.");
+                return;
+            }
             if (!response.ok) throw new Error((await response.json()).error);
             setSuccess(`Notice ${publish ? 'published' : 'saved'} successfully!`);
             setTimeout(() => navigate("/notices"), 1500);
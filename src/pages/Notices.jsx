@@ -68,7 +68,7 @@ const NoticeListPage = () => {
       const term = searchTerm.toLowerCase();
       results = results.filter(notice => 
         notice.title.toLowerCase().includes(term) || 
-        notice.content.toLowerCase().includes(term)
+        notice.excerpt.toLowerCase().includes(term)
       );
     }
 
@@ -165,12 +165,29 @@ const NoticeListPage = () => {
 
 const NoticeCard = ({ notice }) => {
   const [expanded, setExpanded] = useState(false);
+  const [content, setContent] = useState(null);
+
+  // Lists only carry an excerpt; the full body is fetched on first expand
+  const toggle = async () => {
+    setExpanded(!expanded);
+    if (expanded || content !== null) return;
+    try {
+      const response = await fetch(`http://localhost:5001/api/notices/${notice.id}/content`, {
+        headers: {
+          Authorization: `Bearer ${localStorage.getItem('token')}`,
+        },
+      });
+      if (response.ok) setContent(await response.text());
+    } catch (err) {
+      console.error('Error fetching notice content:', err);
+    }
+  };
 
   return (
     <div className={`bg-white rounded-lg shadow-sm border overflow-hidden transition-all duration-200 ${expanded ? 'ring-2 ring-blue-500' : ''}`}>
       <div 
         className={`p-6 cursor-pointer ${expanded ? 'bg-gray-50' : 'bg-white'}`}
-        onClick={() => setExpanded(!expanded)}
+        onClick={toggle}
       >
         <div className="flex justify-between items-start">
           <div>
@@ -197,7 +214,7 @@ const NoticeCard = ({ notice }) => {
         {expanded && (
           <div className="mt-4">
             <div className="prose max-w-none text-gray-700 whitespace-pre-line">
-              {notice.content}
+              {content ?? notice.excerpt}
             </div>
             <div className="mt-4 pt-4 border-t border-gray-200 flex justify-between items-center">
               <div className="flex space-x-4">